@@ -0,0 +1,62 @@
+import time
+
+import arxiv
+import feedparser
+import requests
+
+from rate_limiter import PRIORITY_INTERACTIVE, PriorityRateLimiter, backoff_delay, retry_after_seconds
+
+# Statuses arXiv uses to tell clients to slow down
+THROTTLE_STATUSES = {429, 503}
+USER_AGENT = "arxiv.py/2.2.0"
+
+
+class ScheduledClient(arxiv.Client):
+    """
+    arxiv.Client whose page requests go through a shared PriorityRateLimiter.
+
+    The limiter replaces the library's per-client delay_seconds, which doesn't
+    space requests made by different clients. Throttling responses (429/503)
+    pause the limiter for the Retry-After time, or an exponential backoff with
+    jitter, and are retried up to `num_retries` times. Other server errors and
+    connection errors are retried after a backoff too, without pausing anyone
+    but the caller.
+    """
+    def __init__(self, limiter: PriorityRateLimiter, priority: int = PRIORITY_INTERACTIVE,
+                 page_size: int = 100, num_retries: int = 5):
+        super().__init__(page_size=page_size, delay_seconds=0, num_retries=num_retries)
+        self.limiter = limiter
+        self.priority = priority
+
+    def _parse_feed(self, url: str, first_page: bool = True, _try_index: int = 0) -> feedparser.FeedParserDict:
+        for attempt in range(_try_index, self.num_retries + 1):
+            if attempt > _try_index:
+                self.limiter.stats["retries"] += 1
+            self.limiter.acquire(self.priority)
+            try:
+                response = self._session.get(url, headers={"user-agent": USER_AGENT})
+            except requests.exceptions.ConnectionError:
+                if attempt == self.num_retries:
+                    self.limiter.stats["failures"] += 1
+                    raise
+                time.sleep(backoff_delay(attempt))
+                continue
+            if response.status_code in THROTTLE_STATUSES and attempt < self.num_retries:
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                self.limiter.pause(delay if delay is not None else backoff_delay(attempt))
+                continue
+            if response.status_code >= 500 and attempt < self.num_retries:
+                # A failing server, not a request to slow down: only this request backs off
+                time.sleep(backoff_delay(attempt))
+                continue
+            if response.status_code != requests.codes.OK:
+                self.limiter.stats["failures"] += 1
+                raise arxiv.HTTPError(url, attempt, response.status_code)
+            feed = feedparser.parse(response.content)
+            if len(feed.entries) == 0 and not first_page:
+                # arXiv sometimes returns an empty page in the middle of the results
+                if attempt == self.num_retries:
+                    self.limiter.stats["failures"] += 1
+                    raise arxiv.UnexpectedEmptyPageError(url, attempt, feed)
+                continue
+            return feed
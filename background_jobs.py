@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import asyncio
+import threading
+import time
+import uuid
+
+
+class SearchJob:
+    """
+    A search that keeps fetching and storing pages in the background.
+
+    The worker thread fills paper_ids page by page and checks cancel_requested
+    between results; the event loop is told about every change through
+    changed(), which wakes up everyone waiting in wait(). `waiters` counts the
+    search_papers calls still waiting for the first page, which all share the job.
+    """
+    def __init__(self, topic: str, max_results: int):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.topic = topic
+        self.max_results = max_results
+        self.status = "running"  # running, completed, cancelled or failed
+        self.paper_ids: List[str] = []
+        self.fetched = 0
+        self.error: Optional[str] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.cancel_requested = threading.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.version = 0
+        self.condition = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    @property
+    def uri(self) -> str:
+        return f"papers://jobs/{self.job_id}"
+
+    def finish(self, status: str, error: str = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished = time.time()
+
+    async def changed(self) -> None:
+        async with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    async def wait(self, version: int, timeout: float) -> bool:
+        """Wait until the job changed after `version` or is done. Returns False on timeout."""
+        async with self.condition:
+            try:
+                await asyncio.wait_for(
+                    self.condition.wait_for(lambda: self.version != version or self.done), timeout
+                )
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'topic': self.topic,
+            'status': "cancelling" if self.status == "running" and self.cancel_requested.is_set() else self.status,
+            'fetched': self.fetched,
+            'max_results': self.max_results,
+            'paper_ids': list(self.paper_ids),
+            'error': self.error,
+            'elapsed_seconds': round((self.finished or time.time()) - self.started, 2)
+        }
+
+
+class JobRegistry:
+    """Jobs by id; only the most recent `keep_finished` finished jobs are kept."""
+    def __init__(self, keep_finished: int = 100):
+        self.keep_finished = keep_finished
+        self.jobs: "OrderedDict[str, SearchJob]" = OrderedDict()
+
+    def add(self, job: SearchJob) -> SearchJob:
+        self.jobs[job.job_id] = job
+        finished = [job_id for job_id, existing in self.jobs.items() if existing.done]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job_id]
+        return job
+
+    def get(self, job_id: str) -> Optional[SearchJob]:
+        return self.jobs.get(job_id)
+
+    def running(self, topic: str, max_results: int) -> Optional[SearchJob]:
+        """A running job for the same search, which a new caller can join."""
+        for job in self.jobs.values():
+            if not job.done and job.topic == topic and job.max_results == max_results:
+                return job
+        return None
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
@@ -0,0 +1,114 @@
+"""
+The research server's arXiv rate limiter against a local stand-in that throttles.
+
+    uv run benchmarks/bench_arxiv_scheduler.py --background 20 --interactive 5 --throttle-every 7
+
+A local Atom feed server answers every --throttle-every'th request with 503 or
+429 (alternating, with Retry-After). Background and interactive fetches are
+started at the same time from worker threads; the report shows that every
+fetch succeeds despite throttling and how long each priority class waited.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import arxiv
+from arxiv_fetch import ScheduledClient
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PriorityRateLimiter
+
+TOTAL_RESULTS = 10
+
+
+def stand_in(throttle_every: int):
+    """Atom stand-in for the arXiv API; returns the server and its request counter."""
+    counter = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                counter["requests"] += 1
+                number = counter["requests"]
+            if throttle_every and number % throttle_every == 0:
+                self.send_response(503 if number // throttle_every % 2 else 429)
+                self.send_header("Retry-After", "0.2")
+                self.end_headers()
+                return
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            start = int(query.get("start", ["0"])[0])
+            size = int(query.get("max_results", ["10"])[0])
+            entries = "".join(
+                f"<entry><id>http://arxiv.org/abs/2401.{i:05d}v1</id>"
+                f"<updated>2024-01-01T00:00:00Z</updated><published>2024-01-01T00:00:00Z</published>"
+                f"<title>Paper {i}</title><summary>Summary {i}</summary><author><name>Author {i}</name></author>"
+                f"<link href=\"http://arxiv.org/pdf/2401.{i:05d}v1\" title=\"pdf\" rel=\"related\"/>"
+                f"<arxiv:primary_category xmlns:arxiv=\"http://arxiv.org/schemas/atom\" term=\"math.RA\"/>"
+                f"<category term=\"math.RA\"/></entry>"
+                for i in range(start, min(start + size, TOTAL_RESULTS))
+            )
+            body = (
+                '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom" '
+                'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+                f"<opensearch:totalResults>{TOTAL_RESULTS}</opensearch:totalResults>{entries}</feed>"
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/atom+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--background", type=int, default=20)
+    parser.add_argument("--interactive", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=20.0, help="requests per second")
+    parser.add_argument("--throttle-every", type=int, default=7)
+    args = parser.parse_args()
+
+    server, counter = stand_in(args.throttle_every)
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/query?{{}}"
+    limiter = PriorityRateLimiter(args.rate, burst=1)
+
+    def fetch(priority):
+        started = time.perf_counter()
+        client = ScheduledClient(limiter, priority, page_size=5)
+        client.query_url_format = url
+        papers = list(client.results(arxiv.Search(query="algebra", max_results=TOTAL_RESULTS)))
+        return priority, len(papers), time.perf_counter() - started
+
+    jobs = [PRIORITY_BACKGROUND] * args.background
+    with ThreadPoolExecutor(max_workers=len(jobs) + args.interactive) as pool:
+        futures = [pool.submit(fetch, priority) for priority in jobs]
+        # Interactive calls arrive once the background ones are queued
+        time.sleep(0.2)
+        futures += [pool.submit(fetch, PRIORITY_INTERACTIVE) for _ in range(args.interactive)]
+        results = [future.result() for future in futures]
+    server.shutdown()
+
+    for name, priority in (("interactive", PRIORITY_INTERACTIVE), ("background", PRIORITY_BACKGROUND)):
+        times = [elapsed for p, _, elapsed in results if p == priority]
+        complete = sum(1 for p, count, _ in results if p == priority and count == TOTAL_RESULTS)
+        print(f"{name:<12} {complete}/{len(times)} complete, "
+              f"median {statistics.median(times):.2f}s, max {max(times):.2f}s")
+    print(f"stand-in requests: {counter['requests']}")
+    print(json.dumps(limiter.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
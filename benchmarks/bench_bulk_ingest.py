@@ -0,0 +1,78 @@
+"""
+Throughput of bulk_ingest.py on a synthetic arXiv metadata snapshot.
+
+    uv run benchmarks/bench_bulk_ingest.py --papers 200000 --workers 4
+
+The snapshot and the paper store are written to a temporary directory. With
+--keep the snapshot is written to the given path instead and kept, e.g. to try
+interrupting and resuming the CLI by hand.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bulk_ingest import ingest
+from paper_store import PaperStore
+
+CATEGORIES = ["cs.AI", "cs.LG", "cs.CL", "math.CO", "math.AG", "hep-th", "quant-ph", "stat.ML"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def write_snapshot(path, count, seed=0):
+    """Write `count` records in the format of the public arXiv metadata snapshot."""
+    rng = random.Random(seed)
+    # A realistic vocabulary size, so unrelated abstracts rarely share LSH buckets
+    words = [f"w{rng.randint(0, 10**6):x}" for _ in range(20000)]
+    with open(path, "w") as snapshot:
+        for i in range(count):
+            year = rng.randint(1995, 2025)
+            authors = [[f"Lastname{rng.randint(0, 20000)}", f"First{rng.randint(0, 500)}", ""]
+                       for _ in range(rng.randint(1, 5))]
+            record = {
+                "id": f"{year % 100:02d}{rng.randint(1, 12):02d}.{i:05d}",
+                "submitter": "Someone",
+                "authors": ", ".join(f"{first} {last}" for last, first, _ in authors),
+                "title": " ".join(rng.choices(words, k=8)).title(),
+                "comments": None,
+                "journal-ref": None,
+                "doi": None,
+                "categories": " ".join(rng.sample(CATEGORIES, rng.randint(1, 3))),
+                "abstract": "  " + " ".join(rng.choices(words, k=rng.randint(60, 180))) + "\n",
+                "versions": [
+                    {"version": f"v{v + 1}",
+                     "created": f"Mon, {rng.randint(1, 28)} {rng.choice(MONTHS)} {year} 12:00:00 GMT"}
+                    for v in range(rng.randint(1, 3))
+                ],
+                "update_date": f"{year}-06-01",
+                "authors_parsed": authors
+            }
+            snapshot.write(json.dumps(record) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--category", action="append", dest="categories")
+    parser.add_argument("--keep", help="write the snapshot to this path and keep it")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = args.keep or os.path.join(directory, "snapshot.json")
+        started = time.perf_counter()
+        write_snapshot(snapshot, args.papers)
+        print(f"Wrote {os.path.getsize(snapshot) / 2**20:.1f} MiB snapshot in {time.perf_counter() - started:.1f}s")
+
+        report = ingest(snapshot, PaperStore(os.path.join(directory, "papers")), args.categories,
+                        workers=args.workers)
+        print(json.dumps(report, indent=2))
+        print(f"{report['records_read'] / report['seconds']:,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Model tiering of MCP_Chatbot with fake chat models and a fake MCP session.
+
+    uv run benchmarks/bench_model_tiering.py --queries 20 --fast-latency 0.1 --strong-latency 0.5
+
+Every query takes --tool-turns tool-routing turns before the final answer.
+The fake fast model emits a malformed tool call every --malformed'th turn. The
+same queries are run with the strong model only and with tiering, and the
+latency and per-tier accounting of both runs are reported.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_core.messages import AIMessage
+from mcp import Tool
+from mcp.types import CallToolResult, TextContent
+from mcp_chatbot import MCP_Chatbot, Conversation
+
+
+class FakeChatModel:
+    """Answers after `tool_turns` tool results, with a fixed latency and token usage."""
+    def __init__(self, name, latency, tool_turns, malformed_every=0):
+        self.name = name
+        self.latency = latency
+        self.tool_turns = tool_turns
+        self.malformed_every = malformed_every
+        self.calls = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        usage = {"input_tokens": 50 * len(messages), "output_tokens": 20, "total_tokens": 50 * len(messages) + 20}
+        # Tool results since the last question
+        done = 0
+        for message in messages:
+            if message.type == "human":
+                done = 0
+            elif message.type == "tool":
+                done += 1
+        if done >= self.tool_turns:
+            return AIMessage(content=f"answer from {self.name}", id=f"{self.name}-{self.calls}", usage_metadata=usage)
+        name = "search_papers"
+        if self.malformed_every and self.calls % self.malformed_every == 0:
+            name = "no_such_tool"
+        return AIMessage(content="", id=f"{self.name}-{self.calls}", usage_metadata=usage, tool_calls=[
+            {"name": name, "args": {"topic": "algebra"}, "id": f"{self.name}-call-{self.calls}"}
+        ])
+
+
+class FakeSession:
+    async def call_tool(self, name, args):
+        await asyncio.sleep(0.01)
+        return CallToolResult(content=[TextContent(type="text", text=json.dumps(["2401.00001v1"]))])
+
+
+async def run(args, fast_model):
+    chatbot = MCP_Chatbot()
+    chatbot.response_cache = None
+    chatbot.model, chatbot.fast_model = "strong", fast_model
+    chatbot.chat_models = {
+        "strong": FakeChatModel("strong", args.strong_latency, args.tool_turns),
+        "fast": FakeChatModel("fast", args.fast_latency, args.tool_turns, args.malformed)
+    }
+    chatbot.available_tools = [Tool(name="search_papers", description="Search arXiv", inputSchema={"type": "object"})]
+    chatbot.tool_to_session["search_papers"] = FakeSession()
+    started = time.perf_counter()
+    answers = []
+    # The chatbot's debug output isn't part of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(args.queries):
+            answers.append(await chatbot.process_query(f"query {i}", Conversation(str(i))))
+    elapsed = time.perf_counter() - started
+    return elapsed, answers, chatbot.model_report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--tool-turns", type=int, default=2)
+    parser.add_argument("--fast-latency", type=float, default=0.1)
+    parser.add_argument("--strong-latency", type=float, default=0.5)
+    parser.add_argument("--malformed", type=int, default=7)
+    args = parser.parse_args()
+
+    for label, fast_model in (("strong only", None), ("tiered", "fast")):
+        elapsed, answers, report = asyncio.run(run(args, fast_model))
+        strong_answers = sum(1 for answer in answers if answer == "answer from strong")
+        print(f"{label:<12} {elapsed:.2f}s for {args.queries} queries, "
+              f"{strong_answers}/{len(answers)} answers from the strong model")
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Memory of the research server's paper cache: plain dict-of-dicts (as loaded from
+papers_info.json) versus the compact PaperCatalog.
+
+    uv run benchmarks/bench_paper_records.py --papers 100000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from paper_records import PaperCatalog
+
+
+def synthetic_papers(count, author_pool=20000, seed=0):
+    rng = random.Random(seed)
+    authors = [f"Author {i} Lastname{i % 997}" for i in range(author_pool)]
+    words = "algebra quantum lattice graph neural field theory group ring module topology".split()
+    papers = {}
+    for i in range(count):
+        paper_id = f"{2000 + i // 1000:04d}.{i % 100000:05d}v{rng.randint(1, 3)}"
+        papers[paper_id] = {
+            "title": " ".join(rng.choices(words, k=8)).title(),
+            "authors": rng.sample(authors, rng.randint(1, 5)),
+            "summary": " ".join(rng.choices(words, k=rng.randint(60, 180))),
+            "pdf_url": f"http://arxiv.org/pdf/{paper_id}",
+            "published": f"{rng.randint(1995, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        }
+    return papers
+
+
+def measure(build):
+    """Memory retained by build() and the time it takes, timed untraced since tracing slows allocations."""
+    gc.collect()
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=100000)
+    args = parser.parse_args()
+
+    text = json.dumps(synthetic_papers(args.papers))
+
+    papers, dict_bytes, dict_time = measure(lambda: json.loads(text))
+    del papers
+
+    def build_catalog():
+        catalog = PaperCatalog()
+        for paper_id, info in json.loads(text).items():
+            catalog.add("synthetic", paper_id, info)
+        return catalog
+
+    catalog, catalog_bytes, catalog_time = measure(build_catalog)
+
+    print(f"papers:           {args.papers}")
+    print(f"dict-of-dicts:    {dict_bytes / 2**20:8.1f} MiB  (load {dict_time:.2f}s)")
+    print(f"PaperCatalog:     {catalog_bytes / 2**20:8.1f} MiB  (load {catalog_time:.2f}s)")
+    print(f"  summary buffer: {len(catalog.summaries) / 2**20:8.1f} MiB")
+    print(f"  unique authors: {len(catalog.authors.names)}")
+    print(f"reduction:        {100 * (1 - catalog_bytes / dict_bytes):8.1f} %")
+    assert catalog_bytes < dict_bytes, "the PaperCatalog takes more memory than the dicts it replaces"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Latency of similar_papers' top-k cosine scan over a memory-mapped vector matrix.
+
+    uv run benchmarks/bench_paper_vectors.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from paper_vectors import PaperVectors, VECTOR_DIM, embed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Write a random unit-norm matrix straight to disk, chunk by chunk
+        vectors = PaperVectors(directory)
+        rng = np.random.default_rng(0)
+        with open(vectors.matrix_path, "wb") as matrix_file:
+            for start in range(0, args.rows, 100000):
+                block = rng.standard_normal((min(100000, args.rows - start), VECTOR_DIM), dtype=np.float32)
+                block /= np.linalg.norm(block, axis=1, keepdims=True)
+                matrix_file.write(block.tobytes())
+        with open(vectors.ids_path, "w") as ids_file:
+            ids_file.writelines(f"paper-{i}\n" for i in range(args.rows))
+        vectors = PaperVectors(directory)
+
+        query = embed("quantum groups and representations of invariant algebras")
+        vectors.top_k(query, args.k)  # warm the page cache
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            vectors.top_k(query, args.k)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        print(f"rows:    {args.rows} x {VECTOR_DIM} float32 ({args.rows * VECTOR_DIM * 4 / 2**20:.0f} MiB mapped)")
+        print(f"top-{args.k}:  best {min(timings):.1f} ms, median {sorted(timings)[len(timings) // 2]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+PDF resources of the research server against a local stand-in for arxiv.org.
+
+    uv run benchmarks/bench_pdf_cache.py --size-mb 64 --readers 8
+
+A stand-in HTTP server serves a generated PDF of --size-mb MiB. --readers
+clients read papers://{paper_id}/pdf at the same time, then every chunk is
+read through papers://{paper_id}/pdf/{offset}. The report shows the number of
+downloads (1 expected), whether the chunks add up to the served file, the
+chunk read latency and the peak memory allocated by Python while reading.
+"""
+import argparse
+import asyncio
+import hashlib
+import http.server
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_pdf(path, size):
+    block = os.urandom(2**20)
+    with open(path, "wb") as file:
+        file.write(b"%PDF-1.5\n")
+        while file.tell() < size:
+            file.write(block[:size - file.tell()])
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def serve(path):
+    """A stand-in for arxiv.org/pdf that counts its requests."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        requests = 0
+
+        def do_GET(self):
+            Handler.requests += 1
+            time.sleep(0.2)  # arXiv takes a while to answer
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.end_headers()
+            with open(path, "rb") as file:
+                while block := file.read(2**16):
+                    self.wfile.write(block)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, Handler
+
+
+async def run(research_server, paper_id, readers):
+    uri = f"papers://{paper_id}/pdf"
+    started = time.perf_counter()
+    infos = await asyncio.gather(*(research_server.mcp.read_resource(uri) for _ in range(readers)))
+    first_read = time.perf_counter() - started
+    info = json.loads(infos[0][0].content)
+
+    digest = hashlib.sha256()
+    latencies = []
+    tracemalloc.start()
+    for chunk_uri in info["chunks"]:
+        started = time.perf_counter()
+        contents = await research_server.mcp.read_resource(chunk_uri)
+        latencies.append(time.perf_counter() - started)
+        digest.update(contents[0].content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # A range across a chunk boundary
+    offset = info["chunk_size"] - 10
+    contents = await research_server.mcp.read_resource(f"papers://{paper_id}/pdf/{offset}/20")
+    return info, first_read, digest.hexdigest(), latencies, peak, contents[0].content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    pdf_path = os.path.join(directory, "served.pdf")
+    expected = make_pdf(pdf_path, args.size_mb * 2**20)
+    server, handler = serve(pdf_path)
+
+    # Importing the server opens its paper store in the working directory
+    os.chdir(directory)
+    import research_server
+    research_server.arxiv_limiter.rate = 1000
+    paper_id = "2401.00001v1"
+    research_server.store.save_batch([("pdf_bench", paper_id, {
+        "title": "A large PDF", "authors": ["Ada Lovelace"], "summary": "Benchmark paper.",
+        "pdf_url": f"http://127.0.0.1:{server.server_port}/pdf/{paper_id}", "published": "2024-01-01"
+    }, None)])
+
+    info, first_read, digest, latencies, peak, boundary = asyncio.run(run(research_server, paper_id, args.readers))
+    server.shutdown()
+    latencies.sort()
+    print(f"{args.readers} concurrent first reads: {first_read:.2f}s, {handler.requests} download(s)")
+    print(f"{len(info['chunks'])} chunks of {info['chunk_size']} bytes, content matches: {digest == expected}")
+    print(f"chunk read latency: median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"max {latencies[-1] * 1000:.2f} ms")
+    print(f"peak Python allocation while reading {info['size'] / 2**20:.0f} MiB: {peak / 2**20:.1f} MiB")
+    with open(pdf_path, "rb") as file:
+        file.seek(info["chunk_size"] - 10)
+        print(f"range across the first chunk boundary matches: {boundary == file.read(20)}")
+    print(json.dumps(research_server.pdfs.stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
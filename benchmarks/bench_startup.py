@@ -0,0 +1,113 @@
+"""
+Cold-start time and memory of the research server and the chatbot.
+
+    uv run benchmarks/bench_startup.py --runs 5
+
+For each process it reports the median wall-clock time and peak RSS over the
+runs, and an import-time profile (python -X importtime) summed per top-level
+package, so it is visible what a launch spends its time importing.
+
+- research_server: from spawning `research_server.py` (stdio) until it answers
+  the MCP initialize request, in an empty working directory.
+- mcp_chatbot: importing mcp_chatbot and constructing MCP_Chatbot().
+"""
+from collections import defaultdict
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INITIALIZE = {
+    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench_startup", "version": "0"}
+    }
+}
+CHATBOT_SNIPPET = f"import sys; sys.path.insert(0, {ROOT!r}); import mcp_chatbot; mcp_chatbot.MCP_Chatbot()"
+
+
+def environment():
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    return env
+
+
+def wait_rss(process):
+    """Wait for a child and return its peak RSS in MiB (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    _, _, usage = os.wait4(process.pid, 0)
+    process.returncode = 0
+    return usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def start_server(workdir):
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "research_server.py")],
+        cwd=workdir, env=environment(),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    process.stdin.write((json.dumps(INITIALIZE) + "\n").encode())
+    process.stdin.flush()
+    response = process.stdout.readline()
+    elapsed = time.perf_counter() - started
+    if b'"result"' not in response:
+        raise RuntimeError(f"Unexpected initialize response: {response!r}")
+    process.stdin.close()
+    return elapsed, wait_rss(process)
+
+
+def start_chatbot(workdir):
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", CHATBOT_SNIPPET], cwd=workdir, env=environment())
+    rss = wait_rss(process)
+    return time.perf_counter() - started, rss
+
+
+def import_profile(module, workdir, top=8):
+    """Import time per top-level package, from python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {ROOT!r}); import {module}"],
+        cwd=workdir, env=environment(), capture_output=True, text=True
+    )
+    per_package = defaultdict(int)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us)
+        total += int(self_us)
+    ranked = sorted(per_package.items(), key=lambda item: -item[1])[:top]
+    return total, ranked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, start, module in (
+            ("research_server", start_server, "research_server"),
+            ("mcp_chatbot", start_chatbot, "mcp_chatbot")
+        ):
+            runs = [start(workdir) for _ in range(args.runs)]
+            wall = statistics.median(elapsed for elapsed, _ in runs)
+            rss = statistics.median(rss for _, rss in runs)
+            total, ranked = import_profile(module, workdir)
+            print(f"{name}: {wall * 1000:.0f} ms, peak RSS {rss:.1f} MiB (median of {args.runs})")
+            print(f"  imports: {total / 1000:.0f} ms")
+            for package, self_us in ranked:
+                print(f"    {package:<24} {self_us / 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Per-query tool selection of MCP_Chatbot on the tools of server_config.json.
+
+    uv run benchmarks/bench_tool_pruning.py --limit 8
+
+The research server's tools are read from research_server.py; the filesystem
+and fetch servers' tools are listed below. Every labelled query is run
+through the chatbot's tool selection. The report shows the estimated schema
+tokens sent with and without pruning, and the recall of the tools each query
+needs: a needed tool that isn't offered is a quality regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from langchain_core.messages import HumanMessage
+from mcp import Tool
+from mcp_chatbot import MCP_Chatbot, Conversation
+
+
+def tool(name, description, **properties):
+    return Tool(name=name, description=description, inputSchema={
+        "type": "object", "properties": {key: {"type": "string", "description": value} for key, value in properties.items()}
+    })
+
+
+FILESYSTEM_TOOLS = [
+    tool("read_file", "Read the complete contents of a file from the file system. Handles various text encodings "
+         "and provides detailed error messages if the file cannot be read. Use this tool when you need to examine "
+         "the contents of a single file. Only works within allowed directories.", path="Path of the file"),
+    tool("read_multiple_files", "Read the contents of multiple files simultaneously. This is more efficient than "
+         "reading files one by one when you need to analyze or compare multiple files. Each file's content is "
+         "returned with its path as a reference. Only works within allowed directories.", paths="Paths of the files"),
+    tool("write_file", "Create a new file or completely overwrite an existing file with new content. Use with "
+         "caution as it will overwrite existing files without warning. Handles text content with proper encoding. "
+         "Only works within allowed directories.", path="Path of the file", content="Content to write"),
+    tool("edit_file", "Make line-based edits to a text file. Each edit replaces exact line sequences with new "
+         "content. Returns a git-style diff showing the changes made. Only works within allowed directories.",
+         path="Path of the file", edits="Edits to apply", dryRun="Preview changes using git-style diff format"),
+    tool("create_directory", "Create a new directory or ensure a directory exists. Can create multiple nested "
+         "directories in one operation. If the directory already exists, this operation will succeed silently. "
+         "Only works within allowed directories.", path="Path of the directory"),
+    tool("list_directory", "Get a detailed listing of all files and directories in a specified path. Results "
+         "clearly distinguish between files and directories with [FILE] and [DIR] prefixes. Only works within "
+         "allowed directories.", path="Path of the directory"),
+    tool("list_directory_with_sizes", "Get a detailed listing of all files and directories in a specified path, "
+         "including sizes. Only works within allowed directories.", path="Path of the directory",
+         sortBy="Sort entries by name or size"),
+    tool("directory_tree", "Get a recursive tree view of files and directories as a JSON structure. Each entry "
+         "includes 'name', 'type' (file/directory), and 'children' for directories. Only works within allowed "
+         "directories.", path="Path of the directory"),
+    tool("move_file", "Move or rename files and directories. Can move files between directories and rename them "
+         "in a single operation. If the destination exists, the operation will fail. Only works within allowed "
+         "directories.", source="Source path", destination="Destination path"),
+    tool("search_files", "Recursively search for files and directories matching a pattern. Searches through all "
+         "subdirectories from the starting path. The search is case-insensitive and matches partial names. Only "
+         "searches within allowed directories.", path="Starting path", pattern="Pattern to match",
+         excludePatterns="Patterns to exclude"),
+    tool("get_file_info", "Retrieve detailed metadata about a file or directory. Returns comprehensive information "
+         "including size, creation time, last modified time, permissions, and type. Only works within allowed "
+         "directories.", path="Path of the file or directory"),
+    tool("list_allowed_directories", "Returns the list of directories that this server is allowed to access. Use "
+         "this to understand which directories are available before trying to access files."),
+]
+FETCH_TOOLS = [
+    tool("fetch", "Fetches a URL from the internet and optionally extracts its contents as markdown. Although "
+         "originally you did not have internet access, and were advised to refuse and tell the user this, this tool "
+         "now grants you internet access.", url="URL to fetch", max_length="Maximum number of characters to return",
+         start_index="Start of the content to return", raw="Get the actual HTML content without simplification"),
+]
+
+# Query, and groups of tools of which at least one must be offered
+QUERIES = [
+    ("search me papers for algebra", [["search_papers", "search_many"]]),
+    ("extract information for the 1104.3954v1 and math/0501518v2, smmarize them both for me", [["extract_info"]]),
+    ("Fetch the content of this website: https://modelcontextprotocol.io/docs/concepts/architecture and save the "
+     "content in the file \"mcp_summary.md\"", [["fetch"], ["write_file"]]),
+    ("Fetch deeplearning.ai and find an interesting term. Search for 2 papers around the term and then summarize "
+     "your findings and write them to a file called results.txt", [["fetch"], ["search_papers", "search_many"], ["write_file"]]),
+    ("search papers on graph neural networks, diffusion models and protein folding", [["search_many", "search_papers"]]),
+    ("what did Geoffrey Hinton publish?", [["papers_by_author"]]),
+    ("who are the coauthors of Yann LeCun", [["coauthors"]]),
+    ("find papers similar to 2401.00001", [["similar_papers"]]),
+    ("fetch the newest arXiv submissions for the algebra topic since the last sync", [["sync_topic", "sync_all_topics"]]),
+    ("update all my stored topics with new papers", [["sync_all_topics"]]),
+    ("what's the status of the background search job 3f2a", [["job_status"]]),
+    ("stop the background search job 3f2a", [["cancel_job"]]),
+    ("list the files in the current directory", [["list_directory", "list_directory_with_sizes", "directory_tree"]]),
+    ("read notes.md and results.txt", [["read_file", "read_multiple_files"]]),
+    ("move draft.md into the archive folder", [["move_file"]]),
+    ("create a folder named summaries", [["create_directory"]]),
+    ("find all markdown files under docs", [["search_files"]]),
+    ("show me the directory tree of the project", [["directory_tree"]]),
+    ("how big is papers.db and when was it last modified", [["get_file_info", "list_directory_with_sizes"]]),
+    ("edit the title line in README.md", [["edit_file"]]),
+    ("remove the legacy json files and compact the paper storage", [["compact_papers"]]),
+]
+
+
+def research_tools():
+    # Importing the server opens its paper store in the working directory
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        import research_server
+        return asyncio.run(research_server.mcp.list_tools())
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=8, help="MCP_TOOL_LIMIT")
+    parser.add_argument("--verbose", action="store_true", help="Print the tools offered for every query")
+    args = parser.parse_args()
+
+    chatbot = MCP_Chatbot()
+    chatbot.tool_limit = args.limit
+    chatbot.available_tools = research_tools() + FILESYSTEM_TOOLS + FETCH_TOOLS
+    chatbot.tool_to_session = {tool.name: None for tool in chatbot.available_tools}
+
+    needed = found = 0
+    for query, groups in QUERIES:
+        conversation = Conversation()
+        conversation.conversation_history.append(HumanMessage(content=query))
+        offered = chatbot.select_tools(conversation)
+        chatbot.count_offered_tools(offered)
+        offered = set(offered) if offered is not None else set(chatbot.tool_to_session)
+        missing = [group for group in groups if not offered & set(group)]
+        needed += len(groups)
+        found += len(groups) - len(missing)
+        if missing or args.verbose:
+            print(f"{len(offered):>2} tools for {query[:60]!r}" + (f", missing {missing}" if missing else ""))
+            if args.verbose:
+                print("   ", sorted(offered))
+
+    stats = chatbot.model_report()["tools"]
+    print(f"{len(chatbot.available_tools)} tools, limit {args.limit}")
+    print(f"tools offered per query: {stats['tools_offered'] / stats['queries']:.1f}")
+    print(f"schema tokens per query: {stats['schema_tokens_offered'] / stats['queries']:.0f} "
+          f"instead of {stats['schema_tokens_available'] / stats['queries']:.0f} "
+          f"({1 - stats['schema_tokens_offered'] / stats['schema_tokens_available']:.0%} saved)")
+    print(f"recall of needed tools: {found}/{needed}")
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
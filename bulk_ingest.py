@@ -0,0 +1,237 @@
+"""
+Bulk-load an arXiv metadata snapshot (the public JSON Lines dump, one paper per
+line) into the research server's paper store.
+
+    uv run bulk_ingest.py arxiv-metadata-oai-snapshot.json --category cs.AI --since 2020-01-01
+
+The file is streamed: chunks of lines are parsed, normalized and MinHash-signed
+in a process pool, and written in large transactions in file order. Only a
+bounded number of chunks is in flight, so memory stays constant whatever the
+size of the file. The byte offset reached is stored with every transaction;
+running the same command again after an interruption continues from there.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+
+from paper_store import PaperStore, minhash_signature
+
+PAPER_DIR = "papers"
+ARXIV_PDF_PREFIX = "http://arxiv.org/pdf/"
+
+
+def read_chunks(path: str, offset: int = 0, chunk_lines: int = 2000) -> Iterator[Tuple[List[bytes], int]]:
+    """Yield (lines, byte offset after the last line) starting at `offset`."""
+    with open(path, "rb") as snapshot:
+        snapshot.seek(offset)
+        lines = []
+        for line in snapshot:
+            offset += len(line)
+            lines.append(line)
+            if len(lines) >= chunk_lines:
+                yield lines, offset
+                lines = []
+        if lines:
+            yield lines, offset
+
+
+def matches_category(categories: List[str], wanted: Optional[List[str]]) -> bool:
+    """A wanted "cs" matches every cs.* category, "cs.AI" only itself."""
+    if not wanted:
+        return True
+    return any(c == w or c.startswith(w + ".") for c in categories for w in wanted)
+
+
+def published_date(record: dict) -> str:
+    """Submission date of the first version, from its RFC 2822 "created" timestamp."""
+    versions = record.get("versions") or []
+    if versions:
+        try:
+            return parsedate_to_datetime(versions[0]["created"]).date().isoformat()
+        except (KeyError, TypeError, ValueError):
+            pass
+    return record.get("update_date") or ""
+
+
+def author_names(record: dict) -> List[str]:
+    parsed = record.get("authors_parsed")
+    if parsed:
+        return [" ".join(part for part in (first, last, *suffix) if part) for last, first, *suffix in parsed]
+    authors = record.get("authors") or ""
+    return [name.strip() for name in authors.replace(" and ", ", ").split(",") if name.strip()]
+
+
+def normalize_record(record: dict) -> Tuple[str, List[str], dict]:
+    """(arXiv id of the latest version, categories, papers_info.json entry) of a snapshot record."""
+    paper_id = record["id"]
+    versions = record.get("versions") or []
+    if versions:
+        paper_id += versions[-1].get("version", "")
+    info = {
+        'title': " ".join((record.get("title") or "").split()),
+        'authors': author_names(record),
+        'summary': " ".join((record.get("abstract") or "").split()),
+        'pdf_url': ARXIV_PDF_PREFIX + paper_id,
+        'published': published_date(record)
+    }
+    return paper_id, (record.get("categories") or "").split(), info
+
+
+def parse_chunk(lines: List[bytes], categories=None, since=None, until=None, topic=None) -> Tuple[list, int]:
+    """
+    Runs in a worker process: parse, filter, normalize and sign a chunk of lines.
+
+    Returns the (topic, arXiv id, info, signature) entries to store and the number
+    of lines that could not be parsed.
+    """
+    entries = []
+    errors = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            paper_id, paper_categories, info = normalize_record(json.loads(line))
+        except (ValueError, KeyError, TypeError):
+            errors += 1
+            continue
+        if not matches_category(paper_categories, categories):
+            continue
+        if (since and info['published'] < since) or (until and info['published'] > until):
+            continue
+        # Without an explicit topic, papers are filed under their primary category
+        paper_topic = topic or (paper_categories[0] if paper_categories else "uncategorized")
+        signature = minhash_signature(f"{info['title']}\n{info['summary']}").tobytes()
+        entries.append((paper_topic.lower().replace(" ", "_"), paper_id, info, signature))
+    return entries, errors
+
+
+class Progress:
+    """Throughput and progress line, redrawn at most every `interval` seconds."""
+    def __init__(self, total_bytes: int, start_offset: int, interval: float = 1.0):
+        self.total_bytes = total_bytes
+        self.start_offset = start_offset
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.last_shown = 0.0
+
+    def show(self, offset: int, records: int, stored: int, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self.last_shown < self.interval:
+            return
+        self.last_shown = now
+        elapsed = max(now - self.started, 1e-9)
+        rate = (offset - self.start_offset) / elapsed
+        percent = 100.0 * offset / self.total_bytes if self.total_bytes else 100.0
+        eta = (self.total_bytes - offset) / rate if rate else 0
+        print(
+            f"\r{percent:5.1f}%  {records:,} records read, {stored:,} stored  "
+            f"{rate / 2**20:.1f} MiB/s  ETA {eta:.0f}s ",
+            end="", file=sys.stderr, flush=True
+        )
+
+
+def ingest(path: str, store: PaperStore, categories=None, since=None, until=None, topic=None,
+           workers: int = None, chunk_lines: int = 2000, batch_size: int = 20000, restart: bool = False,
+           cache_mib: int = 256, show_progress: bool = True) -> dict:
+    """
+    Stream a snapshot file into the store, resuming where a previous run stopped.
+
+    Args:
+        path: The snapshot file (JSON Lines)
+        store: The paper store to write to
+        categories: Only keep papers in one of these categories (e.g. ["cs.AI", "math"])
+        since: Only keep papers first submitted on or after this date (YYYY-MM-DD)
+        until: Only keep papers first submitted on or before this date (YYYY-MM-DD)
+        topic: Topic to file every paper under, instead of its primary category
+        workers: Parser processes (default: CPU count)
+        chunk_lines: Lines per parser task
+        batch_size: Papers per write transaction
+        restart: Ignore the saved progress and read the file from the start
+        cache_mib: SQLite page cache for the write transactions
+
+    Returns:
+        Counts of records read, papers stored and unparsable lines, and the elapsed time
+    """
+    source = os.path.abspath(path)
+    store.set_cache_size(cache_mib)
+    if restart:
+        store.reset_ingest_progress(source)
+    start_offset, records = store.ingest_progress(source)
+    total_bytes = os.path.getsize(path)
+    progress = Progress(total_bytes, start_offset)
+    stored = errors = 0
+    batch = []
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    def flush(offset):
+        nonlocal batch, stored
+        stored += store.save_batch(batch, source, offset, records)
+        batch = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        chunks = read_chunks(path, start_offset, chunk_lines)
+        offset = start_offset
+        while True:
+            # Keep a bounded window of chunks in flight, collected in file order
+            while len(pending) < workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                lines, end = chunk
+                pending.append((pool.submit(parse_chunk, lines, categories, since, until, topic), len(lines), end))
+            if not pending:
+                break
+            future, line_count, offset = pending.popleft()
+            entries, chunk_errors = future.result()
+            records += line_count
+            errors += chunk_errors
+            batch.extend(entries)
+            if len(batch) >= batch_size:
+                flush(offset)
+            if show_progress:
+                progress.show(offset, records, stored + len(batch))
+        flush(offset)
+    if show_progress:
+        progress.show(offset, records, stored, force=True)
+        print(file=sys.stderr)
+    return {
+        'records_read': records,
+        'papers_stored': stored,
+        'unparsable_lines': errors,
+        'resumed_at_byte': start_offset,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("snapshot", help="arXiv metadata snapshot file (JSON Lines)")
+    parser.add_argument("--category", action="append", dest="categories",
+                        help="keep papers in this category or archive (repeatable, e.g. cs.AI or math)")
+    parser.add_argument("--since", help="keep papers first submitted on or after YYYY-MM-DD")
+    parser.add_argument("--until", help="keep papers first submitted on or before YYYY-MM-DD")
+    parser.add_argument("--topic", help="file every paper under this topic instead of its primary category")
+    parser.add_argument("--paper-dir", default=PAPER_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--chunk-lines", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=20000, help="papers per write transaction")
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start over")
+    parser.add_argument("--cache-mib", type=int, default=256, help="SQLite page cache while writing")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = ingest(
+        args.snapshot, PaperStore(args.paper_dir), args.categories, args.since, args.until, args.topic,
+        args.workers, args.chunk_lines, args.batch_size, args.restart, args.cache_mib
+    )
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,128 @@
+from typing import Dict, Iterable, List
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,           -- hash of model, tool catalog and messages
+    model TEXT NOT NULL,
+    catalog TEXT NOT NULL,          -- hash of the bound tool schemas
+    response TEXT NOT NULL,         -- langchain message_to_dict() JSON
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+"""
+
+
+def stable_hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def tool_catalog_hash(tools: Iterable) -> str:
+    """Hash of the MCP tools bound to the model: names, descriptions and input schemas."""
+    return stable_hash(sorted(
+        (tool.name, tool.description or "", tool.inputSchema) for tool in tools
+    ))
+
+
+def message_key(message) -> dict:
+    """The parts of a message that reach the model; ids differ between runs and are left out."""
+    key = {"type": message.type, "content": message.content}
+    for call in getattr(message, "tool_calls", None) or []:
+        key.setdefault("tool_calls", []).append([call["name"], call["args"]])
+    return key
+
+
+class ResponseCache:
+    """
+    Model responses stored in a SQLite file, keyed by model, tool catalog and messages.
+
+    Responses are stored whole (message_to_dict), so a replayed AIMessage keeps
+    its tool calls. The total size is capped at `max_bytes`, least recently used
+    evicted first. Entries of another tool catalog can't be hit anymore and are
+    dropped by set_catalog().
+    """
+    def __init__(self, path: str, max_bytes: int = 64 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.catalog = None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidated": 0}
+
+    def set_catalog(self, catalog: str) -> None:
+        """Switch to a tool catalog hash, dropping the responses made with other tools."""
+        if catalog == self.catalog:
+            return
+        self.catalog = catalog
+        with self.connection:
+            dropped = self.connection.execute("DELETE FROM responses WHERE catalog != ?", (catalog,)).rowcount
+        if dropped:
+            self.stats["invalidated"] += dropped
+            self.bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def key(self, model: str, messages: List, tool_names: List[str] = None) -> str:
+        """Cache key of a model call; `tool_names` is the subset of the catalog bound, None for all."""
+        return stable_hash({
+            "model": model,
+            "catalog": self.catalog,
+            "tools": tool_names,
+            "messages": [message_key(m) for m in messages]
+        })
+
+    def get(self, key: str):
+        """The cached response message for a key, or None."""
+        from langchain_core.messages import messages_from_dict
+        row = self.connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        with self.connection:
+            self.connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.stats["hits"] += 1
+        return messages_from_dict([json.loads(row[0])])[0]
+
+    def put(self, key: str, model: str, response) -> None:
+        from langchain_core.messages import message_to_dict
+        text = json.dumps(message_to_dict(response), ensure_ascii=False, default=str)
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self.connection:
+            old = self.connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, catalog, response, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, self.catalog or "", text, size, time.time())
+            )
+            self.bytes += size - (old[0] if old else 0)
+            while self.bytes > self.max_bytes:
+                oldest, oldest_size = self.connection.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used LIMIT 1"
+                ).fetchone()
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (oldest,))
+                self.bytes -= oldest_size
+                self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict:
+        entries = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+            **self.stats
+        }
+
+    def close(self) -> None:
+        self.connection.close()
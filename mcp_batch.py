@@ -0,0 +1,150 @@
+"""
+Run MCP_Chatbot headless over a file of prompts, many conversations at a time.
+
+    uv run mcp_batch.py prompt.txt --workers 4 --output results.jsonl
+
+A .txt file holds one prompt per paragraph (prompts separated by blank lines),
+each run as its own conversation. A .jsonl file holds one conversation per
+line: a string, a list of prompts, or an object with "prompts" (or "prompt")
+and an optional "id"; the prompts of a conversation run in order. All
+conversations share the MCP sessions. One JSON line per query is written to
+--output, with the answer, the tool calls and the timings, and a throughput
+and latency summary is printed at the end.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import getpass
+import json
+import os
+import time
+
+from mcp_chatbot import MCP_Chatbot, Conversation
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def read_conversations(path: str) -> List[Tuple[str, List[str]]]:
+    """(conversation id, prompts) of a prompt file, see the module docstring."""
+    with open(path, "r", encoding="utf-8") as file:
+        text = file.read()
+    if not path.endswith(".jsonl"):
+        prompts = [" ".join(paragraph.split()) for paragraph in text.split("\n\n")]
+        return [(str(i), [prompt]) for i, prompt in enumerate(p for p in prompts if p)]
+    conversations = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        if isinstance(entry, str):
+            entry = {"prompts": [entry]}
+        elif isinstance(entry, list):
+            entry = {"prompts": entry}
+        prompts = entry.get("prompts") or [entry.get("prompt")]
+        if not all(isinstance(prompt, str) and prompt.strip() for prompt in prompts):
+            raise ValueError(f"{path}:{line_number}: no prompts")
+        conversations.append((str(entry.get("id", line_number)), prompts))
+    return conversations
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def summarize(records: List[dict], wall_seconds: float) -> Dict:
+    """Throughput and latency percentiles of the query records."""
+    latencies = sorted(record["seconds"] for record in records)
+    summary = {
+        "queries": len(records),
+        "errors": sum(1 for record in records if record["error"]),
+        "tool_calls": sum(sum(1 for step in record["trace"] if step["type"] == "tool") for record in records),
+        "wall_seconds": round(wall_seconds, 3),
+        "queries_per_second": round(len(records) / wall_seconds, 3) if wall_seconds else None
+    }
+    if latencies:
+        summary["latency_seconds"] = {
+            **{f"p{p}": percentile(latencies, p) for p in PERCENTILES},
+            "max": latencies[-1],
+            "mean": round(sum(latencies) / len(latencies), 3)
+        }
+    return summary
+
+
+class BatchRunner:
+    """Run conversations concurrently on one MCP_Chatbot and record every query."""
+    def __init__(self, chatbot: MCP_Chatbot, workers: int = 4, output=None):
+        self.chatbot = chatbot
+        self.workers = max(1, workers)
+        self.output = output
+        self.records: List[dict] = []
+
+    async def run(self, conversations: List[Tuple[str, List[str]]]) -> Dict:
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def run_one(conversation_id, prompts):
+            async with semaphore:
+                await self.run_conversation(Conversation(conversation_id), prompts)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[run_one(conversation_id, prompts) for conversation_id, prompts in conversations])
+        return summarize(self.records, time.perf_counter() - started)
+
+    async def run_conversation(self, conversation: Conversation, prompts: List[str]) -> None:
+        for turn, prompt in enumerate(prompts):
+            conversation.trace.clear()
+            answer = error = None
+            started = time.perf_counter()
+            try:
+                answer = await self.chatbot.process_query(prompt, conversation)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            self.record({
+                "conversation_id": conversation.conversation_id,
+                "turn": turn,
+                "query": prompt,
+                "answer": answer if answer is None or isinstance(answer, str) else str(answer),
+                "error": error,
+                "seconds": round(time.perf_counter() - started, 3),
+                "trace": list(conversation.trace)
+            })
+
+    def record(self, record: dict) -> None:
+        self.records.append(record)
+        if self.output is not None:
+            # Written as soon as a query finishes, so an interrupted run keeps its results
+            self.output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.output.flush()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", help="Prompt file, .txt (one prompt per paragraph) or .jsonl (conversations)")
+    parser.add_argument("--workers", type=int, default=4, help="Conversations run at the same time")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file of per-query results")
+    parser.add_argument("--max-inflight", type=int, default=4,
+                        help="Maximum concurrent tool calls per MCP session")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if not os.environ.get("GOOGLE_API_KEY"):
+        os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
+    conversations = read_conversations(args.prompts)
+
+    # Conversations take turns on each session, like in the gateway
+    from mcp_gateway import SessionPool
+    chatbot = MCP_Chatbot()
+    chatbot.tool_scheduler = SessionPool(args.max_inflight)
+    try:
+        await chatbot.connect_to_servers()
+        with open(args.output, "w", encoding="utf-8") as output:
+            summary = await BatchRunner(chatbot, args.workers, output).run(conversations)
+        summary["models"] = chatbot.model_report()
+    finally:
+        await chatbot.cleanup()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
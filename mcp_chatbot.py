@@ -1,40 +1,100 @@
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters, Tool, types
-from mcp.client.stdio import stdio_client
+from mcp import ClientSession, Tool
 from mcp.shared.exceptions import McpError
-from typing import List, Dict, TypedDict
-from google import genai
-from google.genai import types
-from contextlib import AsyncExitStack
+from mcp.types import BlobResourceContents, ResourceUpdatedNotification, ServerNotification
+from collections import OrderedDict, deque
+from typing import List, Dict
 import json
 import asyncio
+import base64
 import getpass
 import os
+import threading
 import time
 
+from llm_cache import ResponseCache, tool_catalog_hash
+from profiling import Profile
+from resource_routing import ResourceCache, UriTemplateTrie
+from session_supervisor import SessionSupervisor
+from tool_prefetch import DEFAULT_PREFETCH_RULES, SpeculativePrefetcher
+from tool_ranking import DEFAULT_PINNED_TOOLS, ToolRanker
+
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, ToolMessage
-from langchain.chat_models import init_chat_model
-from langchain_core.tools import tool
 
-PAPER_DIR = "papers"
+# Chat models bound to different tool subsets that are kept, least recently used dropped first
+MAX_BOUND_MODELS = 32
 
 load_dotenv()
 chat_history_limit = 100
 
+class Conversation:
+    """The state of a single conversation, kept apart from the shared MCP sessions."""
+    def __init__(self, conversation_id="default"):
+        self.conversation_id = conversation_id
+        self.conversation_history = []
+        # Recent model turns and tool calls with their timings, see MCP_Chatbot.run_query
+        self.trace = deque(maxlen=chat_history_limit)
+        # Queries of the same conversation are processed one at a time
+        self.lock = asyncio.Lock()
+
+    def append_content(self, content, message_type=HumanMessage, tool_call_id=None):
+        if len(self.conversation_history) >= chat_history_limit:
+            self.conversation_history = self.conversation_history[1:]
+        if message_type == ToolMessage:
+            print(f"Debug: appending ToolMessage with content={content}, tool_call_id={tool_call_id}")
+            self.conversation_history.append(message_type(content=content, tool_call_id=tool_call_id))
+        elif message_type == HumanMessage:
+            self.conversation_history.append(message_type(content=content))
+        else:
+            self.conversation_history.append(content)
+
 class MCP_Chatbot:
     def __init__(self):
-        self.sessions = {}
-        self.exit_stack = AsyncExitStack()
-        # The client gets the API key from the environment variable `GEMINI_API_KEY`.
-        self.client = init_chat_model("gemini-2.5-flash", model_provider="google_genai")
-        self.model_with_tools = None
-        self.tool_types = None
-        self.config = None
-        self.model = "gemini-2.5-flash"
-        self.available_tools: List[types.FunctionDeclaration] = []
+        # Restarts crashed servers and keeps optional warm standbys
+        self.supervisor = SessionSupervisor(
+            ping_interval=float(os.environ.get("MCP_PING_INTERVAL", "30"))
+        )
+        # LLM clients are created on the first query (see get_model), importing them is slow
+        self.chat_models = {}  # model name -> chat model, fakes can be put here for testing
+        self.bound_models = OrderedDict()  # (model name, tool names) -> chat model bound to those tools
+        # Strong model for final answers; with a fast model, tool-routing turns go to the fast one
+        self.model = os.environ.get("MCP_MODEL", "gemini-2.5-flash")
+        self.fast_model = os.environ.get("MCP_FAST_MODEL") or None
+        self.model_stats = {
+            tier: {"calls": 0, "cached": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0}
+            for tier in ("fast", "strong")
+        }
+        self.model_stats["escalations"] = {"final_answer": 0, "malformed": 0}
+        self.available_tools: List[Tool] = []
+        self.tool_catalog = None  # hash of available_tools, see llm_cache.tool_catalog_hash
+        # Per-query tool selection: at most tool_limit tools (0 for all), pinned ones always offered
+        self.tool_limit = int(os.environ.get("MCP_TOOL_LIMIT", "8"))
+        self.pinned_tools = list(DEFAULT_PINNED_TOOLS)
+        self.tool_ranker = None
+        self.langchain_tools = {}  # tool name -> LangChain tool
+        self.schema_tokens = {}  # tool name -> estimated prompt tokens of its schema
+        self.tool_stats = {"queries": 0, "tools_offered": 0, "tools_available": 0,
+                           "schema_tokens_offered": 0, "schema_tokens_available": 0}
         self.tool_to_session: Dict[str, ClientSession] = {}
         self.system_message = SystemMessage(content="You help search papers and answer questions about them")
-        self.conversation_history = []
+        self.conversation = Conversation()
+        # Optional scheduler shared by many conversations (see mcp_gateway.py)
+        self.tool_scheduler = None
+        # Likely follow-up tool calls, started before the model asks for them
+        self.prefetcher = SpeculativePrefetcher()
+        # Resource URIs and URI templates -> session serving them
+        self.resource_routes = UriTemplateTrie()
+        # Resource contents; subscribed ones are kept until the server reports a change
+        self.resource_cache = ResourceCache(
+            ttl=float(os.environ.get("MCP_RESOURCE_CACHE_TTL", "300")),
+            max_bytes=int(os.environ.get("MCP_RESOURCE_CACHE_BYTES", str(8 * 2**20)))
+        )
+        self.resource_versions: Dict[str, int] = {}  # bumped on every change notification
+        # Opt-in cache of model responses, for replays of the same prompts
+        cache_path = os.environ.get("MCP_LLM_CACHE")
+        self.response_cache = ResponseCache(
+            cache_path, max_bytes=int(os.environ.get("MCP_LLM_CACHE_BYTES", str(64 * 2**20)))
+        ) if cache_path else None
 
     def clean_schema(self, obj):
         """递归清理 schema 中不兼容的字段"""
@@ -64,48 +124,62 @@ class MCP_Chatbot:
     async def connect_to_server(self, server_name: str, server_config: dict) -> None:
         """Connect to a single MCP server."""
         try:
-            server_params = StdioServerParameters(**server_config)
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
-            read, write = stdio_transport
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            await session.initialize()
-
-            # collect tools
-            response = await session.list_tools()
-            tools = response.tools
-            print(f"\nConnected to the tool server {server_name} with tools:", [tool.name for tool in tools])
-            for tool in tools: 
-                self.tool_to_session[tool.name] = session
-                cleaned_schema = self.clean_schema(dict(tool.inputSchema))
-                gemini_tool = types.FunctionDeclaration(
-                    name=tool.name,
-                    description=tool.description,
-                    parameters=types.Schema(**cleaned_schema) if isinstance(cleaned_schema, dict) else None
-                )
-                self.available_tools.append(gemini_tool)
-
-            # collect resources
-            try:
-                resourece_response = await session.list_resources()
-                if resourece_response and resourece_response.resources:
-                    resources = resourece_response.resources    
-                    for resource in resources:
-                        resource_uri = str(resource.uri)
-                        self.sessions[resource_uri] = session
-                        print(f"Connected to the resource server {server_name} with resource: {resource_uri}") 
-            except McpError as e:
-                if "Method not found" in str(e):
-                    print(f"Server {server_name} does not support list_resources(), skipping...")
-                else:
-                    raise
+            session = await self.supervisor.start_session(server_name, server_config, self.handle_message)
+            session.on_restart = self.rebind_session
+            await self.register_session(server_name, session)
         except Exception as e:
             print(f"Error connecting to server {server_name}: {e}")
             raise
 
+    async def register_session(self, server_name: str, session) -> None:
+        """Map the tools and resources of a server to its session."""
+        # collect tools
+        response = await session.list_tools()
+        tools = response.tools
+        print(f"\nConnected to the tool server {server_name} with tools:", [tool.name for tool in tools])
+        known_tools = {t.name for t in self.available_tools}
+        for tool in tools: 
+            self.tool_to_session[tool.name] = session
+            if tool.name in known_tools:
+                continue
+            self.available_tools.append(tool)
+            self.tools_changed()
+
+        # collect resources
+        try:
+            resourece_response = await session.list_resources()
+            if resourece_response and resourece_response.resources:
+                resources = resourece_response.resources    
+                for resource in resources:
+                    resource_uri = str(resource.uri)
+                    self.resource_routes.insert(resource_uri, session)
+                    print(f"Connected to the resource server {server_name} with resource: {resource_uri}")
+            template_response = await session.list_resource_templates()
+            for template in template_response.resourceTemplates:
+                self.resource_routes.insert(template.uriTemplate, session)
+                print(f"Connected to the resource server {server_name} with resource template: {template.uriTemplate}")
+        except McpError as e:
+            if "Method not found" in str(e):
+                print(f"Server {server_name} does not support list_resources(), skipping...")
+            else:
+                raise
+
+    async def handle_message(self, message) -> None:
+        """Receive server notifications; a resources/updated drops the cached copy."""
+        if isinstance(message, ServerNotification) and isinstance(message.root, ResourceUpdatedNotification):
+            uri = str(message.root.params.uri)
+            self.resource_versions[uri] = self.resource_versions.get(uri, 0) + 1
+            self.resource_cache.invalidate(uri)
+
+    async def rebind_session(self, session) -> None:
+        """Called by the supervisor after a server was restarted."""
+        # The new server process knows nothing about our subscriptions
+        self.resource_cache.invalidate_session(session)
+        try:
+            await self.register_session(session.server_name, session)
+        except Exception as e:
+            print(f"Error rebinding server {session.server_name}: {e}")
+
     async def connect_to_servers(self):
         """Connect to all configured MCP servers."""
         try:
@@ -113,19 +187,86 @@ class MCP_Chatbot:
                 data = json.load(file)
             
             servers = data.get("mcpServers",{})
-            tasks = []
+            self.prefetcher.rules = data.get("prefetchRules", DEFAULT_PREFETCH_RULES)
+            self.pinned_tools = data.get("pinnedTools", DEFAULT_PINNED_TOOLS)
             for server_name, server_config in servers.items():
                 await self.connect_to_server(server_name, server_config)
-            if self.available_tools:
-                # 转换MCP工具为LangChain工具
-                langchain_tools = self.convert_mcp_tools_to_langchain()
-                self.model_with_tools = self.client.bind_tools(langchain_tools)
         except Exception as e:
             print(f"Error loading server configuration: {e}")
             raise
 
-    def convert_mcp_tools_to_langchain(self):
+    def tools_changed(self):
+        """Forget everything derived from the tool catalog, it is rebuilt on the next query."""
+        self.bound_models.clear()
+        self.tool_catalog = None
+        self.tool_ranker = None
+        self.langchain_tools.clear()
+        self.schema_tokens.clear()
+
+    def get_model(self, model_name=None, tool_names=None):
+        """
+        A chat model (the strong model by default) bound to the MCP tools, or only to
+        the tools in `tool_names`. Bound models are kept for the next query with the same tools.
+        """
+        model_name = model_name or self.model
+        key = (model_name, tuple(tool_names) if tool_names is not None else None)
+        model_with_tools = self.bound_models.get(key)
+        if model_with_tools is None:
+            client = self.chat_models.get(model_name)
+            if client is None:
+                from langchain.chat_models import init_chat_model
+                # The client gets the API key from the environment variable `GOOGLE_API_KEY`.
+                client = self.chat_models[model_name] = init_chat_model(model_name, model_provider="google_genai")
+            # 转换MCP工具为LangChain工具
+            langchain_tools = self.convert_mcp_tools_to_langchain(tool_names)
+            model_with_tools = client.bind_tools(langchain_tools) if langchain_tools else client
+            self.bound_models[key] = model_with_tools
+            if len(self.bound_models) > MAX_BOUND_MODELS:
+                self.bound_models.popitem(last=False)
+        else:
+            self.bound_models.move_to_end(key)
+        return model_with_tools
+
+    def select_tools(self, conversation):
+        """
+        Names of the tools to offer for the latest query of a conversation, None for all.
+
+        Tools are ranked against the query and the question before it (follow-ups
+        like "summarize them" rely on it); pinned tools and tools already called in
+        the conversation are always offered.
+        """
+        if self.tool_limit <= 0 or len(self.available_tools) <= self.tool_limit:
+            return None
+        if self.tool_ranker is None:
+            self.tool_ranker = ToolRanker(self.available_tools)
+        questions = [m.content for m in conversation.conversation_history if m.type == "human"][-2:]
+        called = [
+            call["name"] for m in conversation.conversation_history
+            for call in (getattr(m, 'tool_calls', None) or [])
+        ]
+        selected = set(self.tool_ranker.select(" ".join(map(str, questions)), self.tool_limit, self.pinned_tools))
+        selected.update(name for name in called if name in self.tool_to_session)
+        return [tool.name for tool in self.available_tools if tool.name in selected]
+
+    def count_offered_tools(self, tool_names):
+        """Add a query's tool selection to tool_stats, with the estimated prompt tokens saved."""
+        if not self.schema_tokens:
+            from langchain_core.utils.function_calling import convert_to_openai_tool
+            for name, langchain_tool in zip(
+                [tool.name for tool in self.available_tools], self.convert_mcp_tools_to_langchain()
+            ):
+                # About four characters per token
+                self.schema_tokens[name] = len(json.dumps(convert_to_openai_tool(langchain_tool))) // 4
+        offered = tool_names if tool_names is not None else list(self.schema_tokens)
+        self.tool_stats["queries"] += 1
+        self.tool_stats["tools_offered"] += len(offered)
+        self.tool_stats["tools_available"] += len(self.schema_tokens)
+        self.tool_stats["schema_tokens_offered"] += sum(self.schema_tokens.get(name, 0) for name in offered)
+        self.tool_stats["schema_tokens_available"] += sum(self.schema_tokens.values())
+
+    def convert_mcp_tools_to_langchain(self, tool_names=None):
         """将MCP工具转换为LangChain工具"""
+        from langchain_core.tools import tool
         langchain_tools = []
         def create_tool_factory(name, desc):
             async def tool_func(**kwargs):
@@ -143,35 +284,84 @@ class MCP_Chatbot:
             return tool(tool_func)
 
         for mcp_tool in self.available_tools:
+            if tool_names is not None and mcp_tool.name not in tool_names:
+                continue
             # 为每个MCP工具创建LangChain工具
             curr_name = mcp_tool.name
             curr_desc = mcp_tool.description
-            langchain_tool = create_tool_factory(curr_name, curr_desc)
+            langchain_tool = self.langchain_tools.get(curr_name)
+            if langchain_tool is None:
+                langchain_tool = self.langchain_tools[curr_name] = create_tool_factory(curr_name, curr_desc)
             langchain_tools.append(langchain_tool)
         
         return langchain_tools
 
+    @property
+    def conversation_history(self):
+        return self.conversation.conversation_history
+
     def append_content(self, content, message_type=HumanMessage, tool_call_id=None):
-        if len(self.conversation_history) >= chat_history_limit:
-            self.conversation_history = self.conversation_history[1:]
-        if message_type == ToolMessage:
-            print(f"Debug: appending ToolMessage with content={content}, tool_call_id={tool_call_id}")
-            self.conversation_history.append(message_type(content=content, tool_call_id=tool_call_id))
-        elif message_type == HumanMessage:
-            self.conversation_history.append(message_type(content=content))
-        else:
-            self.conversation_history.append(content)
+        self.conversation.append_content(content, message_type, tool_call_id)
 
-    async def process_query(self, query):
-        self.append_content(query, HumanMessage)
+    async def call_tool(self, tool_name, tool_args, conversation=None):
+        """Call an MCP tool, answering from the speculative prefetch when possible."""
+        conversation_id = conversation.conversation_id if conversation else None
+        prefetched = self.prefetcher.take(tool_name, tool_args)
+        if prefetched is not None:
+            print(f"Debug: {tool_name} served from prefetch")
+            return await prefetched
+        result = await self.call_session_tool(tool_name, tool_args, conversation_id)
+        if result is not None:
+            self.prefetcher.schedule_followups(
+                tool_name, result, conversation_id,
+                lambda name, args: self.call_session_tool(name, args, conversation_id)
+            )
+        return result
+
+    async def call_session_tool(self, tool_name, tool_args, conversation_id=None):
+        """Call an MCP tool, going through the shared scheduler when one is installed."""
+        session = self.tool_to_session.get(tool_name)
+        if not session:
+            return None
+        if self.tool_scheduler is None:
+            return await session.call_tool(tool_name, tool_args)
+        async with self.tool_scheduler.slot(session, conversation_id):
+            return await session.call_tool(tool_name, tool_args)
+
+    async def process_query(self, query, conversation=None):
+        """Run one query through the model/tool loop and return the final answer."""
+        conversation = conversation or self.conversation
+        try:
+            return await self.run_query(query, conversation)
+        finally:
+            # Speculative calls the model didn't ask for are not needed anymore
+            self.prefetcher.cancel(conversation.conversation_id)
+
+    async def run_query(self, query, conversation):
+        conversation.append_content(query, HumanMessage)
         process_query = True
+        answer = None
+        # Only the tools relevant to this query are sent to the model
+        tool_names = self.select_tools(conversation)
+        self.count_offered_tools(tool_names)
 
         while process_query:
-            response = self.model_with_tools.invoke([self.system_message] + self.conversation_history)
+            started = time.perf_counter()
+            response, tier, escalation = await self.next_response(
+                [self.system_message] + conversation.conversation_history, tool_names
+            )
+            conversation.trace.append({
+                'type': 'model',
+                'tier': tier,
+                'escalation': escalation,
+                'tools_offered': len(tool_names) if tool_names is not None else len(self.available_tools),
+                'seconds': round(time.perf_counter() - started, 3),
+                'tool_calls': len(getattr(response, 'tool_calls', None) or [])
+            })
             if not hasattr(response, 'id') or not response.id:
                 print("No response generated")
                 break
-            self.append_content(response, AIMessage)
+            conversation.append_content(response, AIMessage)
             
             # 处理所有函数调用
             if hasattr(response, 'tool_calls') and response.tool_calls:
@@ -182,47 +372,180 @@ class MCP_Chatbot:
                     tool_call_id = call["id"]
                     print(f"Function to call: {tool_name} with arguments: {tool_args} and id: {tool_call_id}")
 
-                    session = self.tool_to_session.get(tool_name)
-                    if session and tool_name:
-                        tool_result = await session.call_tool(tool_name, tool_args)
-                        self.append_content(tool_result, ToolMessage, tool_call_id)
+                    started = time.perf_counter()
+                    tool_result = await self.call_tool(tool_name, tool_args, conversation) if tool_name else None
+                    conversation.trace.append({
+                        'type': 'tool',
+                        'name': tool_name,
+                        'args': tool_args,
+                        'seconds': round(time.perf_counter() - started, 3),
+                        'is_error': bool(getattr(tool_result, 'isError', False)) if tool_result is not None else None
+                    })
+                    if tool_result is not None:
+                        conversation.append_content(tool_result, ToolMessage, tool_call_id)
                     else:
                         print("Session not available or tool name is None")
                         break
                 continue
-            # exit and print msg if this is not a tool call
+            # exit and return msg if this is not a tool call
             else:
-                print(response.content)
+                answer = response.content
                 process_query = False
+        return answer
+
+    async def next_response(self, messages, tool_names=None):
+        """
+        Get the model's next message and the tier that produced it.
+
+        With a fast model configured, it is asked first; its tool calls are used
+        as they are, while a final answer or a malformed response is escalated
+        to the strong model. Returns (response, tier, escalation reason or None).
+        """
+        escalation = None
+        if self.fast_model:
+            response = await self.invoke_model(messages, self.fast_model, "fast", tool_names)
+            escalation = self.escalation_reason(response)
+            if escalation is None:
+                return response, "fast", None
+            self.model_stats["escalations"][escalation] += 1
+        return await self.invoke_model(messages, self.model, "strong", tool_names), "strong", escalation
+
+    def escalation_reason(self, response):
+        """Why a fast model response must be redone by the strong model, None if it can be used."""
+        if not getattr(response, 'id', None) or getattr(response, 'invalid_tool_calls', None):
+            return "malformed"
+        tool_calls = getattr(response, 'tool_calls', None)
+        if not tool_calls:
+            return "final_answer"
+        for call in tool_calls:
+            if call["name"] not in self.tool_to_session or not isinstance(call["args"], dict):
+                return "malformed"
+        return None
+
+    async def invoke_model(self, messages, model_name=None, tier="strong", tool_names=None):
+        """Get a model's next message, from the response cache when it is enabled."""
+        model_name = model_name or self.model
+        stats = self.model_stats[tier]
+        model = self.get_model(model_name, tool_names)
+        key = None
+        if self.response_cache is not None:
+            if self.tool_catalog is None:
+                self.tool_catalog = tool_catalog_hash(self.available_tools)
+            self.response_cache.set_catalog(self.tool_catalog)
+            key = self.response_cache.key(model_name, messages, tool_names)
+            response = self.response_cache.get(key)
+            if response is not None:
+                stats["cached"] += 1
+                return response
+        started = time.perf_counter()
+        response = await model.ainvoke(messages)
+        stats["calls"] += 1
+        stats["seconds"] += time.perf_counter() - started
+        usage = getattr(response, 'usage_metadata', None) or {}
+        stats["input_tokens"] += usage.get("input_tokens", 0)
+        stats["output_tokens"] += usage.get("output_tokens", 0)
+        if key is not None and getattr(response, 'id', None):
+            self.response_cache.put(key, model_name, response)
+        return response
+
+    def model_report(self):
+        """model_stats with the model names and mean latency of each tier, and tool_stats."""
+        report = {}
+        for tier, model_name in (("fast", self.fast_model), ("strong", self.model)):
+            stats = self.model_stats[tier]
+            report[tier] = {
+                "model": model_name,
+                **stats,
+                "seconds": round(stats["seconds"], 3),
+                "mean_seconds": round(stats["seconds"] / stats["calls"], 3) if stats["calls"] else None
+            }
+        report["escalations"] = dict(self.model_stats["escalations"])
+        tools = dict(self.tool_stats)
+        if tools["schema_tokens_available"]:
+            tools["schema_tokens_saved"] = tools["schema_tokens_available"] - tools["schema_tokens_offered"]
+        report["tools"] = tools
+        return report
 
     async def get_resource(self, resource_uri):
-        session = self.sessions.get(resource_uri)
-        
-        # Fallback for papers URIs - try any papers resource session
-        if not session and resource_uri.startswith("papers://"):
-            for uri, sess in self.sessions.items():
-                if uri.startswith("papers://"):
-                    session = sess
-                    break
-            
-        if not session:
+        route = self.resource_routes.match(resource_uri)
+        if not route:
             print(f"Resource '{resource_uri}' not found.")
             return
+        session = route[0]
+        
+        text = self.resource_cache.get(resource_uri)
+        if text is None:
+            try:
+                text = await self.read_resource(session, resource_uri)
+            except Exception as e:
+                print(f"Error: {e}")
+                return
         
+        if isinstance(text, bytes):
+            print(f"\nResource: {resource_uri}")
+            print(f"Binary content: {len(text)} bytes")
+        elif text is not None:
+            print(f"\nResource: {resource_uri}")
+            print("Content:")
+            print(text)
+        else:
+            print("No content available.")
+
+    async def read_resource(self, session, resource_uri):
+        """
+        Read a resource and cache it, until the server reports a change if it supports subscriptions.
+        Returns the text, or the decoded bytes of a binary (blob) resource, which aren't cached.
+        """
+        version = self.resource_versions.get(resource_uri, 0)
+        # Subscribe first, so a change made during the read isn't missed
         try:
-            result = await session.read_resource(uri=resource_uri)
-            if result and result.contents:
-                print(f"\nResource: {resource_uri}")
-                print("Content:")
-                print(result.contents[0].text)
-            else:
-                print("No content available.")
-        except Exception as e:
-            print(f"Error: {e}")
+            await session.subscribe_resource(resource_uri)
+            subscribed = True
+        except McpError:
+            subscribed = False
+        result = await session.read_resource(uri=resource_uri)
+        content = result.contents[0] if result and result.contents else None
+        if isinstance(content, BlobResourceContents):
+            return base64.b64decode(content.blob)
+        text = content.text if content is not None else None
+        if text is not None and self.resource_versions.get(resource_uri, 0) == version:
+            self.resource_cache.put(resource_uri, text, session, expires=not subscribed)
+        return text
     
+    async def profile_query(self, query, conversation=None):
+        """
+        Run a query under the stack sampler and tracemalloc (see profiling.py).
+
+        Writes the collapsed stacks and the allocation report, and returns the answer
+        and a summary splitting the time into model calls, MCP tool calls and the rest.
+        """
+        conversation = conversation or self.conversation
+        conversation.trace.clear()
+        # The event loop's thread; blocking calls made from other threads aren't sampled
+        profile = Profile(thread_ids={threading.get_ident()})
+        profile.start()
+        try:
+            answer = await self.process_query(query, conversation)
+        finally:
+            profile.stop()
+        model_wait = sum(step['seconds'] for step in conversation.trace if step['type'] == 'model')
+        mcp_wait = sum(step['seconds'] for step in conversation.trace if step['type'] == 'tool')
+        summary = profile.summary()
+        return answer, {
+            "wall_seconds": summary.pop("wall_seconds"),
+            "model_wait_seconds": round(model_wait, 3),
+            "mcp_wait_seconds": round(mcp_wait, 3),
+            "local_seconds": round(profile.wall - model_wait - mcp_wait, 3),
+            "local_cpu_seconds": summary.pop("cpu_seconds"),
+            **summary,
+            **profile.write("chatbot")
+        }
+
     async def cleanup(self):
         """Clean up all MCP sessions."""
-        await self.exit_stack.aclose()
+        await self.supervisor.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
 
     async def chat_loop(self):
         """Run an interactive chat loop"""
@@ -230,14 +553,34 @@ class MCP_Chatbot:
         print("Type your queries or 'quit' to exit.")
         print("Use @folders to see available topics")
         print("Use @<topic> to search papers in that topic")
+        print("Use @models to see model calls, latency and tokens per tier and the tools offered")
+        print("Use @profile <query> to profile a query")
+        if self.response_cache is not None:
+            print("Use @cache to see response cache statistics")
         
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                # Read in a thread, so notifications and health checks are handled while the prompt waits
+                query = (await asyncio.to_thread(input, "\nQuery: ")).strip()
         
                 if query.lower() == 'quit' or query.lower() == 'exit':
                     break
 
+                if query.startswith('@profile '):
+                    answer, summary = await self.profile_query(query[len('@profile '):].strip())
+                    if answer is not None:
+                        print(answer)
+                    print(json.dumps(summary, indent=2))
+                    continue
+
+                if query == '@models':
+                    print(json.dumps(self.model_report(), indent=2))
+                    continue
+
+                if query == '@cache' and self.response_cache is not None:
+                    print(json.dumps(self.response_cache.snapshot(), indent=2))
+                    continue
+
                 if query.startswith('@'):
                     topic = query[1:]
                     if topic == "folders":
@@ -247,7 +590,9 @@ class MCP_Chatbot:
                     await self.get_resource(resource_uri)
                     continue
                     
-                await self.process_query(query)
+                answer = await self.process_query(query)
+                if answer is not None:
+                    print(answer)
                 print("\n")
                     
             except Exception as e:
@@ -0,0 +1,203 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+import argparse
+import asyncio
+import getpass
+import os
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+import uvicorn
+
+from mcp_chatbot import MCP_Chatbot, Conversation
+
+MAX_CONVERSATIONS = 1000
+
+
+class FairScheduler:
+    """
+    Admit calls to one MCP session round-robin across conversations.
+
+    At most `max_inflight` calls run at once; when the session is busy the waiting
+    conversations take turns, so one chatty conversation can't starve the others.
+    """
+    def __init__(self, max_inflight=4):
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self.waiters = OrderedDict()  # conversation_id -> deque of futures
+
+    @asynccontextmanager
+    async def slot(self, conversation_id):
+        await self.acquire(conversation_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, conversation_id):
+        if self.inflight < self.max_inflight and not self.waiters:
+            self.inflight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(conversation_id, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted right before the cancellation, hand it on
+                self.release()
+            else:
+                queue = self.waiters.get(conversation_id)
+                if queue and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self.waiters[conversation_id]
+            raise
+
+    def release(self):
+        self.inflight -= 1
+        while self.inflight < self.max_inflight and self.waiters:
+            conversation_id, queue = next(iter(self.waiters.items()))
+            future = queue.popleft()
+            # Next turn goes to the following conversation
+            if queue:
+                self.waiters.move_to_end(conversation_id)
+            else:
+                del self.waiters[conversation_id]
+            if future.done():
+                continue
+            self.inflight += 1
+            future.set_result(None)
+
+
+class SessionPool:
+    """One FairScheduler per shared MCP session."""
+    def __init__(self, max_inflight_per_session=4):
+        self.max_inflight_per_session = max_inflight_per_session
+        self.schedulers = {}
+
+    def slot(self, session, conversation_id):
+        scheduler = self.schedulers.get(id(session))
+        if scheduler is None:
+            scheduler = FairScheduler(self.max_inflight_per_session)
+            self.schedulers[id(session)] = scheduler
+        return scheduler.slot(conversation_id)
+
+
+class MCP_Gateway:
+    """Serve many independent conversations on top of one MCP_Chatbot's sessions."""
+    def __init__(self, max_inflight_per_session=4, max_conversations=MAX_CONVERSATIONS):
+        self.chatbot = MCP_Chatbot()
+        self.chatbot.tool_scheduler = SessionPool(max_inflight_per_session)
+        self.max_conversations = max_conversations
+        self.conversations = {}
+
+    def create_conversation(self):
+        if len(self.conversations) >= self.max_conversations:
+            return None
+        conversation = Conversation(uuid.uuid4().hex)
+        self.conversations[conversation.conversation_id] = conversation
+        return conversation
+
+    async def ask(self, conversation, query):
+        async with conversation.lock:
+            return await self.chatbot.process_query(query, conversation)
+
+    def describe(self, conversation):
+        return {
+            "conversation_id": conversation.conversation_id,
+            "messages": [
+                {"type": message.type, "content": str(message.content)}
+                for message in conversation.conversation_history
+            ]
+        }
+
+    # --- HTTP / WebSocket API ---
+
+    async def create_endpoint(self, request: Request):
+        conversation = self.create_conversation()
+        if conversation is None:
+            return JSONResponse({"error": "Too many conversations"}, status_code=429)
+        return JSONResponse({"conversation_id": conversation.conversation_id}, status_code=201)
+
+    async def conversation_endpoint(self, request: Request):
+        conversation = self.conversations.get(request.path_params["conversation_id"])
+        if conversation is None:
+            return JSONResponse({"error": "Conversation not found"}, status_code=404)
+        if request.method == "DELETE":
+            del self.conversations[conversation.conversation_id]
+            return JSONResponse({"deleted": conversation.conversation_id})
+        return JSONResponse(self.describe(conversation))
+
+    async def message_endpoint(self, request: Request):
+        conversation = self.conversations.get(request.path_params["conversation_id"])
+        if conversation is None:
+            return JSONResponse({"error": "Conversation not found"}, status_code=404)
+        body = await request.json()
+        query = body.get("query", "").strip() if isinstance(body, dict) else ""
+        if not query:
+            return JSONResponse({"error": "Missing 'query'"}, status_code=400)
+        try:
+            answer = await self.ask(conversation, query)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+        return JSONResponse({"conversation_id": conversation.conversation_id, "answer": answer})
+
+    async def websocket_endpoint(self, websocket: WebSocket):
+        conversation = self.conversations.get(websocket.path_params["conversation_id"])
+        if conversation is None:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        try:
+            while True:
+                query = (await websocket.receive_text()).strip()
+                if not query:
+                    continue
+                try:
+                    answer = await self.ask(conversation, query)
+                    await websocket.send_json({"answer": answer})
+                except Exception as e:
+                    await websocket.send_json({"error": str(e)})
+        except WebSocketDisconnect:
+            pass
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        # Connect once, all conversations share these sessions
+        await self.chatbot.connect_to_servers()
+        try:
+            yield
+        finally:
+            await self.chatbot.cleanup()
+
+    def build_app(self):
+        return Starlette(
+            routes=[
+                Route("/conversations", self.create_endpoint, methods=["POST"]),
+                Route("/conversations/{conversation_id}", self.conversation_endpoint, methods=["GET", "DELETE"]),
+                Route("/conversations/{conversation_id}/messages", self.message_endpoint, methods=["POST"]),
+                WebSocketRoute("/conversations/{conversation_id}/ws", self.websocket_endpoint),
+            ],
+            lifespan=self.lifespan
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-conversation gateway for MCP_Chatbot")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-inflight", type=int, default=4,
+                        help="Maximum concurrent tool calls per MCP session")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.environ.get("GOOGLE_API_KEY"):
+        os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
+    gateway = MCP_Gateway(max_inflight_per_session=args.max_inflight)
+    uvicorn.run(gateway.build_app(), host=args.host, port=args.port)
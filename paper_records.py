@@ -0,0 +1,499 @@
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+import bisect
+from datetime import date
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import json
+import sys
+import threading
+import unicodedata
+
+from paper_store import PaperStore, canonical_id, versioned_id
+
+ARXIV_PDF_PREFIX = "http://arxiv.org/pdf/"
+# Topic statistics: authors listed, and width of the summary length histogram buckets
+TOP_AUTHORS = 10
+SUMMARY_BUCKET_BYTES = 250
+# DateIndex keys: date ordinal in the high bits, paper number in the low ones
+PAPER_NUMBER_BITS = 32
+# Pending DateIndex keys up to this many are inserted one by one, more are merged with one sort
+DATE_INSERTS = 64
+
+
+class AuthorTable:
+    """Intern author names: every distinct name is stored once and referenced by id."""
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, name: str) -> int:
+        author_id = self.ids.get(name)
+        if author_id is None:
+            author_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = author_id
+        return author_id
+
+    def name(self, author_id: int) -> str:
+        return self.names[author_id]
+
+
+class SummaryBuffer:
+    """All summaries UTF-8 encoded into one shared buffer, decoded only when read."""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def append(self, text: str) -> Tuple[int, int]:
+        data = text.encode("utf-8")
+        offset = len(self.buffer)
+        self.buffer += data
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> str:
+        # A slice copies; a memoryview would be an export that makes a concurrent append fail
+        return self.buffer[offset:offset + length].decode("utf-8")
+
+    def __len__(self):
+        return len(self.buffer)
+
+
+@dataclass(slots=True)
+class PaperRecord:
+    """Compact in-memory form of one stored paper."""
+    paper_id: str  # canonical id, without version suffix
+    title: str
+    author_ids: Tuple[int, ...]
+    published: int  # date ordinal, 0 if unknown
+    summary_offset: int
+    summary_length: int
+    version: int = 0  # latest arXiv version stored, 0 if the id had none
+    pdf_url: Optional[str] = None  # None when it is the default arXiv url for versioned_id
+    number: int = 0  # position in PaperCatalog.records, what the indexes store instead of the id
+
+    @property
+    def versioned_id(self) -> str:
+        return versioned_id(self.paper_id, self.version)
+
+
+class RankedCounter:
+    """
+    Counter whose keys are also grouped by count, so the most common keys are
+    found without sorting: add() is O(1), top(n) walks down from the highest count.
+    """
+    def __init__(self):
+        self.counts: Dict[Hashable, int] = {}
+        self.buckets: Dict[int, Dict[Hashable, None]] = {}  # count -> keys, in order of arrival
+        self.max = 0
+
+    def add(self, key: Hashable, delta: int = 1) -> None:
+        old = self.counts.get(key, 0)
+        new = old + delta
+        if old:
+            bucket = self.buckets[old]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[old]
+            elif sys.getsizeof(bucket) > 128 * len(bucket) + 4096:
+                # Dicts don't shrink on delete: copy a bucket most of its keys have left
+                self.buckets[old] = dict(bucket)
+        if new > 0:
+            self.counts[key] = new
+            self.buckets.setdefault(new, {})[key] = None
+            self.max = max(self.max, new)
+        else:
+            self.counts.pop(key, None)
+        while self.max and self.max not in self.buckets:
+            self.max -= 1
+
+    def top(self, n: int) -> List[Tuple[Hashable, int]]:
+        result = []
+        count = self.max
+        while count > 0 and len(result) < n:
+            for key in self.buckets.get(count, ()):
+                result.append((key, count))
+                if len(result) == n:
+                    break
+            count -= 1
+        return result
+
+    def __len__(self):
+        return len(self.counts)
+
+
+def date_key(published: int, number: int) -> int:
+    """DateIndex key of a paper: its date ordinal and its PaperCatalog number in one int."""
+    return published << PAPER_NUMBER_BITS | number
+
+
+def key_number(key: int) -> int:
+    return key & ((1 << PAPER_NUMBER_BITS) - 1)
+
+
+class DateIndex:
+    """
+    date_key() keys kept sorted, for date-range listings with bisect: a page of k
+    papers is found in O(log n + k). Keys are stored in an array, 8 bytes a paper.
+
+    Adds are collected and merged on the next read: a few are inserted in place,
+    many (bulk loads) are merged with one sort instead of an O(n) insertion each.
+    """
+    def __init__(self):
+        self.keys = array("q")
+        self.pending = array("q")
+
+    def add(self, key: int) -> None:
+        self.pending.append(key)
+
+    def _merge(self) -> None:
+        if len(self.pending) <= DATE_INSERTS:
+            for key in self.pending:
+                bisect.insort(self.keys, key)
+        else:
+            self.keys.extend(self.pending)
+            self.keys = array("q", sorted(self.keys))
+        self.pending = array("q")
+
+    def remove(self, key: int) -> None:
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+        elif key in self.pending:
+            self.pending.remove(key)
+
+    def range(self, since: int = 0, until: int = None, descending: bool = True,
+              after: int = None, limit: int = 20) -> Tuple[List[int], int]:
+        """
+        Keys published between `since` and `until` (ordinals, inclusive), newest first
+        when descending, starting after the key `after` in that order. Returns up to
+        `limit` keys and the number of keys in the date range.
+        """
+        self._merge()
+        lo = bisect.bisect_left(self.keys, date_key(since, 0))
+        hi = bisect.bisect_left(self.keys, date_key(until + 1, 0)) if until is not None else len(self.keys)
+        total = max(0, hi - lo)
+        if descending:
+            if after is not None:
+                hi = min(hi, bisect.bisect_left(self.keys, after))
+            return self.keys[max(lo, hi - limit):hi].tolist()[::-1], total
+        if after is not None:
+            lo = max(lo, bisect.bisect_right(self.keys, after))
+        return self.keys[lo:min(hi, lo + limit)].tolist(), total
+
+    def __len__(self):
+        return len(self.keys) + len(self.pending)
+
+
+class TopicStats:
+    """
+    Aggregates of one topic's papers, updated as papers are added or changed:
+    papers per publication year, papers per author and summary lengths.
+    """
+    def __init__(self):
+        self.papers = 0
+        self.years: Counter = Counter()
+        self.authors = RankedCounter()  # author key (see PaperCatalog) -> papers
+        self.summary_buckets: Counter = Counter()  # summary length // SUMMARY_BUCKET_BYTES -> papers
+        self.summary_bytes = 0
+
+    def add(self, record: "PaperRecord", author_keys: Iterable[int], sign: int = 1) -> None:
+        """Count (sign=1) or uncount (sign=-1) a paper."""
+        self.papers += sign
+        self.years[date.fromordinal(record.published).year if record.published else None] += sign
+        for key in author_keys:
+            self.authors.add(key, sign)
+        self.summary_buckets[record.summary_length // SUMMARY_BUCKET_BYTES] += sign
+        self.summary_bytes += sign * record.summary_length
+
+    def to_dict(self, author_name: Callable[[int], str]) -> dict:
+        return {
+            'papers': self.papers,
+            'papers_per_year': {
+                str(year) if year is not None else "unknown": count
+                for year, count in sorted(self.years.items(), key=lambda item: (item[0] is None, item[0] or 0))
+                if count
+            },
+            'authors': len(self.authors),
+            'top_authors': [
+                {'name': author_name(key), 'papers': count} for key, count in self.authors.top(TOP_AUTHORS)
+            ],
+            'summary_length_bytes': {
+                'mean': round(self.summary_bytes / self.papers) if self.papers else 0,
+                'histogram': [
+                    {'from': bucket * SUMMARY_BUCKET_BYTES, 'to': (bucket + 1) * SUMMARY_BUCKET_BYTES, 'papers': count}
+                    for bucket, count in sorted(self.summary_buckets.items()) if count
+                ]
+            }
+        }
+
+
+def paper_text(title: str, summary: str) -> str:
+    """Title and summary, the text used for similarity search."""
+    return f"{title}\n{summary}"
+
+
+def normalize_author(name: str) -> str:
+    """Key used to match author names: no accents, case, dots or extra spaces."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.replace(".", " ").lower().split())
+
+
+def date_to_ordinal(value: str) -> int:
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+def ordinal_to_date(ordinal: int) -> str:
+    return str(date.fromordinal(ordinal)) if ordinal else ""
+
+
+class PaperCatalog:
+    """
+    In-memory cache of every stored paper, shared by all tools and resources.
+
+    Papers are kept as PaperRecords with interned authors, ordinal dates and
+    summaries in a shared buffer, keyed by canonical (version-less) id. Topics
+    map to the ids of their papers. refresh() only reads what the PaperStore
+    wrote since the last refresh.
+
+    The indexes hold ints, not strings: every record has a number (its position
+    in `records`) and author names that normalize alike share one author key,
+    the id of the first of them. An author index (author key -> array of paper
+    numbers) is updated on every add(), and so are the statistics of the paper's
+    topics (TopicStats) and the published date indexes of all papers and of every
+    topic (DateIndex). The co-authorship graph is read off the author index.
+    """
+    def __init__(self, store: Optional[PaperStore] = None):
+        self.store = store
+        self.seq = 0
+        self.authors = AuthorTable()
+        self.summaries = SummaryBuffer()
+        self.papers: Dict[str, PaperRecord] = {}
+        self.records: List[PaperRecord] = []  # by number
+        self.topics: Dict[str, Dict[str, None]] = {}  # topic -> ordered set of paper ids
+        self.corrupted_topics = set()
+        # author id -> author key; a list, so the indexes share its int objects instead of each making their own
+        self.author_keys: List[int] = []
+        self.author_lookup: Dict[str, int] = {}  # normalized name -> author key
+        self.author_papers: List[Optional[array]] = []  # author key -> paper numbers, None for other author ids
+        self.topic_stats: Dict[str, TopicStats] = {}
+        self.stats_json: Dict[str, str] = {}  # topic -> rendered stats, dropped when they change
+        self.dates = DateIndex()
+        self.topic_dates: Dict[str, DateIndex] = {}
+        self.version = 0  # bumped on every change, lets derived indexes catch up
+        self.lock = threading.RLock()
+
+    # --- writing ---
+
+    def add(self, topic: Optional[str], paper_id: str, info: dict, version: int = 0) -> PaperRecord:
+        """Add or update a paper, and add it to the topic if one is given."""
+        with self.lock:
+            old = self.papers.get(paper_id)
+            summary = info.get("summary", "")
+            if old and self.summary(old) == summary:
+                offset, length = old.summary_offset, old.summary_length
+            else:
+                offset, length = self.summaries.append(summary)
+            pdf_url = info.get("pdf_url")
+            record = PaperRecord(
+                paper_id=paper_id,
+                title=info.get("title", ""),
+                author_ids=tuple(self._intern_author(name) for name in info.get("authors", [])),
+                published=date_to_ordinal(info.get("published")),
+                summary_offset=offset,
+                summary_length=length,
+                version=version,
+                number=old.number if old is not None else len(self.records)
+            )
+            if pdf_url != ARXIV_PDF_PREFIX + record.versioned_id:
+                record.pdf_url = pdf_url
+            self.papers[paper_id] = record
+            if old is None:
+                self.records.append(record)
+            else:
+                self.records[record.number] = record
+            self.version += 1
+            if old is not None:
+                self.dates.remove(date_key(old.published, old.number))
+            self.dates.add(date_key(record.published, record.number))
+            if old is None or old.author_ids != record.author_ids:
+                if old is not None:
+                    self._index_authors(old, -1)
+                self._index_authors(record, 1)
+            if old is not None:
+                for other_topic, paper_ids in self.topics.items():
+                    if paper_id in paper_ids:
+                        self._count_in_topic(other_topic, old, -1)
+                        self._count_in_topic(other_topic, record, 1)
+            if topic is not None:
+                self._add_to_topic(topic, paper_id)
+            return record
+
+    def _add_to_topic(self, topic: str, paper_id: str) -> None:
+        paper_ids = self.topics.setdefault(topic, {})
+        if paper_id not in paper_ids:
+            paper_ids[paper_id] = None
+            self._count_in_topic(topic, self.papers[paper_id], 1)
+
+    def _count_in_topic(self, topic: str, record: PaperRecord, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a paper from a topic's statistics and date index."""
+        dates = self.topic_dates.get(topic)
+        if dates is None:
+            dates = self.topic_dates[topic] = DateIndex()
+        key = date_key(record.published, record.number)
+        if sign > 0:
+            dates.add(key)
+        else:
+            dates.remove(key)
+        stats = self.topic_stats.get(topic)
+        if stats is None:
+            stats = self.topic_stats[topic] = TopicStats()
+        stats.add(record, self._author_keys(record), sign)
+        self.stats_json.pop(topic, None)
+
+    def _intern_author(self, name: str) -> int:
+        author_id = self.authors.intern(name)
+        if author_id == len(self.author_keys):
+            # A new name: normalized once, here
+            self.author_keys.append(self.author_lookup.setdefault(normalize_author(name), author_id))
+            self.author_papers.append(None)
+        return author_id
+
+    def _author_keys(self, record: PaperRecord) -> List[int]:
+        """The paper's distinct author keys, in author order."""
+        return list(dict.fromkeys(self.author_keys[author_id] for author_id in record.author_ids))
+
+    def _index_authors(self, record: PaperRecord, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a paper from the author index."""
+        for key in self._author_keys(record):
+            numbers = self.author_papers[key]
+            if sign > 0:
+                if numbers is None:
+                    numbers = self.author_papers[key] = array("i")
+                numbers.append(record.number)
+            elif numbers is not None and record.number in numbers:
+                numbers.remove(record.number)
+
+    def refresh(self) -> None:
+        """Pick up papers and topic memberships stored since the last refresh."""
+        if self.store is None:
+            return
+        with self.lock:
+            changes = self.store.changes_since(self.seq)
+            for row in changes.papers:
+                self.add(None, row["paper_id"], row, row["version"])
+            for topic, paper_id in changes.memberships:
+                self._add_to_topic(topic, paper_id)
+            self.corrupted_topics = changes.corrupted_topics
+            self.seq = changes.seq
+
+    # --- reading ---
+
+    def topic_names(self) -> List[str]:
+        """Every topic, including ones whose papers_info.json is unreadable."""
+        with self.lock:
+            return list(self.topics) + sorted(self.corrupted_topics - set(self.topics))
+
+    def get(self, paper_id: str) -> Optional[PaperRecord]:
+        """Look up a paper by arXiv id, with or without version suffix."""
+        return self.papers.get(canonical_id(paper_id)[0])
+
+    def summary(self, record: PaperRecord) -> str:
+        return self.summaries.read(record.summary_offset, record.summary_length)
+
+    def author_names(self, record: PaperRecord) -> List[str]:
+        return [self.authors.name(author_id) for author_id in record.author_ids]
+
+    def topic_records(self, topic: str) -> List[PaperRecord]:
+        with self.lock:
+            return [self.papers[paper_id] for paper_id in self.topics.get(topic, [])]
+
+    def to_dict(self, record: PaperRecord) -> dict:
+        """The papers_info.json form of a record."""
+        return {
+            'title': record.title,
+            'authors': self.author_names(record),
+            'summary': self.summary(record),
+            'pdf_url': record.pdf_url or ARXIV_PDF_PREFIX + record.versioned_id,
+            'published': ordinal_to_date(record.published)
+        }
+
+    def topic_dict(self, topic: str) -> Dict[str, dict]:
+        return {record.versioned_id: self.to_dict(record) for record in self.topic_records(topic)}
+
+    def topic_stats_json(self, topic: str) -> Optional[str]:
+        """A topic's statistics as JSON, None for an unknown topic. Rendered once per change."""
+        with self.lock:
+            text = self.stats_json.get(topic)
+            if text is None and topic in self.topics:
+                stats = self.topic_stats.get(topic) or TopicStats()
+                text = self.stats_json[topic] = json.dumps({'topic': topic, **stats.to_dict(self.authors.name)}, indent=2)
+            return text
+
+    def list_by_date(self, topic: Optional[str] = None, since: int = 0, until: int = None, descending: bool = True,
+                     after: Tuple[int, str] = None, limit: int = 20) -> Tuple[List[PaperRecord], int]:
+        """
+        Papers of a topic (all papers if None) published between two date ordinals,
+        see DateIndex.range(), starting after the (date ordinal, paper id) `after`.
+        Returns the records and the number of papers in the range.
+        """
+        with self.lock:
+            after_key = None
+            if after is not None:
+                record = self.get(after[1])
+                if record is None:
+                    raise ValueError(f"unknown paper {after[1]}")
+                after_key = date_key(after[0], record.number)
+            dates = self.dates if topic is None else self.topic_dates.get(topic, DateIndex())
+            keys, total = dates.range(since, until, descending, after_key, limit)
+            return [self.records[key_number(key)] for key in keys], total
+
+    def papers_by_author(self, name: str) -> List[PaperRecord]:
+        with self.lock:
+            key = self.author_lookup.get(normalize_author(name))
+            numbers = self.author_papers[key] if key is not None else None
+            return [self.records[number] for number in numbers or ()]
+
+    def _coauthor_counts(self, key: int) -> Counter:
+        """Co-author key -> papers shared with the author `key`."""
+        counts = Counter()
+        for number in self.author_papers[key] or ():
+            for other in self._author_keys(self.records[number]):
+                if other != key:
+                    counts[other] += 1
+        return counts
+
+    def coauthors(self, name: str, depth: int = 1) -> List[dict]:
+        """Authors reachable within `depth` co-authorship hops, nearest first."""
+        with self.lock:
+            start = self.author_lookup.get(normalize_author(name))
+            if start is None or not self.author_papers[start]:
+                return []
+            direct = self._coauthor_counts(start)
+            distances = {start: 0}
+            frontier = [start]
+            for distance in range(1, depth + 1):
+                next_frontier = []
+                for key in frontier:
+                    for other in (direct if key == start else self._coauthor_counts(key)):
+                        if other not in distances:
+                            distances[other] = distance
+                            next_frontier.append(other)
+                frontier = next_frontier
+            result = [
+                {
+                    "name": self.authors.name(key),
+                    "distance": distance,
+                    "shared_papers": direct.get(key, 0)
+                }
+                for key, distance in distances.items() if key != start
+            ]
+            result.sort(key=lambda item: (item["distance"], -item["shared_papers"], item["name"]))
+            return result
+
+    def text(self, record: PaperRecord) -> str:
+        """Title and summary, the text used for similarity search."""
+        return paper_text(record.title, self.summary(record))
@@ -0,0 +1,425 @@
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DB_NAME = "papers.db"
+LEGACY_FILE = "papers_info.json"
+CHANGES_BATCH = 1000  # rows read per query by changes_since()
+
+# MinHash / LSH settings: 32 bands of 4 rows flag pairs above ~42% Jaccard as
+# candidates, which are confirmed when the estimated similarity reaches the threshold
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+NEAR_DUPLICATE_THRESHOLD = 0.8
+_MERSENNE_PRIME = (1 << 31) - 1
+
+VERSION_PATTERN = re.compile(r"^(.*?)v(\d+)$")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT PRIMARY KEY,      -- canonical arXiv id, without version suffix
+    version INTEGER NOT NULL,       -- latest version stored, 0 if the id had none
+    title TEXT NOT NULL,
+    authors TEXT NOT NULL,          -- JSON list
+    summary TEXT NOT NULL,
+    pdf_url TEXT,
+    published TEXT,
+    signature BLOB,                 -- MinHash signature of title + summary
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_seq ON papers(seq);
+CREATE TABLE IF NOT EXISTS topic_papers (
+    topic TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    UNIQUE (topic, paper_id)
+);
+CREATE INDEX IF NOT EXISTS topic_papers_seq ON topic_papers(seq);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    paper_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, paper_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS near_duplicates (
+    paper_id TEXT NOT NULL,
+    duplicate_of TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    PRIMARY KEY (paper_id, duplicate_of)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS legacy_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS topic_watermarks (
+    topic TEXT PRIMARY KEY,
+    published TEXT NOT NULL,        -- submission date of the newest paper synced
+    paper_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingest_progress (
+    source TEXT PRIMARY KEY,        -- absolute path of a bulk-ingested snapshot file
+    offset INTEGER NOT NULL,        -- bytes of the file already stored
+    records INTEGER NOT NULL        -- records read up to offset
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def canonical_id(paper_id: str) -> Tuple[str, int]:
+    """Split an arXiv id into its version-less form and version, e.g. "1104.3954v2" -> ("1104.3954", 2)."""
+    match = VERSION_PATTERN.match(paper_id)
+    if match:
+        return match.group(1), int(match.group(2))
+    return paper_id, 0
+
+
+def versioned_id(paper_id: str, version: int) -> str:
+    return f"{paper_id}v{version}" if version else paper_id
+
+
+@functools.lru_cache(maxsize=None)
+def _permutations() -> Tuple["np.ndarray", "np.ndarray"]:
+    # numpy is only imported once papers are written, it isn't needed to start the server
+    import numpy as np
+    rng = np.random.default_rng(1)
+    return (
+        rng.integers(1, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64),
+        rng.integers(0, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+    )
+
+
+def minhash_signature(text: str) -> "np.ndarray":
+    """MinHash signature over word 3-shingles (single words for very short texts)."""
+    import numpy as np
+    perm_a, perm_b = _permutations()
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(len(words) - 2)] or words or [""]
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in set(shingles)], dtype=np.uint64) % _MERSENNE_PRIME
+    permuted = (hashes[:, None] * perm_a[None, :] + perm_b[None, :]) % _MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: "np.ndarray") -> List[Tuple[int, int]]:
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    return [(band, zlib.crc32(signature[band * rows:(band + 1) * rows].tobytes())) for band in range(LSH_BANDS)]
+
+
+class StoreChanges:
+    """
+    Rows written after a given sequence number, see PaperStore.changes_since().
+    `papers` and `memberships` read their rows from the database as they are iterated.
+    """
+    def __init__(self, seq: int, papers: Iterable[dict], memberships: Iterable[Tuple[str, str]], corrupted_topics: set):
+        self.seq = seq
+        self.papers = papers
+        self.memberships = memberships
+        self.corrupted_topics = corrupted_topics
+
+
+class PaperStore:
+    """
+    SQLite storage of the research server's papers.
+
+    Every paper body is stored once under its canonical (version-less) arXiv id,
+    keeping the latest version seen; topics only hold references. Each write
+    transaction gets a new sequence number, so readers can pick up exactly what
+    changed since they last looked. New papers are checked against the stored
+    ones with MinHash/LSH, and near-duplicates are recorded.
+
+    Legacy papers/<topic>/papers_info.json files are imported when they appear
+    or change, and compact() folds them into the database for good.
+    """
+    def __init__(self, paper_dir: str):
+        self.paper_dir = paper_dir
+        os.makedirs(paper_dir, exist_ok=True)
+        self.db_path = os.path.join(paper_dir, DB_NAME)
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.RLock()
+        self.corrupted_topics = set()
+        self.corrupted_mtimes: Dict[str, float] = {}  # unreadable legacy files, not retried until changed
+
+    # --- writing ---
+
+    def set_cache_size(self, mib: int) -> None:
+        """SQLite page cache of the connection; bulk writes of random keys spill the default 2 MiB."""
+        with self.lock:
+            self.connection.execute(f"PRAGMA cache_size = {-int(mib) * 1024}")
+
+    def _next_seq(self) -> int:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        seq = (row[0] if row else 0) + 1
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seq', ?)", (seq,))
+        return seq
+
+    def save_papers(self, topic: str, papers: Iterable[Tuple[str, dict]], watermark: Tuple[str, str] = None) -> List[str]:
+        """Store papers (arXiv id, papers_info.json entry) in a topic, in one transaction.
+
+        A (published date, arXiv id) watermark for the topic's sync can be saved along.
+        Returns the canonical ids of the papers.
+        """
+        with self.lock, self.connection:
+            seq = self._next_seq()
+            canonical_ids = [self._save_paper(seq, topic, paper_id, info) for paper_id, info in papers]
+            if watermark:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO topic_watermarks (topic, published, paper_id) VALUES (?, ?, ?)",
+                    (topic, *watermark)
+                )
+            return canonical_ids
+
+    def save_batch(self, entries: Iterable[Tuple[Optional[str], str, dict, Optional[bytes]]],
+                   source: str = None, offset: int = 0, records: int = 0) -> int:
+        """Store (topic, arXiv id, info, MinHash signature or None) entries of many topics in one transaction.
+
+        Used by bulk ingest: the progress through a snapshot file (`source`) is saved
+        in the same transaction, so an interrupted ingest resumes exactly after the
+        last stored batch. Returns the number of entries stored.
+        """
+        with self.lock, self.connection:
+            seq = self._next_seq()
+            count = 0
+            for topic, paper_id, info, signature in entries:
+                self._save_paper(seq, topic, paper_id, info, signature)
+                count += 1
+            if source:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO ingest_progress (source, offset, records) VALUES (?, ?, ?)",
+                    (source, offset, records)
+                )
+            return count
+
+    def _save_paper(self, seq: int, topic: Optional[str], paper_id: str, info: dict, signature: bytes = None) -> str:
+        canonical, version = canonical_id(paper_id)
+        row = self.connection.execute(
+            "SELECT version, title, authors, summary, pdf_url, published FROM papers WHERE paper_id = ?", (canonical,)
+        ).fetchone()
+        authors = json.dumps(info.get("authors", []), ensure_ascii=False)
+        body = (info.get("title", ""), authors, info.get("summary", ""), info.get("pdf_url"), info.get("published"))
+        if row is None or (version >= row[0] and (version, *body) != tuple(row)):
+            if signature is None:
+                signature = minhash_signature(f"{body[0]}\n{body[2]}")
+            else:
+                import numpy as np
+                signature = np.frombuffer(signature, dtype=np.uint32)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO papers "
+                "(paper_id, version, title, authors, summary, pdf_url, published, signature, seq) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (canonical, version, *body, signature.tobytes(), seq)
+            )
+            self._index_near_duplicates(canonical, signature)
+        if topic is not None:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO topic_papers (topic, paper_id, seq) VALUES (?, ?, ?)", (topic, canonical, seq)
+            )
+        return canonical
+
+    def _index_near_duplicates(self, paper_id: str, signature: "np.ndarray") -> None:
+        import numpy as np
+        buckets = band_buckets(signature)
+        # All bands in one lookup and one insert, this runs for every stored paper
+        candidates = {
+            other for (other,) in self.connection.execute(
+                # OR of (band, bucket) pairs is searched on the primary key, row-value IN is not
+                "SELECT DISTINCT paper_id FROM lsh_buckets WHERE "
+                + " OR ".join("(band = ? AND bucket = ?)" for _ in buckets),
+                [value for band_bucket in buckets for value in band_bucket]
+            )
+            if other != paper_id
+        }
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO lsh_buckets (band, bucket, paper_id) VALUES (?, ?, ?)",
+            [(band, bucket, paper_id) for band, bucket in buckets]
+        )
+        for other in candidates:
+            row = self.connection.execute("SELECT signature FROM papers WHERE paper_id = ?", (other,)).fetchone()
+            if not row or not row[0]:
+                continue
+            similarity = float(np.mean(np.frombuffer(row[0], dtype=np.uint32) == signature))
+            if similarity >= NEAR_DUPLICATE_THRESHOLD:
+                first, second = sorted((paper_id, other))
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO near_duplicates (paper_id, duplicate_of, similarity) VALUES (?, ?, ?)",
+                    (second, first, similarity)
+                )
+
+    # --- legacy papers_info.json files ---
+
+    def _legacy_files(self) -> Dict[str, str]:
+        files = {}
+        for topic in os.listdir(self.paper_dir):
+            file_path = os.path.join(self.paper_dir, topic, LEGACY_FILE)
+            if os.path.isfile(file_path):
+                files[topic] = file_path
+        return files
+
+    def import_legacy(self) -> int:
+        """Import papers_info.json files that are new or changed. Returns the number of entries read."""
+        entries = 0
+        with self.lock:
+            files = self._legacy_files()
+            known = dict(self.connection.execute("SELECT path, mtime FROM legacy_files"))
+            self.corrupted_topics &= set(files)
+            for topic, file_path in files.items():
+                mtime = os.path.getmtime(file_path)
+                if known.get(file_path) == mtime or self.corrupted_mtimes.get(file_path) == mtime:
+                    continue
+                try:
+                    with open(file_path, "r") as json_file:
+                        papers_info = json.load(json_file)
+                except json.JSONDecodeError as e:
+                    print(f"Error reading {file_path}: {str(e)}")
+                    self.corrupted_topics.add(topic)
+                    self.corrupted_mtimes[file_path] = mtime
+                    continue
+                self.corrupted_topics.discard(topic)
+                self.corrupted_mtimes.pop(file_path, None)
+                with self.connection:
+                    seq = self._next_seq()
+                    for paper_id, info in papers_info.items():
+                        self._save_paper(seq, topic, paper_id, info)
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO legacy_files (path, mtime) VALUES (?, ?)", (file_path, mtime)
+                    )
+                entries += len(papers_info)
+        return entries
+
+    def compact(self, remove_legacy_files: bool = True) -> dict:
+        """Fold every legacy topic file into the database and report the space reclaimed."""
+        with self.lock:
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            files = self._legacy_files()
+            bytes_before = self._db_bytes() + sum(os.path.getsize(path) for path in files.values())
+            legacy_entries = 0
+            for file_path in files.values():
+                try:
+                    with open(file_path, "r") as json_file:
+                        legacy_entries += len(json.load(json_file))
+                except json.JSONDecodeError:
+                    pass
+            # Committed on its own: VACUUM fails inside an open transaction
+            with self.connection:
+                self.connection.execute("DELETE FROM legacy_files")
+            self.import_legacy()
+            removed = []
+            if remove_legacy_files:
+                for topic, file_path in files.items():
+                    if topic in self.corrupted_topics:
+                        continue
+                    os.remove(file_path)
+                    removed.append(file_path)
+                    topic_dir = os.path.dirname(file_path)
+                    if not os.listdir(topic_dir):
+                        os.rmdir(topic_dir)
+                with self.connection:
+                    self.connection.execute("DELETE FROM legacy_files")
+            self.connection.execute("VACUUM")
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            bytes_after = self._db_bytes() + sum(
+                os.path.getsize(path) for path in files.values() if os.path.exists(path)
+            )
+            return {
+                "legacy_entries": legacy_entries,
+                "unique_papers": self.connection.execute("SELECT COUNT(*) FROM papers").fetchone()[0],
+                "topic_memberships": self.connection.execute("SELECT COUNT(*) FROM topic_papers").fetchone()[0],
+                "near_duplicate_pairs": self.connection.execute("SELECT COUNT(*) FROM near_duplicates").fetchone()[0],
+                "removed_files": removed,
+                "bytes_before": bytes_before,
+                "bytes_after": bytes_after,
+                "bytes_reclaimed": bytes_before - bytes_after
+            }
+
+    def _db_bytes(self) -> int:
+        return sum(
+            os.path.getsize(path) for path in (self.db_path, self.db_path + "-wal") if os.path.exists(path)
+        )
+
+    # --- reading ---
+
+    def changes_since(self, seq: int) -> StoreChanges:
+        """
+        Papers and topic memberships written after `seq`. The rows are read CHANGES_BATCH
+        at a time as they are iterated, so the first refresh after a bulk ingest never
+        holds the whole corpus in memory next to the catalog being built from it.
+        """
+        self.import_legacy()
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+            current = row[0] if row else 0
+            if current == seq:
+                return StoreChanges(seq, [], [], set(self.corrupted_topics))
+        papers = (
+            {
+                "paper_id": paper_id, "version": version, "title": title, "authors": json.loads(authors),
+                "summary": summary, "pdf_url": pdf_url, "published": published
+            }
+            for paper_id, version, title, authors, summary, pdf_url, published in self._rows_between(
+                "papers", "paper_id, version, title, authors, summary, pdf_url, published", seq, current
+            )
+        )
+        memberships = self._rows_between("topic_papers", "topic, paper_id", seq, current)
+        return StoreChanges(current, papers, memberships, set(self.corrupted_topics))
+
+    def changed_papers(self, seq: int) -> int:
+        """Number of papers written after `seq`."""
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM papers WHERE seq > ?", (seq,)).fetchone()[0]
+
+    def _rows_between(self, table: str, columns: str, seq: int, current: int) -> Iterator[tuple]:
+        """Rows of a table written after `seq` up to `current`, in write order, one query per batch."""
+        after = (seq + 1, 0)  # (seq, rowid) of the last row read; rowids start at 1
+        while True:
+            # The seq indexes are ordered by (seq, rowid): each batch continues where the last one stopped
+            with self.lock:
+                rows = self.connection.execute(
+                    f"SELECT seq, rowid, {columns} FROM {table} WHERE (seq, rowid) > (?, ?) AND seq <= ? "
+                    "ORDER BY seq, rowid LIMIT ?", (*after, current, CHANGES_BATCH)
+                ).fetchall()
+            for row in rows:
+                yield row[2:]
+            if len(rows) < CHANGES_BATCH:
+                return
+            after = rows[-1][:2]
+
+    def get_watermark(self, topic: str) -> Optional[Tuple[str, str]]:
+        """(published date, arXiv id) of the newest paper synced for a topic."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT published, paper_id FROM topic_watermarks WHERE topic = ?", (topic,)
+            ).fetchone()
+
+    def ingest_progress(self, source: str) -> Tuple[int, int]:
+        """(byte offset, records read) already stored from a snapshot file, (0, 0) if none."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT offset, records FROM ingest_progress WHERE source = ?", (source,)
+            ).fetchone()
+        return tuple(row) if row else (0, 0)
+
+    def reset_ingest_progress(self, source: str) -> None:
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM ingest_progress WHERE source = ?", (source,))
+
+    def near_duplicates(self, paper_id: str) -> List[dict]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT duplicate_of, similarity FROM near_duplicates WHERE paper_id = ? "
+                "UNION SELECT paper_id, similarity FROM near_duplicates WHERE duplicate_of = ?",
+                (paper_id, paper_id)
+            ).fetchall()
+        return [{"paper_id": other, "similarity": round(similarity, 3)} for other, similarity in rows]
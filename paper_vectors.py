@@ -0,0 +1,151 @@
+from typing import Dict, List, Tuple
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+VECTOR_DIM = 128
+QUERY_CHUNK_ROWS = 16384
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "we", "with"
+}
+
+
+def embed(text: str, dim: int = VECTOR_DIM) -> np.ndarray:
+    """
+    Offline embedding: signed feature hashing of word unigrams and bigrams.
+
+    crc32 is used instead of hash() so vectors stay comparable across processes.
+    The result is L2-normalized, so a dot product is the cosine similarity.
+    """
+    words = [w for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOP_WORDS]
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    # Dampen very frequent features
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class PaperVectors:
+    """
+    Append-only float32 matrix of paper embeddings, memory-mapped from disk.
+
+    Row i of vectors.f32 belongs to line i of vector_ids.txt. Queries scan the
+    memory map in chunks, so the matrix is paged in from the OS cache instead of
+    being copied into the process. synced_seq holds the PaperStore sequence number
+    up to which the stored papers are embedded.
+    """
+    def __init__(self, directory: str, dim: int = VECTOR_DIM):
+        self.directory = directory
+        self.dim = dim
+        self.matrix_path = os.path.join(directory, "vectors.f32")
+        self.ids_path = os.path.join(directory, "vector_ids.txt")
+        self.seq_path = os.path.join(directory, "synced_seq")
+        self.seq = 0
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.matrix = None
+        self.lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "r") as ids_file:
+                self.ids = [line.rstrip("\n") for line in ids_file if line.strip()]
+        # Drop rows written without their id (e.g. after a crash between the two writes)
+        row_bytes = self.dim * 4
+        rows_on_disk = os.path.getsize(self.matrix_path) // row_bytes if os.path.exists(self.matrix_path) else 0
+        if rows_on_disk != len(self.ids):
+            count = min(rows_on_disk, len(self.ids))
+            self.ids = self.ids[:count]
+            with open(self.matrix_path, "ab") as matrix_file:
+                matrix_file.truncate(count * row_bytes)
+            with open(self.ids_path, "w") as ids_file:
+                ids_file.writelines(f"{paper_id}\n" for paper_id in self.ids)
+        self.rows = {paper_id: row for row, paper_id in enumerate(self.ids)}
+        if os.path.exists(self.seq_path):
+            with open(self.seq_path, "r") as seq_file:
+                self.seq = int(seq_file.read().strip() or 0)
+        self._remap()
+
+    def _remap(self):
+        if self.ids:
+            self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dim))
+        else:
+            self.matrix = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, paper_id):
+        return paper_id in self.rows
+
+    def upsert(self, items: List[Tuple[str, str]]) -> None:
+        """Embed (paper_id, text) pairs; new papers are appended, known ones rewritten in place."""
+        with self.lock:
+            new_ids, new_vectors = [], []
+            with open(self.matrix_path, "r+b" if os.path.exists(self.matrix_path) else "w+b") as matrix_file:
+                for paper_id, text in items:
+                    vector = embed(text, self.dim)
+                    row = self.rows.get(paper_id)
+                    if row is None:
+                        self.rows[paper_id] = len(self.ids) + len(new_ids)
+                        new_ids.append(paper_id)
+                        new_vectors.append(vector)
+                    else:
+                        matrix_file.seek(row * self.dim * 4)
+                        matrix_file.write(vector.tobytes())
+                if new_vectors:
+                    matrix_file.seek(len(self.ids) * self.dim * 4)
+                    matrix_file.write(np.stack(new_vectors).astype(np.float32).tobytes())
+            if new_ids:
+                with open(self.ids_path, "a") as ids_file:
+                    ids_file.writelines(f"{paper_id}\n" for paper_id in new_ids)
+                self.ids.extend(new_ids)
+            self._remap()
+
+    def mark_synced(self, seq: int) -> None:
+        """Record that the papers stored up to PaperStore sequence number `seq` are embedded."""
+        with self.lock:
+            with open(self.seq_path + ".tmp", "w") as seq_file:
+                seq_file.write(str(seq))
+            os.replace(self.seq_path + ".tmp", self.seq_path)
+            self.seq = seq
+
+    def vector(self, paper_id: str):
+        row = self.rows.get(paper_id)
+        return None if row is None else np.array(self.matrix[row])
+
+    def top_k(self, query: np.ndarray, k: int = 5, exclude: str = None) -> List[Tuple[str, float]]:
+        """Cosine top-k over the whole matrix, scanned chunk by chunk."""
+        with self.lock:
+            matrix, ids = self.matrix, self.ids
+        if matrix is None or k <= 0:
+            return []
+        query = query.astype(np.float32)
+        wanted = k + (1 if exclude else 0)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(matrix), QUERY_CHUNK_ROWS):
+            scores = matrix[start:start + QUERY_CHUNK_ROWS] @ query
+            if len(scores) > wanted:
+                top = np.argpartition(scores, -wanted)[-wanted:]
+            else:
+                top = np.arange(len(scores))
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if len(best_scores) > wanted:
+                keep = np.argpartition(best_scores, -wanted)[-wanted:]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+        order = np.argsort(-best_scores)
+        result = [(ids[best_rows[i]], float(best_scores[i])) for i in order if ids[best_rows[i]] != exclude]
+        return result[:k]
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+import mmap
+import os
+import re
+import threading
+
+CHUNK_SIZE = 2**20  # bytes served per chunk
+DOWNLOAD_BLOCK = 64 * 2**10
+# Open memory maps kept; reading a chunk of a mapped file is a slice, nothing else is read
+MAX_OPEN_MAPS = 16
+SAFE_NAME = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class PdfCache:
+    """
+    PDFs downloaded once into a directory and read back through memory maps.
+
+    Downloads are streamed to a temporary file in blocks and renamed when
+    complete, so a PDF is never held in memory as a whole and an interrupted
+    download leaves nothing behind. Concurrent requests for the same paper
+    share one download. Files are evicted, least recently opened first, when
+    the directory grows beyond `max_bytes`. `stats["hits"]` counts the cached
+    files opened for reading, once per memory map, not every chunk read.
+    """
+    def __init__(self, directory: str, max_bytes: int = 2**30, acquire: Optional[Callable[[], object]] = None,
+                 timeout: float = 60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.acquire = acquire  # called before every download, e.g. a rate limiter
+        self.timeout = timeout
+        self.session = None  # requests.Session, created by the first download
+        self.lock = threading.Lock()
+        self.download_locks: Dict[str, threading.Lock] = {}
+        self.maps: "OrderedDict[str, tuple]" = OrderedDict()  # path -> (file, mmap or None for empty files)
+        self.stats = {"downloads": 0, "downloaded_bytes": 0, "hits": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, paper_id: str) -> str:
+        return os.path.join(self.directory, SAFE_NAME.sub("_", paper_id) + ".pdf")
+
+    def cached(self, paper_id: str) -> Optional[str]:
+        """Path of the cached PDF of a paper, or None if it hasn't been downloaded."""
+        path = self.path(paper_id)
+        with self.lock:
+            if path in self.maps:
+                return path
+        return path if os.path.exists(path) else None
+
+    def fetch(self, paper_id: str, url: str) -> str:
+        """Path of the cached PDF of a paper, downloaded from `url` if it isn't cached yet."""
+        path = self.path(paper_id)
+        with self.lock:
+            download_lock = self.download_locks.setdefault(path, threading.Lock())
+        with download_lock:
+            if os.path.exists(path):
+                return path
+            self._download(url, path)
+        self._evict(keep=path)
+        return path
+
+    def _download(self, url: str, path: str) -> None:
+        # Imported on first use, it isn't needed to start the server
+        import requests
+        if self.session is None:
+            self.session = requests.Session()
+        if self.acquire is not None:
+            self.acquire()
+        partial = f"{path}.{threading.get_ident()}.part"
+        size = 0
+        try:
+            with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                with open(partial, "wb") as file:
+                    for block in response.iter_content(DOWNLOAD_BLOCK):
+                        if size == 0 and not block.startswith(b"%PDF"):
+                            raise ValueError(f"{url} did not return a PDF")
+                        file.write(block)
+                        size += len(block)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        self.stats["downloads"] += 1
+        self.stats["downloaded_bytes"] += size
+
+    def size(self, path: str) -> int:
+        return os.path.getsize(path)
+
+    def read(self, path: str, offset: int, length: int = CHUNK_SIZE) -> bytes:
+        """Up to `length` bytes of a cached PDF from `offset`, copied out of its memory map."""
+        if offset < 0 or length < 0:
+            raise ValueError("offset and length must not be negative")
+        with self.lock:
+            entry = self.maps.get(path)
+            if entry is None:
+                entry = self._open(path)
+            else:
+                self.maps.move_to_end(path)
+            _, mapped = entry
+            if mapped is None:
+                return b""
+            return mapped[offset:offset + length]
+
+    def _open(self, path: str) -> tuple:
+        file = open(path, "rb")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else None
+        entry = self.maps[path] = (file, mapped)
+        self.stats["hits"] += 1
+        # Opening counts as a use for eviction
+        os.utime(path)
+        while len(self.maps) > MAX_OPEN_MAPS:
+            self._close(next(iter(self.maps)))
+        return entry
+
+    def _close(self, path: str) -> None:
+        file, mapped = self.maps.pop(path)
+        if mapped is not None:
+            mapped.close()
+        file.close()
+
+    def _evict(self, keep: str) -> None:
+        with self.lock:
+            files = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name.endswith(".pdf"):
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                if path in self.maps:
+                    self._close(path)
+                os.remove(path)
+                total -= size
+                self.stats["evictions"] += 1
+
+    def close(self) -> None:
+        with self.lock:
+            for path in list(self.maps):
+                self._close(path)
@@ -0,0 +1,146 @@
+from collections import Counter
+from typing import Dict, List, Optional, Set
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Where @profile (mcp_chatbot.py) and profile_server (research_server.py) write their files
+PROFILE_DIR = os.environ.get("MCP_PROFILE_DIR", "profiles")
+
+# Innermost Python frames of a thread that is blocked, not running: the event
+# loop waiting for I/O, a lock or condition wait, an idle worker thread
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Sample the Python stacks of running threads every `interval` seconds.
+
+    Stacks are counted in collapsed form (root;...;leaf), the input format of
+    flamegraph.pl and speedscope. Only the threads in `thread_ids` are
+    sampled, or every thread but the sampler's own when it is None.
+    """
+    def __init__(self, interval: float = 0.005, thread_ids: Optional[Set[int]] = None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks: Counter = Counter()
+        self.busy: Counter = Counter()  # innermost frame of samples of running threads
+        self.samples = 0
+        self.idle_samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                leaf = frame.f_code
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                    self.idle_samples += 1
+                else:
+                    self.busy[stack[0]] += 1
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class Profile:
+    """
+    A stack sampler and tracemalloc running between start() and stop().
+
+    write() saves the collapsed stacks and a report of the largest allocations
+    made while profiling that are still alive at stop().
+    """
+    def __init__(self, thread_ids: Optional[Set[int]] = None, interval: float = 0.005, top: int = 25):
+        self.sampler = StackSampler(interval, thread_ids)
+        self.top = top
+        self.started_tracemalloc = False
+        self.snapshot = None
+        self.wall = self.cpu = 0.0
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self.sampler.start()
+
+    def stop(self) -> None:
+        self.sampler.stop()
+        self.wall = time.perf_counter() - self._wall
+        self.cpu = time.process_time() - self._cpu
+        self.snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def allocation_lines(self) -> List[str]:
+        stats = self.snapshot.statistics("lineno")
+        total = sum(stat.size for stat in stats)
+        lines = [f"{total / 2**20:.1f} MiB in {sum(stat.count for stat in stats)} blocks allocated while profiling and still alive"]
+        for stat in stats[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 2**10:10.1f} KiB {stat.count:8} blocks  {frame.filename}:{frame.lineno}")
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+            if source:
+                lines.append(f"{'':30}{source}")
+        return lines
+
+    def write(self, name: str, directory: str = PROFILE_DIR) -> Dict[str, str]:
+        """Write <name>-<time>.collapsed and <name>-<time>.alloc.txt, returns their paths."""
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.abspath(os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"))
+        self.sampler.write_collapsed(prefix + ".collapsed")
+        with open(prefix + ".alloc.txt", "w", encoding="utf-8") as file:
+            file.write("\n".join(self.allocation_lines()) + "\n")
+        return {"collapsed_stacks": prefix + ".collapsed", "allocations": prefix + ".alloc.txt"}
+
+    def summary(self) -> Dict:
+        sampler = self.sampler
+        return {
+            "wall_seconds": round(self.wall, 3),
+            "cpu_seconds": round(self.cpu, 3),
+            "samples": sampler.samples,
+            "busy_share": round(1 - sampler.idle_samples / sampler.samples, 3) if sampler.samples else None,
+            "top_functions": [
+                {"function": function, "samples": count} for function, count in sampler.busy.most_common(10)
+            ]
+        }
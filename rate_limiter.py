@@ -0,0 +1,110 @@
+from collections import deque
+from typing import Dict, Optional
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# Priority classes, lower goes first
+PRIORITY_INTERACTIVE = 0  # tool calls someone is waiting for
+PRIORITY_BACKGROUND = 1  # syncs and other batch work
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with jitter: base * 2**attempt, randomized by +-50%, at most `cap`."""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds of a Retry-After header given in seconds, None if absent or an HTTP date."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class PriorityRateLimiter:
+    """
+    Token bucket shared by every thread that talks to one upstream service.
+
+    Tokens refill at `rate` per second up to `burst`. Callers wait in priority
+    order (FIFO within a priority), so interactive requests overtake queued
+    background ones. After a throttling response, pause() holds back every
+    caller until the pause is over.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = []  # heap of (priority, arrival)
+        self.arrivals = itertools.count()
+        self.condition = threading.Condition()
+        self.waits = deque(maxlen=1000)  # recent (priority, wait time in seconds)
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "failures": 0}
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Block until the caller may send a request. Returns the time waited in seconds."""
+        started = time.monotonic()
+        with self.condition:
+            entry = (priority, next(self.arrivals))
+            heapq.heappush(self.waiting, entry)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.waiting[0] != entry:
+                    # Not our turn; woken when the caller ahead of us is done
+                    self.condition.wait()
+                    continue
+                if now >= self.paused_until and self.tokens >= 1:
+                    break
+                self.condition.wait(max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.001))
+            heapq.heappop(self.waiting)
+            self.tokens -= 1
+            self.stats["requests"] += 1
+            waited = time.monotonic() - started
+            self.waits.append((priority, waited))
+            self.condition.notify_all()
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for `seconds`, e.g. after a 429/503 from the service."""
+        with self.condition:
+            self.stats["throttled"] += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.condition.notify_all()
+
+    def snapshot(self) -> Dict:
+        """Queue depth per priority class, wait times and request counts."""
+        with self.condition:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self.waiting:
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                depth[name] = depth.get(name, 0) + 1
+            waits = list(self.waits)
+            paused = max(0.0, self.paused_until - time.monotonic())
+            stats = dict(self.stats)
+        wait_ms = {}
+        for priority, name in PRIORITY_NAMES.items():
+            times = sorted(waited for p, waited in waits if p == priority)
+            if times:
+                wait_ms[name] = {
+                    "p50": round(times[len(times) // 2] * 1000, 1),
+                    "p95": round(times[min(len(times) - 1, int(0.95 * len(times)))] * 1000, 1),
+                    "max": round(times[-1] * 1000, 1)
+                }
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "queue_depth": depth,
+            "paused_seconds": round(paused, 3),
+            "wait_ms": wait_ms,
+            **stats
+        }
@@ -1,19 +1,199 @@
-import arxiv
+import argparse
+import asyncio
+import functools
 import json
 import os
-from typing import List
-from mcp.server.fastmcp import FastMCP
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List
+from mcp.server.fastmcp import Context, FastMCP
+from pydantic import AnyUrl
+from background_jobs import JobRegistry, SearchJob
+from datetime import date, timedelta
+from paper_records import PaperCatalog, ordinal_to_date, paper_text
+from paper_store import PaperStore, canonical_id
+from pdf_cache import CHUNK_SIZE, PdfCache
+from profiling import Profile
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PriorityRateLimiter
+from single_flight import SingleFlight
 
+if TYPE_CHECKING:
+    # Only for annotations, both are imported on first use
+    import arxiv
+    from paper_vectors import PaperVectors
 
 PAPER_DIR = "papers"
+ARXIV_API_URL = os.environ.get("ARXIV_API_URL", "https://export.arxiv.org/api/query")
+SYNC_PAGE_SIZE = 25
+# Searches for more results than one page run as background jobs
+SEARCH_PAGE_SIZE = 100
+# arXiv asks for no more than one request every three seconds
+ARXIV_RATE = float(os.environ.get("ARXIV_RATE", str(1 / 3)))
+ARXIV_BURST = int(os.environ.get("ARXIV_BURST", "1"))
+VECTOR_DIR = os.path.join(PAPER_DIR, ".vectors")
+# Papers stored since the vectors were last synced are embedded by the request that finds
+# them when there are at most this many, in the background when there are more
+VECTOR_SYNC_INLINE = int(os.environ.get("VECTOR_SYNC_INLINE", "1000"))
+VECTOR_SYNC_BATCH = 1000
+PDF_DIR = os.path.join(PAPER_DIR, ".pdfs")
+PDF_CACHE_BYTES = int(os.environ.get("PDF_CACHE_BYTES", str(2**30)))
 
 # Initialize FastMCP server
 mcp = FastMCP("research")
 
+# Worker pool for blocking file and database I/O, so that in network mode
+# one slow request doesn't stall the event loop serving the other clients.
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("RESEARCH_WORKERS", "8")),
+    thread_name_prefix="research-worker"
+)
+# Each paper is stored once in SQLite, topics hold references to papers
+store = PaperStore(PAPER_DIR)
+
+# Compact in-memory copy of every stored paper, read by all tools and resources
+catalog = PaperCatalog(store)
+
+def get_catalog() -> PaperCatalog:
+    """Return the paper catalog, updated with whatever was stored since the last call."""
+    catalog.refresh()
+    return catalog
+
+# Memory-mapped embeddings for similar_papers, created on first use
+vectors = None
+vectors_lock = threading.Lock()
+# Held by the one sync_vectors() running
+vectors_sync_lock = threading.Lock()
+
+def get_vectors() -> "PaperVectors":
+    """
+    Return the paper vectors, synced with the paper store: papers written since the last
+    sync, by this process or another one (bulk_ingest.py, compact), are embedded first,
+    or in the background when there are more than VECTOR_SYNC_INLINE of them.
+    """
+    global vectors
+    if vectors is None:
+        from paper_vectors import PaperVectors
+        with vectors_lock:
+            if vectors is None:
+                vectors = PaperVectors(VECTOR_DIR)
+    # A sync that is running already picks up whatever was written before it finishes
+    if not vectors_sync_lock.locked():
+        behind = store.changed_papers(vectors.seq)
+        if behind > VECTOR_SYNC_INLINE:
+            executor.submit(sync_vectors)
+        elif behind:
+            sync_vectors()
+    return vectors
+
+def sync_vectors() -> None:
+    """Embed the papers written to the store since the vectors were last synced, in batches."""
+    with vectors_sync_lock:
+        while True:
+            changes = store.changes_since(vectors.seq)
+            if changes.seq == vectors.seq:
+                return
+            batch = []
+            for row in changes.papers:
+                batch.append((row["paper_id"], paper_text(row["title"], row["summary"])))
+                if len(batch) == VECTOR_SYNC_BATCH:
+                    vectors.upsert(batch)
+                    batch = []
+            vectors.upsert(batch)
+            vectors.mark_synced(changes.seq)
+
+# Identical arXiv fetches running at the same time are done once
+arxiv_flights = SingleFlight()
+
+# Every request to arXiv waits for a token here, interactive calls first
+arxiv_limiter = PriorityRateLimiter(ARXIV_RATE, ARXIV_BURST)
+
+# Calls to arXiv wait for the limiter in threads of their own, one pool per priority
+# class: queued arXiv requests never hold the workers local tools run on, and
+# background syncs never hold the threads interactive calls reach the limiter from.
+ARXIV_WORKERS = int(os.environ.get("ARXIV_WORKERS", "4"))
+arxiv_executors = {
+    PRIORITY_INTERACTIVE: ThreadPoolExecutor(max_workers=ARXIV_WORKERS, thread_name_prefix="arxiv-interactive"),
+    PRIORITY_BACKGROUND: ThreadPoolExecutor(max_workers=max(1, ARXIV_WORKERS // 2), thread_name_prefix="arxiv-background")
+}
+# Topics of one search_many call fetched at the same time
+SEARCH_MANY_CONCURRENCY = max(1, ARXIV_WORKERS // 2)
+
+# PDFs served by the papers://{paper_id}/pdf resources, downloaded once and read through memory maps
+pdfs = PdfCache(PDF_DIR, PDF_CACHE_BYTES, acquire=lambda: arxiv_limiter.acquire(PRIORITY_INTERACTIVE))
+
+# Large searches running (or recently run) in the background
+jobs = JobRegistry()
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function in the worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+async def run_arxiv(priority: int, func, *args, **kwargs):
+    """Run a blocking function that calls arXiv in the arXiv pool of its priority class."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(arxiv_executors[priority], functools.partial(func, *args, **kwargs))
+
+# Resource subscriptions: uri -> sessions to notify when the resource changes.
+# Topic uris are matched after the same normalization the topic folders use.
+subscriptions = {}
+
+def resource_key(uri: str) -> str:
+    return uri.lower().replace(" ", "_")
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    subscriptions.setdefault(str(uri), set()).add(session)
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    session = mcp._mcp_server.request_context.session
+    subscriptions.get(str(uri), set()).discard(session)
+
+# FastMCP doesn't advertise subscriptions even when the handlers are registered
+_get_capabilities = mcp._mcp_server.get_capabilities
+
+def get_capabilities(*args, **kwargs):
+    capabilities = _get_capabilities(*args, **kwargs)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+mcp._mcp_server.get_capabilities = get_capabilities
+
+async def notify_resources_updated(topic_dirs=None, uris=()) -> None:
+    """
+    Send resources/updated for papers://folders and the given topics to their subscribers.
+    
+    Args:
+        topic_dirs: Topic folder names whose papers changed, or None if any topic may have changed
+        uris: Other resources that changed, e.g. papers://jobs/{job_id}
+    """
+    keys = None if topic_dirs is None else {
+        resource_key(uri) for topic_dir in topic_dirs for uri in (f"papers://{topic_dir}", f"papers://{topic_dir}/stats")
+    }
+    if keys:
+        keys.add("papers://folders")
+    for uri, sessions in list(subscriptions.items()):
+        if uri not in uris and keys is not None and resource_key(uri) not in keys:
+            continue
+        for session in list(sessions):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception:
+                # The client is gone
+                sessions.discard(session)
+        if not sessions:
+            subscriptions.pop(uri, None)
+
 @mcp.tool()
-def search_papers(topic: str, max_results: int = 5) -> List[str]:
+async def search_papers(topic: str, max_results: int = 5, ctx: Context = None) -> List[str]:
     """
     Search for papers on arXiv based on a topic and store their information.
+    Searches for more than 100 results continue in the background: the IDs of the first
+    page are returned, followed by "job:<job_id>". Use job_status(job_id) to get the rest,
+    or cancel_job(job_id) to stop the search.
     
     Args:
         topic: The topic to search for
@@ -22,9 +202,37 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
     Returns:
         List of paper IDs found in the search
     """
+    if max_results > SEARCH_PAGE_SIZE:
+        return await start_search_job(topic, max_results, ctx)
+    
+    topic_dir = topic.lower().replace(" ", "_")
+    
+    async def search_and_store():
+        paper_ids = await run_arxiv(PRIORITY_INTERACTIVE, _search_papers, topic, max_results)
+        await notify_resources_updated([topic_dir])
+        return paper_ids
+    
+    # Keyed by topic folder: "Machine Learning" and "machine learning" fill the same one
+    return await arxiv_flights.run(("search_papers", topic_dir, max_results), search_and_store)
+
+def _search_papers(topic: str, max_results: int) -> List[str]:
+    topic_dir = topic.lower().replace(" ", "_")
+    entries = _fetch_papers(topic, max_results)
+
+    # Store them all in one transaction
+    store_papers(topic_dir, entries)
+    
+    print(f"Results are saved in: {store.db_path} (topic: {topic_dir})")
+    
+    return [paper_id for paper_id, _ in entries]
+
+def _fetch_papers(topic: str, max_results: int) -> List[tuple]:
+    """The (paper ID, info) entries of the most relevant arXiv results for a topic."""
+    # Imported on first use, it isn't needed to start the server
+    import arxiv
     
     # Use arxiv to find the papers 
-    client = arxiv.Client()
+    client = arxiv_client()
 
     # Search for the most relevant articles matching the queried topic
     search = arxiv.Search(
@@ -33,44 +241,324 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
         sort_by = arxiv.SortCriterion.Relevance
     )
 
-    papers = client.results(search)
+    return [(paper.get_short_id(), paper_to_info(paper)) for paper in client.results(search)]
+
+@mcp.tool()
+async def search_many(topics: List[str], max_results_per_topic: int = 5) -> str:
+    """
+    Search arXiv for several topics at once and store the papers, like search_papers for each topic.
+    The searches run concurrently, so this is faster than one search_papers call per topic.
     
-    # Create directory for this topic
-    path = os.path.join(PAPER_DIR, topic.lower().replace(" ", "_"))
-    os.makedirs(path, exist_ok=True)
+    Args:
+        topics: The topics to search for
+        max_results_per_topic: Maximum number of results to retrieve per topic (default: 5, at most 100)
+        
+    Returns:
+        JSON with the paper IDs found for each topic, and the error of each topic whose search failed
+    """
+    max_results = max(1, min(max_results_per_topic, SEARCH_PAGE_SIZE))
+    # One search per topic folder, "Machine Learning" and "machine learning" are the same topic
+    queries = {}
+    for topic in topics:
+        queries.setdefault(topic.lower().replace(" ", "_"), topic)
+    
+    # Fewer fetches at a time than interactive arXiv threads, so one call can't take them all
+    semaphore = asyncio.Semaphore(SEARCH_MANY_CONCURRENCY)
+    
+    async def fetch(topic_dir, topic):
+        async with semaphore:
+            # Shared with identical fetches of other search_many calls
+            return await arxiv_flights.run(("fetch_papers", topic_dir, max_results), lambda: run_arxiv(PRIORITY_INTERACTIVE, _fetch_papers, topic, max_results))
+    
+    # All requests go through the shared rate limiter, their response times overlap
+    results = await asyncio.gather(*[fetch(topic_dir, topic) for topic_dir, topic in queries.items()], return_exceptions=True)
+    
+    fetched = {}
+    errors = {}
+    for topic_dir, result in zip(queries, results):
+        if isinstance(result, BaseException):
+            errors[topic_dir] = str(result) or type(result).__name__
+        else:
+            fetched[topic_dir] = result
     
-    file_path = os.path.join(path, "papers_info.json")
+    if any(fetched.values()):
+        await run_blocking(store_topic_papers, fetched)
+        await notify_resources_updated([topic_dir for topic_dir, entries in fetched.items() if entries])
+    
+    return json.dumps({
+        'papers': {topic_dir: [paper_id for paper_id, _ in entries] for topic_dir, entries in fetched.items()},
+        'errors': errors
+    }, indent=2)
 
-    # Try to load existing papers info
+async def start_search_job(topic: str, max_results: int, ctx: Context = None) -> List[str]:
+    """Start (or join) a background search and return once its first page is stored."""
+    job = jobs.running(topic, max_results)
+    if job is None:
+        job = jobs.add(SearchJob(topic, max_results))
+        loop = asyncio.get_running_loop()
+        
+        def page_stored():
+            # Called from the worker thread after every page
+            asyncio.run_coroutine_threadsafe(job_changed(job), loop)
+        
+        async def run():
+            try:
+                pages = _search_job_pages(job, page_stored)
+                # The caller waits for the first page, nobody waits for the others
+                await run_arxiv(PRIORITY_INTERACTIVE, next, pages, None)
+                await run_arxiv(PRIORITY_BACKGROUND, list, pages)
+            except Exception as e:
+                job.finish("failed", str(e))
+            await job_changed(job)
+        
+        job.task = asyncio.create_task(run())
+    
+    job.waiters += 1
     try:
-        with open(file_path, "r") as json_file:
-            papers_info = json.load(json_file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        papers_info = {}
-
-    # Process each paper and add to papers_info  
-    paper_ids = []
-    for paper in papers:
-        paper_ids.append(paper.get_short_id())
-        paper_info = {
-            'title': paper.title,
-            'authors': [author.name for author in paper.authors],
-            'summary': paper.summary,
-            'pdf_url': paper.pdf_url,
-            'published': str(paper.published.date())
-        }
-        papers_info[paper.get_short_id()] = paper_info
-    
-    # Save updated papers_info to json file
-    with open(file_path, "w") as json_file:
-        json.dump(papers_info, json_file, indent=2)
-    
-    print(f"Results are saved in: {file_path}")
-    
-    return paper_ids
+        version = -1
+        while not job.done and not job.paper_ids:
+            version = job.version
+            await job.wait(version, timeout=30)
+            await report_job_progress(ctx, job)
+    except asyncio.CancelledError:
+        # The last caller gave up before it learned the job id, so nobody can follow the job
+        if job.waiters == 1:
+            job.cancel_requested.set()
+        raise
+    finally:
+        job.waiters -= 1
+    if job.status == "failed":
+        raise RuntimeError(f"Search failed: {job.error}")
+    paper_ids = list(job.paper_ids)
+    return paper_ids + ([f"job:{job.job_id}"] if not job.done else [])
+
+async def job_changed(job: SearchJob) -> None:
+    await job.changed()
+    await notify_resources_updated([job.topic.lower().replace(" ", "_")], [job.uri])
+
+async def report_job_progress(ctx: Context, job: SearchJob) -> None:
+    """Send an MCP progress notification, if the caller asked for them."""
+    if ctx is not None:
+        try:
+            await ctx.report_progress(job.fetched, job.max_results, f"{job.fetched} results fetched, status: {job.status}")
+        except Exception:
+            pass
+
+def _search_job_pages(job: SearchJob, page_stored):
+    """Fetch a large search page by page, storing every page as soon as it arrives. Yields after every page."""
+    import arxiv
+    
+    topic_dir = job.topic.lower().replace(" ", "_")
+    client = arxiv_client(SEARCH_PAGE_SIZE)
+    search = arxiv.Search(query=job.topic, max_results=job.max_results, sort_by=arxiv.SortCriterion.Relevance)
+    entries = []
+    # The results generator requests the next page only when it is reached
+    for paper in client.results(search):
+        if job.cancel_requested.is_set():
+            break
+        entries.append((paper.get_short_id(), paper_to_info(paper)))
+        if len(entries) == SEARCH_PAGE_SIZE:
+            store_papers(topic_dir, entries)
+            job.paper_ids.extend(paper_id for paper_id, _ in entries)
+            job.fetched += len(entries)
+            entries = []
+            # Later pages are not awaited by anyone, let interactive calls go first
+            client.priority = PRIORITY_BACKGROUND
+            page_stored()
+            yield
+    if entries and not job.cancel_requested.is_set():
+        store_papers(topic_dir, entries)
+        job.paper_ids.extend(paper_id for paper_id, _ in entries)
+        job.fetched += len(entries)
+    job.finish("cancelled" if job.cancel_requested.is_set() else "completed")
+
+@mcp.tool()
+async def job_status(job_id: str, wait_seconds: float = 0, ctx: Context = None) -> str:
+    """
+    Get the status and the paper IDs found so far of a background search started by search_papers.
+    
+    Args:
+        job_id: The job ID returned by search_papers (the part after "job:")
+        wait_seconds: Wait up to this many seconds for the job to finish, with progress notifications (default: 0)
+        
+    Returns:
+        JSON with the job's status, number of results fetched and paper IDs
+    """
+    job = jobs.get(job_id.removeprefix("job:"))
+    if job is None:
+        return f"There's no job {job_id}."
+    deadline = asyncio.get_running_loop().time() + max(0.0, wait_seconds)
+    while not job.done:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0 or not await job.wait(job.version, remaining):
+            break
+        await report_job_progress(ctx, job)
+    return json.dumps(job.to_dict(), indent=2)
+
+@mcp.tool()
+async def cancel_job(job_id: str) -> str:
+    """
+    Stop a background search started by search_papers. Papers already stored are kept.
+    
+    Args:
+        job_id: The job ID returned by search_papers (the part after "job:")
+        
+    Returns:
+        JSON with the job's status
+    """
+    job = jobs.get(job_id.removeprefix("job:"))
+    if job is None:
+        return f"There's no job {job_id}."
+    if not job.done:
+        job.cancel_requested.set()
+        # The worker stops at its next result, give it a moment to report back
+        await job.wait(job.version, timeout=5)
+    return json.dumps(job.to_dict(), indent=2)
+
+def arxiv_client(page_size: int = 100, priority: int = PRIORITY_INTERACTIVE) -> "arxiv.Client":
+    """Rate-limited arXiv client pointed at ARXIV_API_URL (a local Atom stand-in can be used for testing)."""
+    from arxiv_fetch import ScheduledClient
+    client = ScheduledClient(arxiv_limiter, priority, page_size=page_size)
+    client.query_url_format = ARXIV_API_URL + "?{}"
+    return client
+
+def paper_to_info(paper: "arxiv.Result") -> dict:
+    """The stored form of an arXiv result."""
+    return {
+        'title': paper.title,
+        'authors': [author.name for author in paper.authors],
+        'summary': paper.summary,
+        'pdf_url': paper.pdf_url,
+        'published': str(paper.published.date())
+    }
+
+def store_papers(topic_dir: str, entries, watermark=None) -> List[str]:
+    """Store (paper ID, info) entries in a topic and index them. Returns the canonical IDs."""
+    stored_ids = store.save_papers(topic_dir, entries, watermark)
+    
+    # Embed the new or changed papers for similar_papers
+    get_vectors()
+    return stored_ids
+
+def store_topic_papers(entries_by_topic: dict) -> None:
+    """Store the (paper ID, info) entries of several topics in one transaction and index them."""
+    store.save_batch(
+        (topic_dir, paper_id, info, None)
+        for topic_dir, entries in entries_by_topic.items() for paper_id, info in entries
+    )
+    
+    get_vectors()
+
+@mcp.tool()
+async def sync_topic(topic: str, max_results: int = 100) -> str:
+    """
+    Fetch only the papers submitted to arXiv since the last sync of a topic and store them.
+    Results are read newest first and paging stops at the newest paper of the last complete sync.
+    
+    Args:
+        topic: The topic to sync (a topic folder name such as "algebra", or a new topic)
+        max_results: Maximum number of new papers to fetch (default: 100)
+        
+    Returns:
+        JSON with the new paper IDs, whether the sync caught up (false when max_results
+        stopped it, the next sync continues) and the topic's watermark
+    """
+    return json.dumps(await sync_and_notify(topic, max_results), indent=2)
+
+@mcp.tool()
+async def sync_all_topics(max_concurrency: int = 3, max_results: int = 100) -> str:
+    """
+    Sync every stored topic against arXiv, see sync_topic.
+    
+    Args:
+        max_concurrency: Maximum number of topics synced at the same time (default: 3)
+        max_results: Maximum number of new papers to fetch per topic (default: 100)
+        
+    Returns:
+        JSON list with the result of each topic's sync
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def sync_one(topic_dir):
+        async with semaphore:
+            try:
+                return await sync_and_notify(topic_dir, max_results, PRIORITY_BACKGROUND)
+            except Exception as e:
+                return {'topic': topic_dir, 'error': str(e)}
+    
+    topics = await run_blocking(lambda: get_catalog().topic_names())
+    return json.dumps(await asyncio.gather(*[sync_one(topic_dir) for topic_dir in topics]), indent=2)
+
+async def sync_and_notify(topic: str, max_results: int, priority: int = PRIORITY_INTERACTIVE) -> dict:
+    """Sync a topic, sharing the sync with identical ones already running."""
+    async def sync():
+        result = await run_arxiv(priority, _sync_topic, topic, max_results, priority)
+        if result['new_paper_ids']:
+            await notify_resources_updated([result['topic']])
+        return result
+    
+    return await arxiv_flights.run(("sync_topic", topic.lower().replace(" ", "_"), max_results), sync)
+
+def _sync_topic(topic: str, max_results: int, priority: int = PRIORITY_INTERACTIVE) -> dict:
+    """
+    Walk a topic's results newest first down to its watermark, storing the papers that
+    aren't stored yet. The watermark only moves when the walk reaches it: a sync stopped
+    by max_results keeps the old one, and the next sync fills the gap it left. A topic
+    synced for the first time is walked down to its first stored paper.
+    """
+    import arxiv
+    topic_dir = topic.lower().replace(" ", "_")
+    known = set(get_catalog().topics.get(topic_dir, {}))
+    watermark = store.get_watermark(topic_dir)
+    watermark_id = canonical_id(watermark[1])[0] if watermark else None
+    max_results = max(1, max_results)
+    
+    search = arxiv.Search(
+        query = topic_dir.replace("_", " "),
+        # Known papers above the watermark are skipped and don't count
+        max_results = max_results + len(known),
+        sort_by = arxiv.SortCriterion.SubmittedDate,
+        sort_order = arxiv.SortOrder.Descending
+    )
+    
+    entries = []
+    fetched = 0
+    newest = None
+    reached = False
+    # The results generator requests the next page only when it is reached
+    for paper in arxiv_client(min(SYNC_PAGE_SIZE, max_results), priority).results(search):
+        fetched += 1
+        paper_id = paper.get_short_id()
+        published = str(paper.published.date())
+        newest = newest or (published, paper_id)
+        canonical = canonical_id(paper_id)[0]
+        if (canonical == watermark_id or published < watermark[0]) if watermark else canonical in known:
+            reached = True
+            break
+        if canonical in known:
+            # Stored by a search, or by an earlier sync that stopped short of the watermark
+            continue
+        entries.append((paper_id, paper_to_info(paper)))
+        if len(entries) == max_results:
+            break
+    
+    caught_up = reached or len(entries) < max_results
+    if caught_up and newest and newest != watermark:
+        watermark = newest
+        store_papers(topic_dir, entries, watermark)
+    elif entries:
+        store_papers(topic_dir, entries)
+    
+    return {
+        'topic': topic_dir,
+        'new_paper_ids': [paper_id for paper_id, _ in entries],
+        'fetched': fetched,
+        'caught_up': caught_up,
+        'watermark': {'published': watermark[0], 'paper_id': watermark[1]} if watermark else None
+    }
 
 @mcp.tool()
-def extract_info(paper_id: str) -> str:
+async def extract_info(paper_id: str) -> str:
     """
     Extract detailed information about a specific paper that was previously found through search_papers.
     Use this tool to get detailed information (title, authors, summary, etc.) about papers that were returned by search_papers.
@@ -81,40 +569,239 @@ def extract_info(paper_id: str) -> str:
     Returns:
         JSON string with paper information if found, error message if not found
     """
- 
-    for item in os.listdir(PAPER_DIR):
-        item_path = os.path.join(PAPER_DIR, item)
-        if os.path.isdir(item_path):
-            file_path = os.path.join(item_path, "papers_info.json")
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "r") as json_file:
-                        papers_info = json.load(json_file)
-                        if paper_id in papers_info:
-                            return json.dumps(papers_info[paper_id], indent=2)
-                except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading {file_path}: {str(e)}")
-                    continue
+    return await run_blocking(_extract_info, paper_id)
+
+def _extract_info(paper_id: str) -> str:
+    catalog = get_catalog()
+    record = catalog.get(paper_id)
+    if record:
+        paper_info = catalog.to_dict(record)
+        near_duplicates = store.near_duplicates(record.paper_id)
+        if near_duplicates:
+            paper_info['near_duplicates'] = near_duplicates
+        return json.dumps(paper_info, indent=2)
     
     return f"There's no saved information related to paper {paper_id}."
 
+@mcp.tool()
+async def papers_by_author(name: str) -> str:
+    """
+    List the stored papers written by an author, without calling arXiv.
+    Author names are matched ignoring case, accents and punctuation.
+    
+    Args:
+        name: The author's name (e.g., "Keqin Liu")
+        
+    Returns:
+        JSON list of the author's papers (paper ID, title, published date)
+    """
+    return await run_blocking(_papers_by_author, name)
+
+def _papers_by_author(name: str) -> str:
+    records = get_catalog().papers_by_author(name)
+    if not records:
+        return f"There are no saved papers by {name}."
+    papers = [
+        {'paper_id': record.versioned_id, 'title': record.title, 'published': ordinal_to_date(record.published)}
+        for record in records
+    ]
+    return json.dumps(papers, indent=2)
+
+@mcp.tool()
+async def list_papers(topic: str = None, since: str = None, until: str = None, order: str = "desc",
+                      limit: int = 20, cursor: str = None) -> str:
+    """
+    List stored papers by publication date, optionally of one topic and within a date range, without calling arXiv.
+    
+    Args:
+        topic: Only list the papers of this topic (default: all stored papers)
+        since: Earliest publication date, as YYYY, YYYY-MM or YYYY-MM-DD (default: no limit)
+        until: Latest publication date, as YYYY, YYYY-MM or YYYY-MM-DD (default: no limit)
+        order: "desc" for newest first, "asc" for oldest first (default: "desc")
+        limit: Maximum number of papers to return (default: 20, at most 100)
+        cursor: The next_cursor of the previous page, to get the next one
+        
+    Returns:
+        JSON with the papers (paper ID, title, authors, published date), the number of papers
+        in the date range and the cursor of the next page (null on the last page)
+    """
+    return await run_blocking(_list_papers, topic, since, until, order, limit, cursor)
+
+def _list_papers(topic: str, since: str, until: str, order: str, limit: int, cursor: str) -> str:
+    topic_dir = topic.lower().replace(" ", "_") if topic else None
+    catalog = get_catalog()
+    if topic_dir is not None and topic_dir not in catalog.topics:
+        return f"There are no saved papers on {topic}."
+    if order not in ("desc", "asc"):
+        return 'order must be "desc" or "asc".'
+    limit = max(1, min(limit, 100))
+    try:
+        since_ordinal = date_bound(since) if since else 0
+        until_ordinal = date_bound(until, end=True) if until else None
+        after = None
+        if cursor:
+            ordinal, paper_id = cursor.split(":", 1)
+            after = (int(ordinal), paper_id)
+        # One more than asked for tells whether there is a next page
+        records, total = catalog.list_by_date(topic_dir, since_ordinal, until_ordinal, order == "desc", after, limit + 1)
+    except ValueError as e:
+        return f"Invalid date or cursor ({e}). Dates must be given as YYYY, YYYY-MM or YYYY-MM-DD, and cursor must be a next_cursor returned before."
+    page = records[:limit]
+    return json.dumps({
+        'topic': topic_dir,
+        'total': total,
+        'papers': [
+            {
+                'paper_id': record.versioned_id,
+                'title': record.title,
+                'authors': catalog.author_names(record),
+                'published': ordinal_to_date(record.published)
+            }
+            for record in page
+        ],
+        'next_cursor': f"{page[-1].published}:{page[-1].paper_id}" if len(records) > limit else None
+    }, indent=2)
+
+def date_bound(value: str, end: bool = False) -> int:
+    """Date ordinal of YYYY, YYYY-MM or YYYY-MM-DD; with end=True the last day of a year or month."""
+    parts = [int(part) for part in value.strip().split("-")]
+    if len(parts) == 1:
+        bound = date(parts[0], 12, 31) if end else date(parts[0], 1, 1)
+    elif len(parts) == 2:
+        year, month = parts
+        # The end-of-month arithmetic below would roll month 0 or 13 over into another year
+        if not 1 <= month <= 12:
+            raise ValueError(f"month must be in 1..12 in {value}")
+        bound = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1) if end else date(year, month, 1)
+    elif len(parts) == 3:
+        bound = date(*parts)
+    else:
+        raise ValueError(value)
+    return bound.toordinal()
+
+@mcp.tool()
+async def coauthors(name: str, depth: int = 1, limit: int = 50) -> str:
+    """
+    Find who collaborates with an author in the stored papers, without calling arXiv.
+    
+    Args:
+        name: The author's name
+        depth: How many co-authorship hops to follow (default: 1, direct co-authors only)
+        limit: Maximum number of authors to return (default: 50)
+        
+    Returns:
+        JSON list of authors with their distance and number of papers shared with the author
+    """
+    return await run_blocking(_coauthors, name, depth, limit)
+
+def _coauthors(name: str, depth: int, limit: int) -> str:
+    result = get_catalog().coauthors(name, max(1, depth))
+    if not result:
+        return f"There are no saved co-authors of {name}."
+    return json.dumps(result[:limit], indent=2)
+
+@mcp.tool()
+async def similar_papers(paper_id: str = None, text: str = None, k: int = 5) -> str:
+    """
+    Find stored papers similar to a stored paper or to a piece of text, without calling arXiv.
+    Use this to discover related work that doesn't share the exact keywords.
+    
+    Args:
+        paper_id: The ID of a stored paper to find neighbours of (e.g., "1104.3954v1")
+        text: Free text to match against titles and summaries, used when paper_id is not given
+        k: Number of papers to return (default: 5)
+        
+    Returns:
+        JSON list of similar papers (paper ID, title, similarity score)
+    """
+    return await run_blocking(_similar_papers, paper_id, text, k)
+
+def _similar_papers(paper_id: str, text: str, k: int) -> str:
+    from paper_vectors import embed
+    paper_vectors = get_vectors()
+    exclude = None
+    if paper_id:
+        exclude = canonical_id(paper_id)[0]
+        query = paper_vectors.vector(exclude)
+        if query is None:
+            return f"There's no saved information related to paper {paper_id}."
+    elif text:
+        query = embed(text)
+    else:
+        return "Either paper_id or text is required."
+    
+    catalog = get_catalog()
+    result = []
+    for match_id, score in paper_vectors.top_k(query, k, exclude=exclude):
+        record = catalog.get(match_id)
+        if record:
+            result.append({'paper_id': record.versioned_id, 'title': record.title, 'score': round(score, 4)})
+    return json.dumps(result, indent=2)
+
+@mcp.tool()
+async def compact_papers(remove_legacy_files: bool = True) -> str:
+    """
+    Maintenance: fold the legacy papers/<topic>/papers_info.json files into the paper database.
+    Copies of the same paper (including other arXiv versions) are stored once, topics keep references.
+    
+    Args:
+        remove_legacy_files: Delete the imported papers_info.json files afterwards (default: True)
+        
+    Returns:
+        JSON report with paper counts, near-duplicates found and bytes reclaimed
+    """
+    report = await run_blocking(_compact_papers, remove_legacy_files)
+    await notify_resources_updated()
+    return report
+
+def _compact_papers(remove_legacy_files: bool) -> str:
+    report = store.compact(remove_legacy_files)
+    get_catalog()
+    return json.dumps(report, indent=2)
+
+# Profile of the whole server process, see profile_server
+server_profile = None
+
+@mcp.tool()
+async def profile_server(enable: bool) -> str:
+    """
+    Maintenance: start or stop profiling the research server (stack sampling of all its threads and tracemalloc).
+    Stopping writes a flamegraph-compatible collapsed-stack file and a report of the largest allocations.
+    
+    Args:
+        enable: True to start profiling, False to stop and write the profile
+        
+    Returns:
+        JSON with the profiling status; when stopping, CPU time, busy share, top functions and the file paths
+    """
+    global server_profile
+    if enable:
+        if server_profile is None:
+            server_profile = Profile()
+            server_profile.start()
+        return json.dumps({'status': 'profiling'}, indent=2)
+    if server_profile is None:
+        return json.dumps({'status': 'not profiling'}, indent=2)
+    profile, server_profile = server_profile, None
+    
+    def stop():
+        profile.stop()
+        return {'status': 'stopped', **profile.summary(), **profile.write("server")}
+    
+    return json.dumps(await run_blocking(stop), indent=2)
+
 @mcp.resource("papers://folders")
-def get_available_folders() -> str:
+async def get_available_folders() -> str:
     """
     List all available topic folders in the papers directory.
     
     This resource provides a simple list of all available topic folders.
     """
-    folders = []
-    
+    return await run_blocking(_get_available_folders)
+
+def _get_available_folders() -> str:
     # Get all topic directories
-    if os.path.exists(PAPER_DIR):
-        for topic_dir in os.listdir(PAPER_DIR):
-            topic_path = os.path.join(PAPER_DIR, topic_dir)
-            if os.path.isdir(topic_path):
-                papers_file = os.path.join(topic_path, "papers_info.json")
-                if os.path.exists(papers_file):
-                    folders.append(topic_dir)
+    folders = get_catalog().topic_names()
     
     # Create a simple markdown list
     content = "# Available Topics\n\n"
@@ -128,39 +815,156 @@ def get_available_folders() -> str:
     return content
 
 @mcp.resource("papers://{topic}")
-def get_topic_papers(topic: str) -> str:
+async def get_topic_papers(topic: str) -> str:
     """
     Get detailed information about papers on a specific topic.
     
     Args:
         topic: The research topic to retrieve papers for
     """
+    return await run_blocking(_get_topic_papers, topic)
+
+def _get_topic_papers(topic: str) -> str:
     topic_dir = topic.lower().replace(" ", "_")
-    papers_file = os.path.join(PAPER_DIR, topic_dir, "papers_info.json")
+    catalog = get_catalog()
     
-    if not os.path.exists(papers_file):
+    if topic_dir in catalog.corrupted_topics:
+        return f"# Error reading papers data for {topic}\n\nThe papers data file is corrupted."
+    if topic_dir not in catalog.topics:
         return f"# No papers found for topic: {topic}\n\nTry searching for papers on this topic first."
     
+    records = catalog.topic_records(topic_dir)
+    
+    # Create markdown content with paper details
+    content = f"# Papers on {topic.replace('_', ' ').title()}\n\n"
+    content += f"Total papers: {len(records)}\n\n"
+    
+    for record in records:
+        paper_info = catalog.to_dict(record)
+        content += f"## {paper_info['title']}\n"
+        content += f"- **Paper ID**: {record.versioned_id}\n"
+        content += f"- **Authors**: {', '.join(paper_info['authors'])}\n"
+        content += f"- **Published**: {paper_info['published']}\n"
+        content += f"- **PDF URL**: [{paper_info['pdf_url']}]({paper_info['pdf_url']})\n\n"
+        content += f"### Summary\n{paper_info['summary'][:500]}...\n\n"
+        content += "---\n\n"
+    
+    return content
+
+@mcp.resource("papers://{topic}/stats")
+async def get_topic_stats(topic: str) -> str:
+    """
+    Statistics of the papers on a topic: papers per publication year, the most prolific authors
+    and the distribution of summary lengths. Kept up to date as papers are stored.
+    
+    Args:
+        topic: The research topic to get statistics for
+    """
+    return await run_blocking(_get_topic_stats, topic)
+
+def _get_topic_stats(topic: str) -> str:
+    topic_dir = topic.lower().replace(" ", "_")
+    stats = get_catalog().topic_stats_json(topic_dir)
+    if stats is None:
+        return json.dumps({'topic': topic_dir, 'error': "No papers found, try searching for papers on this topic first."})
+    return stats
+
+@mcp.resource("papers://{paper_id}/pdf", mime_type="application/json")
+async def get_paper_pdf(paper_id: str) -> str:
+    """
+    Size and chunk layout of the PDF of a stored paper, downloading it into the local cache on first use.
+    The PDF itself is read in chunks from papers://{paper_id}/pdf/{offset} or
+    papers://{paper_id}/pdf/{offset}/{length}. Old-style ids use _ for /, e.g. math_0501518v2.
+    
+    Args:
+        paper_id: The ID of the paper
+    """
     try:
-        with open(papers_file, 'r') as f:
-            papers_data = json.load(f)
-        
-        # Create markdown content with paper details
-        content = f"# Papers on {topic.replace('_', ' ').title()}\n\n"
-        content += f"Total papers: {len(papers_data)}\n\n"
-        
-        for paper_id, paper_info in papers_data.items():
-            content += f"## {paper_info['title']}\n"
-            content += f"- **Paper ID**: {paper_id}\n"
-            content += f"- **Authors**: {', '.join(paper_info['authors'])}\n"
-            content += f"- **Published**: {paper_info['published']}\n"
-            content += f"- **PDF URL**: [{paper_info['pdf_url']}]({paper_info['pdf_url']})\n\n"
-            content += f"### Summary\n{paper_info['summary'][:500]}...\n\n"
-            content += "---\n\n"
-        
-        return content
-    except json.JSONDecodeError:
-        return f"# Error reading papers data for {topic}\n\nThe papers data file is corrupted."
+        paper_id, path = await cached_pdf(paper_id)
+    except (ValueError, OSError) as e:
+        return json.dumps({'paper_id': paper_id, 'error': str(e)})
+    size = pdfs.size(path)
+    chunk_uri = f"papers://{paper_id.replace('/', '_')}/pdf/{{offset}}"
+    return json.dumps({
+        'paper_id': paper_id,
+        'size': size,
+        'chunk_size': CHUNK_SIZE,
+        'chunks': [chunk_uri.format(offset=offset) for offset in range(0, size, CHUNK_SIZE)]
+    }, indent=2)
+
+@mcp.resource("papers://{paper_id}/pdf/{offset}", mime_type="application/pdf")
+async def get_paper_pdf_chunk(paper_id: str, offset: str) -> bytes:
+    """
+    The chunk of a paper's PDF that starts at a byte offset, at most chunk_size bytes.
+    
+    Args:
+        paper_id: The ID of the paper
+        offset: Byte offset of the chunk
+    """
+    return await read_pdf(paper_id, offset, CHUNK_SIZE)
+
+@mcp.resource("papers://{paper_id}/pdf/{offset}/{length}", mime_type="application/pdf")
+async def get_paper_pdf_range(paper_id: str, offset: str, length: str) -> bytes:
+    """
+    A byte range of a paper's PDF, at most chunk_size bytes.
+    
+    Args:
+        paper_id: The ID of the paper
+        offset: Byte offset of the range
+        length: Number of bytes to read
+    """
+    return await read_pdf(paper_id, offset, min(int(length), CHUNK_SIZE))
+
+async def read_pdf(paper_id: str, offset, length: int) -> bytes:
+    _, path = await cached_pdf(paper_id)
+    return await run_blocking(pdfs.read, path, int(offset), length)
+
+async def cached_pdf(paper_id: str) -> tuple:
+    """The versioned id of a stored paper and the path of its cached PDF, downloaded by one caller at a time."""
+    def lookup():
+        record = get_catalog().get(pdf_paper_id(paper_id))
+        return record, record and pdfs.cached(record.versioned_id)
+    record, path = await run_blocking(lookup)
+    if record is None:
+        raise ValueError(f"No stored paper {paper_id}, search for it first")
+    if path is None:
+        # Only downloads wait for the arXiv pool and its rate limiter, cached PDFs are read locally
+        url = catalog.to_dict(record)['pdf_url']
+        path = await arxiv_flights.run(("pdf", record.versioned_id), lambda: run_arxiv(PRIORITY_INTERACTIVE, pdfs.fetch, record.versioned_id, url))
+    return record.versioned_id, path
+
+def pdf_paper_id(paper_id: str) -> str:
+    """Old-style arXiv ids (archive/number) are written with _ in resource uris, whose parameters can't hold /."""
+    return paper_id.replace("_", "/", 1) if "_" in paper_id else paper_id
+
+@mcp.resource("papers://jobs/{job_id}")
+async def get_job(job_id: str) -> str:
+    """
+    Status and paper IDs found so far of a background search.
+    
+    Args:
+        job_id: The job ID returned by search_papers
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return f"# No job {job_id}\n"
+    return json.dumps(job.to_dict(), indent=2)
+
+@mcp.resource("research://metrics")
+async def get_metrics() -> str:
+    """
+    Operational metrics of the research server, as JSON.
+    
+    arxiv_flights counts the arXiv fetches started and the identical concurrent calls that shared one,
+    arxiv_rate_limiter has the request queue depth per priority class, wait times and throttling,
+    pdf_cache the PDF downloads, cached files opened and evictions.
+    """
+    return json.dumps({
+        'arxiv_flights': arxiv_flights.stats,
+        'arxiv_rate_limiter': arxiv_limiter.snapshot(),
+        'pdf_cache': pdfs.stats,
+        'jobs': jobs.counts()
+    }, indent=2)
 
 @mcp.prompt()
 def generate_search_prompt(topic: str, num_papers: int = 5) -> str:
@@ -186,6 +990,19 @@ def generate_search_prompt(topic: str, num_papers: int = 5) -> str:
     
     Please present both detailed information about each paper and a high-level synthesis of the research landscape in {topic}."""
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Research MCP server")
+    parser.add_argument("--transport", choices=["stdio", "streamable-http"], default="stdio",
+                        help="stdio (spawned by one client) or streamable-http (shared by many clients)")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind in streamable-http mode")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind in streamable-http mode")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
     # Initialize and run the server
-    mcp.run(transport='stdio')
\ No newline at end of file
+    if args.transport == "streamable-http":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        print(f"Research server listening on http://{args.host}:{args.port}{mcp.settings.streamable_http_path}")
+    mcp.run(transport=args.transport)
\ No newline at end of file
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import re
+import time
+
+TEMPLATE_VARIABLE = re.compile(r"\{([^{}]+)\}")
+
+
+def uri_segments(uri: str) -> List[str]:
+    """"papers://ai/stats" -> ["papers:", "ai", "stats"]: the scheme, then the path segments."""
+    scheme, separator, rest = uri.partition("://")
+    if not separator:
+        return uri.split("/")
+    return [scheme + ":"] + rest.split("/")
+
+
+class _TrieNode:
+    __slots__ = ("literals", "patterns", "value", "template")
+
+    def __init__(self):
+        self.literals: Dict[str, "_TrieNode"] = {}
+        self.patterns: List[Tuple[str, re.Pattern, List[str], "_TrieNode"]] = []  # (segment, regex, names, node)
+        self.value = None
+        self.template = None
+
+
+class UriTemplateTrie:
+    """
+    Route resource URIs to values (e.g. sessions) by exact URI or URI template.
+
+    Templates are stored segment by segment, so a lookup costs one step per
+    segment of the URI however many resources are registered. Literal segments
+    win over template variables: with "papers://folders" and "papers://{topic}"
+    both registered, "papers://folders" matches the first one.
+    """
+    def __init__(self):
+        self.root = _TrieNode()
+        self.size = 0
+
+    def insert(self, template: str, value) -> None:
+        node = self.root
+        for segment in uri_segments(template):
+            if TEMPLATE_VARIABLE.search(segment) is None:
+                node = node.literals.setdefault(segment, _TrieNode())
+                continue
+            for existing, _, _, child in node.patterns:
+                if existing == segment:
+                    node = child
+                    break
+            else:
+                names = TEMPLATE_VARIABLE.findall(segment)
+                regex = re.compile("".join(
+                    "([^/]+)" if i % 2 else re.escape(part)
+                    for i, part in enumerate(TEMPLATE_VARIABLE.split(segment))
+                ) + r"\Z")
+                child = _TrieNode()
+                node.patterns.append((segment, regex, names, child))
+                node = child
+        if node.template is None:
+            self.size += 1
+        node.value = value
+        node.template = template
+
+    def match(self, uri: str) -> Optional[Tuple[object, str, Dict[str, str]]]:
+        """(value, template, template variables) of the best match, or None."""
+        return self._match(self.root, uri_segments(uri), 0, {})
+
+    def _match(self, node: _TrieNode, segments: List[str], index: int, params: Dict[str, str]):
+        if index == len(segments):
+            return (node.value, node.template, params) if node.template is not None else None
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, params)
+            if found:
+                return found
+        for _, regex, names, child in node.patterns:
+            matched = regex.match(segment)
+            if matched:
+                found = self._match(child, segments, index + 1, {**params, **dict(zip(names, matched.groups()))})
+                if found:
+                    return found
+        return None
+
+    def __len__(self):
+        return self.size
+
+
+class ResourceCache:
+    """
+    Resource contents kept on the client, least recently used evicted first.
+
+    Entries expire after `ttl` seconds, except the ones stored with expires=False
+    (resources the server notifies us about, dropped by invalidate()). The total
+    size of the cached texts is capped at `max_bytes`.
+    """
+    def __init__(self, ttl: float = 300.0, max_bytes: int = 8 * 2**20):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # uri -> (text, session, expires or None, size)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, uri: str) -> Optional[str]:
+        entry = self.entries.get(uri)
+        if entry is not None and entry[2] is not None and entry[2] < time.monotonic():
+            self.invalidate(uri)
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(uri)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def put(self, uri: str, text: str, session=None, expires: bool = True) -> None:
+        """Cache a resource; with expires=False it is kept until invalidated or evicted."""
+        size = len(text.encode("utf-8"))
+        self.invalidate(uri)
+        if size > self.max_bytes:
+            return
+        self.entries[uri] = (text, session, time.monotonic() + self.ttl if expires else None, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self.invalidate(oldest)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, uri: str) -> None:
+        entry = self.entries.pop(uri, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+
+    def invalidate_session(self, session) -> None:
+        for uri, entry in list(self.entries.items()):
+            if entry[1] is session:
+                self.invalidate(uri)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,226 @@
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+# Keys of a server_config.json entry that are handled here and not by the transport
+SUPERVISOR_KEYS = {"warmStandby"}
+
+
+@asynccontextmanager
+async def open_transport(server_config: dict):
+    """Open the read/write streams for a server_config.json entry."""
+    if "url" in server_config:
+        # Long-lived server shared by many clients over streamable HTTP
+        async with streamablehttp_client(server_config["url"], headers=server_config.get("headers")) as (read, write, _):
+            yield read, write
+    else:
+        params = {k: v for k, v in server_config.items() if k not in SUPERVISOR_KEYS}
+        async with stdio_client(StdioServerParameters(**params)) as (read, write):
+            yield read, write
+
+
+class _SessionRunner:
+    """
+    Own one connected ClientSession inside a dedicated task.
+
+    The transport's context managers must be entered and exited by the same task,
+    so the session lives in its own task and is stopped by setting an event.
+    """
+    def __init__(self, server_config: dict, message_handler=None):
+        self.server_config = server_config
+        self.message_handler = message_handler
+        self.session = None
+        self.error = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self.session is None:
+            raise self.error or RuntimeError("Session failed to start")
+        return self
+
+    async def _run(self):
+        try:
+            async with open_transport(self.server_config) as (read, write):
+                async with ClientSession(read, write, message_handler=self.message_handler) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def close(self):
+        self._stop.set()
+        if self._task:
+            try:
+                await self._task
+            except Exception:
+                pass
+
+
+class SupervisedSession:
+    """
+    Stand-in for a ClientSession that restarts its server transparently.
+
+    Calls go to the current session; when one fails and the server no longer
+    answers a ping, the session is replaced (by the warm standby if one is kept,
+    otherwise by a fresh start) and the call is retried once.
+    """
+    def __init__(self, server_name: str, server_config: dict, message_handler=None, ping_timeout=10.0):
+        self.server_name = server_name
+        self.server_config = server_config
+        self.message_handler = message_handler
+        self.ping_timeout = ping_timeout
+        self.warm_standby = bool(server_config.get("warmStandby", False))
+        self.active = None
+        self.standby = None
+        self.restarts = 0
+        self.last_failover_ms = None
+        self.on_restart = None  # async callback(supervised_session) used to rebind tools/resources
+        self._restart_lock = asyncio.Lock()
+        self._standby_task = None
+
+    async def start(self):
+        self.active = await self._spawn()
+        if self.warm_standby:
+            self._refill_standby()
+
+    async def _spawn(self):
+        return await _SessionRunner(self.server_config, self.message_handler).start()
+
+    def _refill_standby(self):
+        async def refill():
+            try:
+                self.standby = await self._spawn()
+            except Exception as e:
+                print(f"Could not start warm standby for {self.server_name}: {e}")
+        self._standby_task = asyncio.create_task(refill())
+
+    async def is_alive(self, runner=None) -> bool:
+        runner = runner or self.active
+        if runner is None or runner.session is None:
+            return False
+        try:
+            await asyncio.wait_for(runner.session.send_ping(), self.ping_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def restart(self, failed=None):
+        """Replace the active session, unless another caller already did."""
+        async with self._restart_lock:
+            if failed is not None and self.active is not failed:
+                return
+            started = time.perf_counter()
+            old, self.active = self.active, None
+            if old:
+                asyncio.create_task(old.close())
+            standby, self.standby = self.standby, None
+            if standby and await self.is_alive(standby):
+                self.active = standby
+            else:
+                if standby:
+                    asyncio.create_task(standby.close())
+                self.active = await self._spawn()
+            self.restarts += 1
+            self.last_failover_ms = (time.perf_counter() - started) * 1000
+            print(f"Restarted server {self.server_name} in {self.last_failover_ms:.0f} ms")
+            if self.warm_standby:
+                self._refill_standby()
+        if self.on_restart:
+            await self.on_restart(self)
+
+    async def check(self):
+        """Health check used by the supervisor loop."""
+        runner = self.active
+        if not await self.is_alive(runner):
+            await self.restart(runner)
+        elif self.standby and not await self.is_alive(self.standby):
+            standby, self.standby = self.standby, None
+            asyncio.create_task(standby.close())
+            self._refill_standby()
+
+    async def _call(self, method, *args, **kwargs):
+        runner = self.active
+        if runner is None or runner.session is None:
+            await self.restart(runner)
+            runner = self.active
+        try:
+            return await getattr(runner.session, method)(*args, **kwargs)
+        except Exception:
+            # Only a dead server is restarted, other errors belong to the caller
+            if await self.is_alive(runner):
+                raise
+            await self.restart(runner)
+            return await getattr(self.active.session, method)(*args, **kwargs)
+
+    async def call_tool(self, name, arguments=None):
+        return await self._call("call_tool", name, arguments)
+
+    async def list_tools(self):
+        return await self._call("list_tools")
+
+    async def list_resources(self):
+        return await self._call("list_resources")
+
+    async def list_resource_templates(self):
+        return await self._call("list_resource_templates")
+
+    async def read_resource(self, uri):
+        return await self._call("read_resource", uri)
+
+    async def subscribe_resource(self, uri):
+        return await self._call("subscribe_resource", uri)
+
+    async def close(self):
+        if self._standby_task:
+            self._standby_task.cancel()
+        for runner in (self.active, self.standby):
+            if runner:
+                await runner.close()
+        self.active = self.standby = None
+
+
+class SessionSupervisor:
+    """Start SupervisedSessions and ping them periodically."""
+    def __init__(self, ping_interval=30.0, ping_timeout=10.0):
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.sessions = {}
+        self._monitor_task = None
+
+    async def start_session(self, server_name: str, server_config: dict, message_handler=None) -> SupervisedSession:
+        supervised = SupervisedSession(server_name, server_config, message_handler, self.ping_timeout)
+        await supervised.start()
+        self.sessions[server_name] = supervised
+        if self._monitor_task is None and self.ping_interval:
+            self._monitor_task = asyncio.create_task(self._monitor())
+        return supervised
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            for supervised in list(self.sessions.values()):
+                try:
+                    await supervised.check()
+                except Exception as e:
+                    print(f"Health check failed for server {supervised.server_name}: {e}")
+
+    async def close(self):
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        for supervised in self.sessions.values():
+            await supervised.close()
+        self.sessions.clear()
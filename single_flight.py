@@ -0,0 +1,33 @@
+from typing import Awaitable, Callable, Dict, Hashable
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls: while a call with a given key is running,
+    later callers with the same key wait for it and get the same result.
+
+    The shared call runs in its own task and is shielded, so a cancelled caller
+    only stops waiting; the call still completes for everyone else.
+    """
+    def __init__(self):
+        self.running: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable]):
+        task = self.running.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self.running[key] = task
+            task.add_done_callback(lambda _: self._finished(key, task))
+            self.stats["calls"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self.running.get(key) is task:
+            del self.running[key]
+        # Nobody may be waiting anymore; don't log "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
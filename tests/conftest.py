@@ -0,0 +1,97 @@
+import datetime
+import http.server
+import threading
+import urllib.parse
+from collections import deque
+
+import pytest
+
+
+def atom_entry(i: int) -> str:
+    paper_id = f"2401.{i:05d}v1"
+    day = (datetime.date(2024, 1, 1) + datetime.timedelta(days=i)).isoformat()
+    return f"""<entry><id>http://arxiv.org/abs/{paper_id}</id>
+<updated>{day}T00:00:00Z</updated><published>{day}T00:00:00Z</published>
+<title>Paper number {i}</title><summary>Summary of paper {i}, words w{i} x{i * 7} y{i * 13}.</summary>
+<author><name>Author {i % 7}</name></author>
+<link href="http://arxiv.org/abs/{paper_id}" rel="alternate" type="text/html"/>
+<link title="pdf" href="http://arxiv.org/pdf/{paper_id}" rel="related" type="application/pdf"/>
+<arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="math.RA" scheme="http://arxiv.org/schemas/atom"/>
+<category term="math.RA" scheme="http://arxiv.org/schemas/atom"/>
+</entry>"""
+
+
+class AtomStandIn:
+    """
+    Local stand-in for the arXiv API: an Atom feed of `papers` papers, newest first.
+
+    Statuses put in `statuses` are answered first, one per request (e.g. 503 to
+    throttle, with `retry_after` as the Retry-After header); `requests` counts them all.
+    """
+    def __init__(self, papers: int = 30):
+        self.papers = papers
+        self.statuses = deque()
+        self.retry_after = "0"
+        self.requests = 0
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests += 1
+                    status = stand_in.statuses.popleft() if stand_in.statuses else 200
+                if status != 200:
+                    self.send_response(status)
+                    self.send_header("Retry-After", stand_in.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                start = int(query.get("start", ["0"])[0])
+                size = int(query.get("max_results", ["10"])[0])
+                ids = list(range(stand_in.papers - 1, -1, -1))[start:start + size]
+                body = (
+                    '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom" '
+                    'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+                    f"<opensearch:totalResults>{stand_in.papers}</opensearch:totalResults>"
+                    f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+                    + "".join(atom_entry(i) for i in ids) + "</feed>"
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/atom+xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/query"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def atom_server():
+    stand_in = AtomStandIn()
+    yield stand_in
+    stand_in.close()
+
+
+@pytest.fixture
+def research_server(tmp_path_factory, monkeypatch):
+    """
+    The research server module, for calling its tools in-process. It opens its paper
+    store in the working directory when imported, and later creates other files
+    relative to it, so every test using it runs in the same directory of its own.
+    """
+    directory = tmp_path_factory.getbasetemp() / "research_server"
+    directory.mkdir(exist_ok=True)
+    monkeypatch.chdir(directory)
+    import research_server
+    return research_server
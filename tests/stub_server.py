@@ -0,0 +1,16 @@
+"""Minimal stdio MCP server for the tests: one tool reporting the server's process id."""
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("stub")
+
+
+@mcp.tool()
+def server_pid() -> int:
+    """Process id of this server."""
+    return os.getpid()
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from background_jobs import JobRegistry, SearchJob
+
+
+def test_the_registry_keeps_running_jobs_and_the_latest_finished_ones():
+    registry = JobRegistry(keep_finished=2)
+    finished = []
+    for i in range(4):
+        job = registry.add(SearchJob(f"topic {i}", 500))
+        job.finish("completed")
+        finished.append(job.job_id)
+    running = registry.add(SearchJob("running", 500))
+    assert list(registry.jobs) == finished[2:] + [running.job_id]
+    assert registry.get(finished[0]) is None and registry.get(running.job_id) is running
+    # Only running jobs with the same search are joined
+    assert registry.running("running", 500) is running
+    assert registry.running("running", 200) is None and registry.running("topic 3", 500) is None
+    assert registry.counts() == {"completed": 2, "running": 1}
+
+
+def test_waiters_wake_on_changes_and_time_out_otherwise():
+    job = SearchJob("waiting", 500)
+
+    async def scenario():
+        assert not await job.wait(job.version, timeout=0.01)
+        waiter = asyncio.create_task(job.wait(job.version, timeout=5))
+        await asyncio.sleep(0)
+        job.cancel_requested.set()
+        assert job.to_dict()["status"] == "cancelling"
+        job.finish("cancelled")
+        await job.changed()
+        return await waiter
+
+    assert asyncio.run(scenario())
+    assert job.done and job.to_dict()["status"] == "cancelled" and job.finished is not None
+
+
+@pytest.fixture
+def pages(research_server, monkeypatch):
+    """Replaces the arXiv search of jobs: each page is released by setting its event."""
+    releases = [threading.Event(), threading.Event()]
+
+    def search_job_pages(job, page_stored):
+        for page, release in enumerate(releases):
+            while not release.wait(0.01):
+                if job.cancel_requested.is_set():
+                    job.finish("cancelled")
+                    return
+            job.paper_ids.extend(f"2406.{page}{i:04d}" for i in range(research_server.SEARCH_PAGE_SIZE))
+            job.fetched += research_server.SEARCH_PAGE_SIZE
+            page_stored()
+            yield
+        job.finish("completed")
+
+    monkeypatch.setattr(research_server, "_search_job_pages", search_job_pages)
+    yield releases
+    for release in releases:
+        release.set()
+
+
+def test_a_job_runs_in_the_background_until_it_completes(research_server, pages):
+    async def scenario():
+        started = asyncio.create_task(research_server.search_papers("jobs lifecycle", 200))
+        await asyncio.sleep(0.05)
+        assert not started.done()
+        pages[0].set()
+        first = await started
+        job_id = first[-1].removeprefix("job:")
+        status = json.loads(await research_server.job_status(job_id))
+        pages[1].set()
+        final = json.loads(await research_server.job_status(job_id, wait_seconds=5))
+        return first, status, final
+
+    first, status, final = asyncio.run(scenario())
+    assert len(first) == 101 and first[-1].startswith("job:")
+    assert status["status"] == "running" and status["fetched"] == 100
+    assert final["status"] == "completed" and len(final["paper_ids"]) == 200
+    assert json.loads(asyncio.run(research_server.cancel_job(final["job_id"])))["status"] == "completed"
+
+
+def test_a_running_job_can_be_cancelled(research_server, pages):
+    async def scenario():
+        pages[0].set()
+        first = await research_server.search_papers("jobs cancel", 200)
+        return json.loads(await research_server.cancel_job(first[-1]))
+
+    cancelled = asyncio.run(scenario())
+    assert cancelled["status"] == "cancelled" and cancelled["fetched"] == 100
+
+
+def test_a_joined_job_is_cancelled_only_when_its_last_waiter_gives_up(research_server, pages):
+    async def scenario():
+        callers = [asyncio.create_task(research_server.search_papers("jobs joined", 200)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        job = research_server.jobs.running("jobs joined", 200)
+        assert job.waiters == 2
+        callers[0].cancel()
+        await asyncio.sleep(0.05)
+        assert job.waiters == 1 and not job.cancel_requested.is_set()
+        pages[0].set()
+        joined = await callers[1]
+        assert joined[-1] == f"job:{job.job_id}"
+        await research_server.cancel_job(job.job_id)
+
+        # The first job is past its first page, the next one waits for it again
+        pages[0].clear()
+        abandoned = asyncio.create_task(research_server.search_papers("jobs abandoned", 200))
+        await asyncio.sleep(0.05)
+        job = research_server.jobs.running("jobs abandoned", 200)
+        abandoned.cancel()
+        await asyncio.sleep(0.05)
+        # Nobody learned the job id, so nobody could ever cancel it
+        assert job.cancel_requested.is_set()
+        await job.task
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "cancelled" and job.waiters == 0
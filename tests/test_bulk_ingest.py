@@ -0,0 +1,131 @@
+import functools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from bulk_ingest import ingest
+from paper_store import PaperStore, minhash_signature
+
+
+def record(number, categories="cs.AI", created="Mon, 1 Jan 2024 12:00:00 GMT", versions=1):
+    """A record in the format of the public arXiv metadata snapshot."""
+    return {
+        "id": f"2401.{number:05d}",
+        "authors": "Ada Lovelace, Emmy Noether",
+        "title": f"Paper\n  number {number}",
+        "categories": categories,
+        "abstract": f"  The abstract of paper {number},\n  spread over lines with words w{number} and w{number + 1}.\n",
+        "versions": [{"version": f"v{v + 1}", "created": created} for v in range(versions)],
+        "update_date": "2024-06-01",
+        "authors_parsed": [["Lovelace", "Ada", ""], ["Noether", "Emmy", ""]]
+    }
+
+
+def write_snapshot(path, lines):
+    path.write_text("".join((line if isinstance(line, str) else json.dumps(line)) + "\n" for line in lines))
+    return str(path)
+
+
+def stored(store):
+    return {paper["paper_id"]: paper for paper in store.changes_since(0).papers}
+
+
+@pytest.fixture(autouse=True)
+def forkserver(monkeypatch):
+    # Other tests leave threads running in this process, which fork() would copy mid-flight
+    monkeypatch.setattr("bulk_ingest.ProcessPoolExecutor", functools.partial(
+        ProcessPoolExecutor, mp_context=multiprocessing.get_context("forkserver")))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PaperStore(str(tmp_path / "papers"))
+
+
+def run(snapshot, store, **kwargs):
+    return ingest(snapshot, store, workers=2, chunk_lines=5, show_progress=False, **kwargs)
+
+
+def test_category_and_date_filters(tmp_path, store):
+    snapshot = write_snapshot(tmp_path / "snapshot.json", [
+        record(1, "cs.AI math.CO", "Mon, 1 Jan 2024 12:00:00 GMT"),
+        record(2, "cs.LG", "Tue, 2 Jan 2024 12:00:00 GMT"),
+        record(3, "math.CO", "Wed, 3 Jan 2024 12:00:00 GMT"),
+        record(4, "csx.XY", "Wed, 3 Jan 2024 12:00:00 GMT"),
+        record(5, "hep-th", "Fri, 5 Jan 2024 12:00:00 GMT"),
+        # Filed by the first version's date, not the update date or a later version
+        record(6, "cs.AI", "Sun, 31 Dec 2023 12:00:00 GMT", versions=2),
+    ])
+    report = run(snapshot, store, categories=["cs", "math.CO"], since="2024-01-01", until="2024-01-03")
+    papers = stored(store)
+    assert sorted(papers) == ["2401.00001", "2401.00002", "2401.00003"]
+    assert report["records_read"] == 6 and report["papers_stored"] == 3
+    assert papers["2401.00002"]["published"] == "2024-01-02"
+    # Filed under their primary category
+    memberships = sorted(store.changes_since(0).memberships)
+    assert memberships == [("cs.ai", "2401.00001"), ("cs.lg", "2401.00002"), ("math.co", "2401.00003")]
+
+
+def test_unparsable_lines_are_counted_and_skipped(tmp_path, store):
+    missing_id = record(2)
+    del missing_id["id"]
+    snapshot = write_snapshot(tmp_path / "snapshot.json", [
+        record(1), "{not json", "", missing_id, '"just a string"', record(3)
+    ])
+    report = run(snapshot, store)
+    assert sorted(stored(store)) == ["2401.00001", "2401.00003"]
+    # Blank lines are not errors
+    assert report["unparsable_lines"] == 3 and report["records_read"] == 6
+
+
+def test_stored_signatures_match_minhash_signature(tmp_path, store):
+    snapshot = write_snapshot(tmp_path / "snapshot.json", [record(i, versions=i % 3 + 1) for i in range(1, 8)])
+    run(snapshot, store)
+    papers = stored(store)
+    assert len(papers) == 7
+    assert papers["2401.00002"]["version"] == 3
+    for paper_id, paper in papers.items():
+        # Signed in a worker process from the normalized title and abstract
+        assert "\n" not in paper["title"] and not paper["summary"].startswith(" ")
+        row = store.connection.execute("SELECT signature FROM papers WHERE paper_id = ?", (paper_id,)).fetchone()
+        expected = minhash_signature(f"{paper['title']}\n{paper['summary']}")
+        assert np.array_equal(np.frombuffer(row[0], dtype=np.uint32), expected)
+
+
+def test_an_interrupted_ingest_resumes_from_the_saved_offset(tmp_path, store, monkeypatch):
+    snapshot = write_snapshot(tmp_path / "snapshot.json", [record(i) for i in range(1, 41)])
+    saved = []
+    interrupt_at = [2]
+    save_batch = store.save_batch
+
+    def recording_save_batch(entries, *args):
+        if len(saved) == interrupt_at[0]:
+            raise KeyboardInterrupt
+        saved.append([paper_id for _, paper_id, _, _ in entries])
+        return save_batch(entries, *args)
+
+    monkeypatch.setattr(store, "save_batch", recording_save_batch)
+    with pytest.raises(KeyboardInterrupt):
+        run(snapshot, store, batch_size=10)
+    offset, records = store.ingest_progress(str(tmp_path / "snapshot.json"))
+    assert records == 20 and 0 < offset < (tmp_path / "snapshot.json").stat().st_size
+    assert len(stored(store)) == 20
+
+    interrupt_at[0] = None
+    report = run(snapshot, store, batch_size=10)
+    assert report["resumed_at_byte"] == offset
+    assert report["records_read"] == 40 and report["papers_stored"] == 20
+    # Nothing before the offset was read or written again
+    written = [paper_id for batch in saved for paper_id in batch]
+    assert sorted(written) == [f"2401.{i:05d}v1" for i in range(1, 41)]
+    assert sorted(stored(store)) == [f"2401.{i:05d}" for i in range(1, 41)]
+    assert store.connection.execute("SELECT COUNT(*) FROM topic_papers").fetchone()[0] == 40
+
+    # Finished: running it again reads nothing, --restart reads everything again
+    assert run(snapshot, store)["papers_stored"] == 0
+    again = run(snapshot, store, restart=True)
+    assert again["resumed_at_byte"] == 0 and again["papers_stored"] == 40
+    assert len(stored(store)) == 40
@@ -0,0 +1,94 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from mcp.types import Tool
+
+from llm_cache import ResponseCache, tool_catalog_hash
+
+
+def tool(name, description="A tool", properties=None):
+    return Tool(name=name, description=description,
+                inputSchema={"type": "object", "properties": properties or {"topic": {"type": "string"}}})
+
+
+TOOLS = [tool("search_papers"), tool("extract_info")]
+MESSAGES = [HumanMessage("Find papers on knot theory")]
+
+
+def cache_for(tmp_path, tools=TOOLS, **kwargs):
+    cache = ResponseCache(str(tmp_path / "cache" / "responses.db"), **kwargs)
+    cache.set_catalog(tool_catalog_hash(tools))
+    return cache
+
+
+def test_a_stored_response_is_a_hit(tmp_path):
+    cache = cache_for(tmp_path)
+    key = cache.key("claude-haiku", MESSAGES)
+    assert cache.get(key) is None
+    cache.put(key, "claude-haiku", AIMessage("Here are some papers."))
+    assert cache.get(key).content == "Here are some papers."
+    # Message ids differ between runs and don't change the key
+    assert cache.key("claude-haiku", [HumanMessage("Find papers on knot theory", id="other")]) == key
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+    assert cache.snapshot()["entries"] == 1 and cache.snapshot()["hit_rate"] == 0.5
+    cache.close()
+
+
+def test_the_model_and_the_tools_are_part_of_the_key(tmp_path):
+    cache = cache_for(tmp_path)
+    key = cache.key("claude-haiku", MESSAGES)
+    assert cache.key("claude-sonnet", MESSAGES) != key
+    assert cache.key("claude-haiku", MESSAGES, ["search_papers"]) != key
+    assert cache.key("claude-haiku", MESSAGES + [AIMessage("Sure.")]) != key
+    # Any change to a tool's description or schema is a different catalog
+    for changed in ([tool("search_papers")],
+                    [tool("search_papers", "Search arXiv"), tool("extract_info")],
+                    [tool("search_papers", properties={"query": {"type": "string"}}), tool("extract_info")]):
+        assert tool_catalog_hash(changed) != tool_catalog_hash(TOOLS)
+    assert tool_catalog_hash(TOOLS[::-1]) == tool_catalog_hash(TOOLS)
+    cache.close()
+
+
+def test_responses_of_another_tool_catalog_are_dropped(tmp_path):
+    cache = cache_for(tmp_path)
+    key = cache.key("claude-haiku", MESSAGES)
+    cache.put(key, "claude-haiku", AIMessage("Here are some papers."))
+    cache.close()
+
+    reopened = cache_for(tmp_path, tools=TOOLS[:1])
+    assert reopened.key("claude-haiku", MESSAGES) != key
+    assert reopened.get(key) is None
+    assert reopened.stats["invalidated"] == 1 and reopened.bytes == 0
+    reopened.close()
+
+
+def test_tool_calls_survive_a_round_trip(tmp_path):
+    cache = cache_for(tmp_path)
+    response = AIMessage(
+        content=[{"type": "text", "text": "Let me search."},
+                 {"type": "tool_use", "id": "toolu_1", "name": "search_papers", "input": {"topic": "knots"}}],
+        tool_calls=[{"name": "search_papers", "args": {"topic": "knots", "max_results": 5}, "id": "toolu_1"}],
+        usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+    )
+    key = cache.key("claude-haiku", MESSAGES)
+    cache.put(key, "claude-haiku", response)
+    cached = cache.get(key)
+    assert isinstance(cached, AIMessage)
+    assert cached.content == response.content
+    assert cached.tool_calls == response.tool_calls
+    # The conversation continues from the replayed calls
+    follow_up = MESSAGES + [cached, ToolMessage("[]", tool_call_id="toolu_1")]
+    assert cache.key("claude-haiku", follow_up) == cache.key(
+        "claude-haiku", MESSAGES + [response, ToolMessage("[]", tool_call_id="toolu_1")])
+    cache.close()
+
+
+def test_least_recently_used_responses_are_evicted(tmp_path):
+    cache = cache_for(tmp_path, max_bytes=2000)
+    keys = [cache.key("claude-haiku", [HumanMessage(f"Question {i}")]) for i in range(3)]
+    for key in keys[:2]:
+        cache.put(key, "claude-haiku", AIMessage("x" * 500))
+    cache.get(keys[0])
+    cache.put(keys[2], "claude-haiku", AIMessage("x" * 500))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.stats["evictions"] == 1 and cache.bytes <= 2000
+    cache.close()
@@ -0,0 +1,89 @@
+import asyncio
+
+from mcp_gateway import FairScheduler
+
+
+def test_a_flooding_conversation_does_not_starve_the_others():
+    scheduler = FairScheduler(max_inflight=2)
+    admitted = []
+    running = peak = 0
+
+    async def call(conversation_id):
+        nonlocal running, peak
+        async with scheduler.slot(conversation_id):
+            admitted.append(conversation_id)
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+    async def scenario():
+        flood = [asyncio.create_task(call("flood")) for _ in range(20)]
+        await asyncio.sleep(0)
+        quiet = [asyncio.create_task(call("quiet")) for _ in range(2)]
+        await asyncio.gather(*flood, *quiet)
+
+    asyncio.run(scenario())
+    # Two calls got in at once, then the waiting conversations took turns
+    assert admitted[:6] == ["flood", "flood", "flood", "quiet", "flood", "quiet"]
+    assert len(admitted) == 22 and peak == 2
+    assert scheduler.inflight == 0 and not scheduler.waiters
+
+
+def test_a_cancelled_waiter_gives_up_its_place():
+    scheduler = FairScheduler(max_inflight=1)
+
+    async def scenario():
+        await scheduler.acquire("a")
+        cancelled = asyncio.create_task(scheduler.acquire("b"))
+        waiting = asyncio.create_task(scheduler.acquire("c"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert list(scheduler.waiters) == ["c"]
+        scheduler.release()
+        await asyncio.wait_for(waiting, timeout=1)
+        assert scheduler.inflight == 1 and cancelled.cancelled()
+        scheduler.release()
+
+    asyncio.run(scenario())
+    assert scheduler.inflight == 0 and not scheduler.waiters
+
+
+def test_a_slot_granted_to_a_cancelled_waiter_is_handed_on():
+    scheduler = FairScheduler(max_inflight=1)
+
+    async def scenario():
+        await scheduler.acquire("a")
+        cancelled = asyncio.create_task(scheduler.acquire("b"))
+        waiting = asyncio.create_task(scheduler.acquire("c"))
+        await asyncio.sleep(0)
+        # Granted to b, which is cancelled before it gets to run
+        scheduler.release()
+        cancelled.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+        assert scheduler.inflight == 1 and cancelled.cancelled()
+        scheduler.release()
+
+    asyncio.run(scenario())
+    assert scheduler.inflight == 0 and not scheduler.waiters
+
+
+def test_a_call_cancelled_while_it_runs_frees_its_slot():
+    scheduler = FairScheduler(max_inflight=1)
+
+    async def call():
+        async with scheduler.slot("a"):
+            await asyncio.sleep(10)
+
+    async def scenario():
+        running = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(scheduler.acquire("b"))
+        await asyncio.sleep(0)
+        running.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+        scheduler.release()
+
+    asyncio.run(scenario())
+    assert scheduler.inflight == 0 and not scheduler.waiters
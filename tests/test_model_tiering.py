@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage
+from mcp import Tool
+from mcp.types import CallToolResult, TextContent
+
+from mcp_chatbot import MCP_Chatbot, Conversation
+
+
+class FakeChatModel:
+    """Asks for search_papers, and answers once the last turn brought a tool result."""
+    def __init__(self, name, bad_tool_call=None):
+        self.name = name
+        self.bad_tool_call = bad_tool_call  # "unknown_tool" or "invalid"
+        self.calls = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        answered = any(message.type == "tool" for message in messages[-2:])
+        message_id = f"{self.name}-{self.calls}"
+        if answered:
+            return AIMessage(content=f"answer from {self.name}", id=message_id)
+        if self.bad_tool_call == "invalid":
+            return AIMessage(content="", id=message_id, invalid_tool_calls=[
+                {"name": "search_papers", "args": "{topic: algebra", "id": "call", "error": "bad JSON", "type": "invalid_tool_call"}
+            ])
+        name = "no_such_tool" if self.bad_tool_call == "unknown_tool" else "search_papers"
+        return AIMessage(content="", id=message_id, tool_calls=[
+            {"name": name, "args": {"topic": "algebra"}, "id": f"{self.name}-call-{self.calls}"}
+        ])
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+    async def call_tool(self, name, args):
+        self.calls.append((name, args))
+        return CallToolResult(content=[TextContent(type="text", text=json.dumps(["2401.00001v1"]))])
+
+
+def chatbot_with(fast_model):
+    chatbot = MCP_Chatbot()
+    chatbot.response_cache = None
+    chatbot.prefetcher.rules = []
+    chatbot.model, chatbot.fast_model = "strong", fast_model and fast_model.name
+    chatbot.chat_models = {"strong": FakeChatModel("strong")}
+    if fast_model:
+        chatbot.chat_models[fast_model.name] = fast_model
+    chatbot.available_tools = [Tool(name="search_papers", description="Search arXiv", inputSchema={"type": "object"})]
+    session = FakeSession()
+    chatbot.tool_to_session["search_papers"] = session
+    return chatbot, session
+
+
+def ask(chatbot, query="find papers on algebra"):
+    return asyncio.run(chatbot.process_query(query, Conversation()))
+
+
+def test_tool_turns_go_to_the_fast_model_and_answers_to_the_strong_one():
+    fast = FakeChatModel("fast")
+    chatbot, session = chatbot_with(fast)
+    assert ask(chatbot) == "answer from strong"
+    assert session.calls == [("search_papers", {"topic": "algebra"})]
+    stats = chatbot.model_report()
+    # The fast model routed the tool call, its final answer was redone by the strong model
+    assert stats["fast"]["calls"] == 2
+    assert stats["strong"]["calls"] == 1
+    assert stats["escalations"] == {"final_answer": 1, "malformed": 0}
+
+
+def test_a_call_to_an_unknown_tool_is_redone_by_the_strong_model():
+    chatbot, session = chatbot_with(FakeChatModel("fast", bad_tool_call="unknown_tool"))
+    assert ask(chatbot) == "answer from strong"
+    # The malformed call never reached a server
+    assert session.calls == [("search_papers", {"topic": "algebra"})]
+    assert chatbot.model_report()["escalations"]["malformed"] == 1
+
+
+def test_unparseable_tool_calls_are_redone_by_the_strong_model():
+    chatbot, session = chatbot_with(FakeChatModel("fast", bad_tool_call="invalid"))
+    assert ask(chatbot) == "answer from strong"
+    assert session.calls == [("search_papers", {"topic": "algebra"})]
+    assert chatbot.model_report()["escalations"]["malformed"] == 1
+
+
+def test_without_a_fast_model_every_turn_goes_to_the_strong_model():
+    chatbot, session = chatbot_with(None)
+    assert ask(chatbot) == "answer from strong"
+    stats = chatbot.model_report()
+    assert stats["strong"]["calls"] == 2
+    assert stats["fast"]["calls"] == 0
+    assert stats["escalations"] == {"final_answer": 0, "malformed": 0}
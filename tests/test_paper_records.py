@@ -0,0 +1,111 @@
+import json
+from datetime import date
+
+import pytest
+
+from paper_records import PaperCatalog
+
+
+def paper(authors, published="2024-01-01", title="A paper"):
+    return {"title": title, "authors": authors, "summary": f"{title} by {', '.join(authors)}.",
+            "pdf_url": None, "published": published}
+
+
+def ordinal(value):
+    return date.fromisoformat(value).toordinal()
+
+
+@pytest.fixture
+def catalog():
+    catalog = PaperCatalog()
+    catalog.add("algebra", "2401.00001", paper(["José García", "Ada Lovelace"]))
+    catalog.add("algebra", "2401.00002", paper(["jose  garcia", "Emmy Noether"]))
+    catalog.add("topology", "2401.00003", paper(["Emmy Noether", "Henri Poincaré"]))
+    return catalog
+
+
+def test_names_that_normalize_alike_are_one_author(catalog):
+    papers = catalog.papers_by_author("JOSE GARCIA")
+    assert [record.paper_id for record in papers] == ["2401.00001", "2401.00002"]
+    assert catalog.papers_by_author("Nobody") == []
+
+
+def test_coauthors_by_distance_with_shared_papers(catalog):
+    catalog.add(None, "2401.00004", paper(["José García", "Ada Lovelace"]))
+    assert catalog.coauthors("jose garcia") == [
+        {"name": "Ada Lovelace", "distance": 1, "shared_papers": 2},
+        {"name": "Emmy Noether", "distance": 1, "shared_papers": 1},
+    ]
+    # The display name is the first spelling seen
+    assert catalog.coauthors("Henri Poincare", depth=2) == [
+        {"name": "Emmy Noether", "distance": 1, "shared_papers": 1},
+        {"name": "José García", "distance": 2, "shared_papers": 0},
+    ]
+    assert catalog.coauthors("Nobody") == []
+
+
+def test_changing_a_papers_authors_updates_the_indexes(catalog):
+    catalog.add(None, "2401.00002", paper(["Emmy Noether"]))
+    assert [record.paper_id for record in catalog.papers_by_author("Jose Garcia")] == ["2401.00001"]
+    assert [item["name"] for item in catalog.coauthors("Emmy Noether")] == ["Henri Poincaré"]
+    stats = json.loads(catalog.topic_stats_json("algebra"))
+    assert stats["papers"] == 2
+    assert {author["name"]: author["papers"] for author in stats["top_authors"]} == {
+        "José García": 1, "Ada Lovelace": 1, "Emmy Noether": 1
+    }
+
+
+def test_topic_stats_count_each_author_once_per_paper(catalog):
+    stats = json.loads(catalog.topic_stats_json("algebra"))
+    assert stats["authors"] == 3
+    assert stats["top_authors"][0] == {"name": "José García", "papers": 2}
+    assert stats["papers_per_year"] == {"2024": 2}
+    assert catalog.topic_stats_json("unknown") is None
+
+
+def test_date_listing_pages_through_papers_of_the_same_day():
+    catalog = PaperCatalog()
+    for i, day in enumerate(["2024-01-03", "2024-01-01", "2024-01-02", "2024-01-02", "2024-01-02", "2023-12-31"]):
+        catalog.add("dates", f"2401.{i:05d}", paper([f"Author {i}"], published=day))
+
+    def pages(descending, **kwargs):
+        seen, after = [], None
+        while True:
+            records, total = catalog.list_by_date("dates", descending=descending, after=after, limit=2, **kwargs)
+            seen += [record.paper_id for record in records]
+            if len(records) < 2:
+                return seen, total
+            after = (records[-1].published, records[-1].paper_id)
+
+    newest_first, total = pages(True)
+    assert total == 6 and len(set(newest_first)) == 6
+    assert [catalog.get(paper_id).published for paper_id in newest_first] == sorted(
+        (catalog.get(paper_id).published for paper_id in newest_first), reverse=True)
+    oldest_first, _ = pages(False)
+    assert oldest_first == newest_first[::-1]
+    in_range, total = pages(False, since=ordinal("2024-01-01"), until=ordinal("2024-01-02"))
+    assert total == 4 and sorted(in_range) == ["2401.00001", "2401.00002", "2401.00003", "2401.00004"]
+
+
+def test_date_listing_follows_changed_dates_and_rejects_unknown_cursors():
+    catalog = PaperCatalog()
+    catalog.add(None, "2401.00001", paper(["Ada Lovelace"], published="2024-01-01"))
+    catalog.add(None, "2401.00002", paper(["Ada Lovelace"], published="2024-01-02"))
+    catalog.add(None, "2401.00001", paper(["Ada Lovelace"], published="2024-01-03"))
+    records, total = catalog.list_by_date()
+    assert [record.paper_id for record in records] == ["2401.00001", "2401.00002"] and total == 2
+    with pytest.raises(ValueError):
+        catalog.list_by_date(after=(ordinal("2024-01-02"), "2401.99999"))
+
+
+def test_bulk_and_single_adds_keep_the_date_index_sorted():
+    catalog = PaperCatalog()
+    # More than are inserted one by one, then a few
+    for i in range(200):
+        catalog.add("dates", f"2401.{i:05d}", paper(["Ada Lovelace"], published=f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"))
+    catalog.list_by_date()
+    for i in range(200, 205):
+        catalog.add("dates", f"2401.{i:05d}", paper(["Ada Lovelace"], published=f"2023-01-{i % 28 + 1:02d}"))
+    records, total = catalog.list_by_date("dates", descending=False, limit=300)
+    assert total == 205
+    assert [record.published for record in records] == sorted(record.published for record in catalog.papers.values())
@@ -0,0 +1,69 @@
+import random
+
+from paper_store import NEAR_DUPLICATE_THRESHOLD, PaperStore
+
+
+def abstract(seed: int, words: int = 150) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"w{rng.randrange(5000)}" for _ in range(words))
+
+
+def info(title: str, summary: str) -> dict:
+    return {"title": title, "authors": ["Ada Lovelace"], "summary": summary,
+            "pdf_url": None, "published": "2024-01-01"}
+
+
+def test_reposted_paper_is_a_near_duplicate(tmp_path):
+    store = PaperStore(str(tmp_path))
+    original = abstract(1)
+    # The same abstract with one word changed, as in a re-upload under a new id
+    edited = original.replace(original.split()[40], "changed", 1)
+    store.save_papers("algebra", [("2401.00001v1", info("Groups", original))])
+    store.save_papers("algebra", [("2401.00002v1", info("Groups", edited)),
+                                  ("2401.00003v1", info("Rings", abstract(2)))])
+
+    duplicates = store.near_duplicates("2401.00002")
+    assert [d["paper_id"] for d in duplicates] == ["2401.00001"]
+    assert duplicates[0]["similarity"] >= NEAR_DUPLICATE_THRESHOLD
+    # Found from either side, and unrelated papers aren't matched
+    assert [d["paper_id"] for d in store.near_duplicates("2401.00001")] == ["2401.00002"]
+    assert store.near_duplicates("2401.00003") == []
+
+
+def test_new_version_of_a_paper_is_not_its_own_duplicate(tmp_path):
+    store = PaperStore(str(tmp_path))
+    text = abstract(3)
+    store.save_papers("algebra", [("2401.00001v1", info("Groups", text))])
+    store.save_papers("algebra", [("2401.00001v2", info("Groups, revised", text + " erratum"))])
+    assert store.near_duplicates("2401.00001") == []
+
+
+def test_signatures_given_by_bulk_ingest_are_used_for_matching(tmp_path):
+    from paper_store import minhash_signature
+    store = PaperStore(str(tmp_path))
+    text = abstract(4)
+    store.save_batch([
+        ("algebra", "2401.00001v1", info("Groups", text), minhash_signature(f"Groups\n{text}").tobytes()),
+        ("algebra", "2401.00002v1", info("Groups", text), None)
+    ])
+    assert [d["paper_id"] for d in store.near_duplicates("2401.00001")] == ["2401.00002"]
+    assert store.compact(remove_legacy_files=False)["near_duplicate_pairs"] == 1
+
+
+def test_changes_are_read_in_batches_as_they_are_consumed(tmp_path, monkeypatch):
+    monkeypatch.setattr("paper_store.CHANGES_BATCH", 3)
+    store = PaperStore(str(tmp_path))
+    store.save_papers("algebra", [(f"2401.{i:05d}v1", info(f"Paper {i}", abstract(i))) for i in range(5)])
+    store.save_papers("rings", [(f"2401.{i:05d}v1", info(f"Paper {i}", abstract(i))) for i in range(5, 10)])
+    seen = store.changes_since(0)
+    # A new version written while the changes are read is left for the next refresh
+    first = next(iter(seen.papers))
+    store.save_papers("rings", [("2401.00009v2", info("Paper 9, revised", abstract(9)))])
+    papers = [first] + list(seen.papers)
+    assert [paper["paper_id"] for paper in papers] == [f"2401.{i:05d}" for i in range(9)]
+    assert len(list(seen.memberships)) == 10
+
+    later = store.changes_since(seen.seq)
+    assert [(paper["paper_id"], paper["version"]) for paper in later.papers] == [("2401.00009", 2)]
+    assert list(later.memberships) == []
+    assert list(store.changes_since(later.seq).papers) == []
@@ -0,0 +1,162 @@
+import asyncio
+import http.server
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pdf_cache import CHUNK_SIZE, PdfCache
+
+PDF_SIZE = 2 * CHUNK_SIZE + 1000
+
+
+def pdf_bytes(name: str, size: int = PDF_SIZE) -> bytes:
+    header = f"%PDF-1.5\n% {name}\n".encode()
+    pattern = bytes(range(256)) * (size // 256 + 1)
+    return header + pattern[:size - len(header)]
+
+
+class PdfStandIn:
+    """Local stand-in for arxiv.org/pdf: /pdf/<name> is a PDF of PDF_SIZE bytes, /html/<name> is not."""
+    def __init__(self):
+        self.requests = 0
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests += 1
+                time.sleep(0.05)  # long enough for concurrent readers to overlap
+                kind, name = self.path.strip("/").split("/", 1)
+                body = pdf_bytes(name) if kind == "pdf" else b"<html>Not found</html>"
+                self.send_response(200)
+                self.send_header("Content-Type", "application/pdf" if kind == "pdf" else "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def pdf_server():
+    stand_in = PdfStandIn()
+    yield stand_in
+    stand_in.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PdfCache(str(tmp_path / "pdfs"))
+    yield cache
+    cache.close()
+
+
+def test_concurrent_fetches_share_one_download(cache, pdf_server):
+    url = f"{pdf_server.url}/pdf/2401.00001v1"
+    with ThreadPoolExecutor(8) as executor:
+        paths = list(executor.map(lambda _: cache.fetch("2401.00001v1", url), range(8)))
+    assert len(set(paths)) == 1
+    assert pdf_server.requests == 1
+    assert cache.stats["downloads"] == 1
+    assert os.listdir(cache.directory) == ["2401.00001v1.pdf"]
+
+
+def test_reads_return_the_requested_byte_ranges(cache, pdf_server):
+    path = cache.fetch("2401.00001v1", f"{pdf_server.url}/pdf/2401.00001v1")
+    expected = pdf_bytes("2401.00001v1")
+    assert cache.size(path) == PDF_SIZE
+    chunks = [cache.read(path, offset) for offset in range(0, PDF_SIZE, CHUNK_SIZE)]
+    assert [len(chunk) for chunk in chunks] == [CHUNK_SIZE, CHUNK_SIZE, 1000]
+    assert b"".join(chunks) == expected
+    # The file was opened once for all of its chunks
+    assert cache.stats["hits"] == 1
+    # Across a chunk boundary, and running into or starting past the end of the file
+    assert cache.read(path, CHUNK_SIZE - 10, 20) == expected[CHUNK_SIZE - 10:CHUNK_SIZE + 10]
+    assert cache.read(path, PDF_SIZE - 5, 20) == expected[-5:]
+    assert cache.read(path, PDF_SIZE + 1) == b""
+    with pytest.raises(ValueError):
+        cache.read(path, -1)
+    assert cache.stats["hits"] == 1
+
+
+def test_only_downloaded_pdfs_are_cached(cache, pdf_server):
+    assert cache.cached("2401.00001v1") is None
+    path = cache.fetch("2401.00001v1", f"{pdf_server.url}/pdf/2401.00001v1")
+    assert cache.cached("2401.00001v1") == path
+    assert cache.stats["hits"] == 0
+
+
+def test_responses_that_are_not_pdfs_leave_nothing_behind(cache, pdf_server):
+    with pytest.raises(ValueError, match="did not return a PDF"):
+        cache.fetch("2401.00001v1", f"{pdf_server.url}/html/2401.00001v1")
+    assert os.listdir(cache.directory) == []
+    assert cache.stats["downloads"] == 0
+
+
+def test_least_recently_opened_files_are_evicted_beyond_max_bytes(tmp_path, pdf_server):
+    cache = PdfCache(str(tmp_path / "pdfs"), max_bytes=2 * PDF_SIZE)
+    first, second = (cache.fetch(name, f"{pdf_server.url}/pdf/{name}") for name in ("first", "second"))
+    os.utime(first, (1000, 1000))
+    os.utime(second, (2000, 2000))
+    # The first file was downloaded before the second but was opened since
+    cache.read(first, 0, 10)
+    assert first in cache.maps
+
+    third = cache.fetch("third", f"{pdf_server.url}/pdf/third")
+    assert sorted(os.listdir(cache.directory)) == ["first.pdf", "third.pdf"]
+    assert cache.stats["evictions"] == 1
+    # The file being fetched is kept even if it alone is over the limit
+    cache.max_bytes = PDF_SIZE // 2
+    fourth = cache.fetch("fourth", f"{pdf_server.url}/pdf/fourth")
+    assert os.listdir(cache.directory) == ["fourth.pdf"]
+    assert cache.read(fourth, 0, 8) == b"%PDF-1.5"
+    assert not os.path.exists(third) and first not in cache.maps
+    cache.close()
+
+
+def test_pdf_resources_serve_chunks_of_stored_papers(research_server, pdf_server, tmp_path, monkeypatch):
+    pdfs = PdfCache(str(tmp_path / "pdfs"))
+    monkeypatch.setattr(research_server, "pdfs", pdfs)
+    for paper_id in ("2402.00001v1", "math/0501518v2"):
+        research_server.store.save_batch([("pdf_tests", paper_id, {
+            "title": "A PDF", "authors": ["Ada Lovelace"], "summary": "A paper with a PDF.",
+            "pdf_url": f"{pdf_server.url}/pdf/{paper_id.replace('/', '_')}", "published": "2024-01-01"
+        }, None)])
+
+    async def read(uri):
+        return (await research_server.mcp.read_resource(uri))[0].content
+
+    async def scenario():
+        infos = await asyncio.gather(*(read("papers://2402.00001v1/pdf") for _ in range(4)))
+        info = json.loads(infos[0])
+        chunks = [await read(uri) for uri in info["chunks"]]
+        boundary = await read(f"papers://2402.00001v1/pdf/{CHUNK_SIZE - 10}/20")
+        old_style = json.loads(await read("papers://math_0501518v2/pdf"))
+        missing = json.loads(await read("papers://2402.99999v1/pdf"))
+        return info, chunks, boundary, old_style, missing
+
+    info, chunks, boundary, old_style, missing = asyncio.run(scenario())
+    expected = pdf_bytes("2402.00001v1")
+    assert info["size"] == PDF_SIZE and info["chunk_size"] == CHUNK_SIZE
+    assert info["chunks"] == [f"papers://2402.00001v1/pdf/{offset}" for offset in (0, CHUNK_SIZE, 2 * CHUNK_SIZE)]
+    assert b"".join(chunks) == expected
+    assert boundary == expected[CHUNK_SIZE - 10:CHUNK_SIZE + 10]
+    assert old_style["paper_id"] == "math/0501518v2" and old_style["size"] == PDF_SIZE
+    assert "error" in missing
+    # One download per paper, however many readers asked for it
+    assert pdfs.stats["downloads"] == 2 and pdf_server.requests == 2
+    pdfs.close()
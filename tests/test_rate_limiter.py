@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+
+import arxiv
+import pytest
+
+import arxiv_fetch
+from arxiv_fetch import ScheduledClient
+from pdf_cache import PdfCache
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PriorityRateLimiter
+
+
+def wait_for_waiters(limiter, count):
+    deadline = time.monotonic() + 5
+    while len(limiter.waiting) < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_interactive_callers_overtake_queued_background_ones():
+    limiter = PriorityRateLimiter(rate=20, burst=1)
+    limiter.acquire()
+    order = []
+    threads = []
+    for name, priority in (("background 1", PRIORITY_BACKGROUND), ("background 2", PRIORITY_BACKGROUND),
+                           ("interactive", PRIORITY_INTERACTIVE)):
+        thread = threading.Thread(target=lambda n=name, p=priority: (limiter.acquire(p), order.append(n)))
+        thread.start()
+        threads.append(thread)
+        wait_for_waiters(limiter, len(threads))
+    for thread in threads:
+        thread.join()
+    assert order == ["interactive", "background 1", "background 2"]
+    assert limiter.snapshot()["queue_depth"] == {"interactive": 0, "background": 0}
+
+
+def test_pause_holds_back_every_caller():
+    limiter = PriorityRateLimiter(rate=1000, burst=1)
+    limiter.pause(0.3)
+    assert limiter.acquire() >= 0.29
+    assert limiter.stats["throttled"] == 1
+
+
+def test_tokens_refill_at_the_configured_rate():
+    limiter = PriorityRateLimiter(rate=10, burst=1)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    # The first token is there already, the next three take 0.1 s each
+    assert 0.28 <= time.monotonic() - started < 1.0
+
+
+@pytest.fixture
+def client(atom_server, monkeypatch):
+    monkeypatch.setattr(arxiv_fetch, "backoff_delay", lambda attempt: 0.01)
+    client = ScheduledClient(PriorityRateLimiter(rate=1000, burst=10), page_size=10, num_retries=3)
+    client.query_url_format = atom_server.url + "?{}"
+    return client
+
+
+def search(client, max_results=5):
+    return [paper.get_short_id() for paper in client.results(arxiv.Search(query="algebra", max_results=max_results))]
+
+
+def test_throttling_pauses_the_shared_limiter_for_retry_after(client, atom_server):
+    atom_server.statuses.extend([503, 429])
+    atom_server.retry_after = "0.2"
+    started = time.monotonic()
+    assert len(search(client)) == 5
+    assert time.monotonic() - started >= 0.4
+    assert client.limiter.stats["throttled"] == 2
+    assert client.limiter.stats["retries"] == 2
+    assert atom_server.requests == 3
+
+
+def test_server_errors_are_retried_without_pausing_other_callers(client, atom_server):
+    atom_server.statuses.extend([500, 502])
+    assert len(search(client)) == 5
+    assert client.limiter.stats["throttled"] == 0
+    assert client.limiter.stats["retries"] == 2
+    assert client.limiter.paused_until == 0
+
+
+def test_persistent_server_errors_fail_after_the_retries(client, atom_server):
+    atom_server.statuses.extend([500] * 4)
+    with pytest.raises(arxiv.HTTPError):
+        search(client)
+    assert atom_server.requests == 4
+    assert client.limiter.stats["failures"] == 1
+
+
+def test_client_errors_are_not_retried(client, atom_server):
+    atom_server.statuses.append(400)
+    with pytest.raises(arxiv.HTTPError):
+        search(client)
+    assert atom_server.requests == 1
+
+
+def test_local_tools_answer_while_arxiv_calls_wait_for_the_limiter(atom_server, research_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(research_server, "ARXIV_API_URL", atom_server.url)
+    # A PDF downloaded earlier
+    pdfs = PdfCache(str(tmp_path / "pdfs"))
+    monkeypatch.setattr(research_server, "pdfs", pdfs)
+    research_server.store.save_batch([("limiter_tests", "2403.00001v1", {
+        "title": "A cached PDF", "authors": ["Ada Lovelace"], "summary": "Downloaded earlier.",
+        "pdf_url": "http://127.0.0.1:9/pdf/2403.00001v1", "published": "2024-03-01"
+    }, None)])
+    with open(pdfs.path("2403.00001v1"), "wb") as file:
+        file.write(b"%PDF-1.5\n")
+    limiter = research_server.arxiv_limiter
+    monkeypatch.setattr(limiter, "rate", 1000)
+    monkeypatch.setattr(limiter, "burst", 10)
+
+    async def scenario():
+        # Every arXiv request now waits, more of them than there are worker threads
+        limiter.pause(60)
+        searches = asyncio.gather(*(research_server.search_papers(f"topic {i}", 2) for i in range(12)))
+        try:
+            await asyncio.sleep(0.2)
+            started = time.monotonic()
+            info = await asyncio.wait_for(research_server.extract_info("2401.00001"), timeout=5)
+            waited = time.monotonic() - started
+            started = time.monotonic()
+            chunk = await asyncio.wait_for(research_server.mcp.read_resource("papers://2403.00001v1/pdf/0"), timeout=5)
+            return info, waited, chunk[0].content, time.monotonic() - started
+        finally:
+            with limiter.condition:
+                limiter.paused_until = 0
+                limiter.condition.notify_all()
+            await searches
+
+    info, waited, chunk, chunk_waited = asyncio.run(scenario())
+    assert "no saved information" in info.lower()
+    assert waited < 1
+    assert chunk == b"%PDF-1.5\n"
+    assert chunk_waited < 1
+    pdfs.close()
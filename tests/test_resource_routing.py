@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+
+from resource_routing import ResourceCache, UriTemplateTrie
+
+RESEARCH_SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "research_server.py")
+
+
+def test_literal_segments_win_over_template_variables():
+    routes = UriTemplateTrie()
+    routes.insert("papers://{topic}", "topic")
+    routes.insert("papers://folders", "folders")
+    routes.insert("papers://{topic}/stats", "stats")
+    routes.insert("papers://jobs/{job_id}", "job")
+    assert routes.match("papers://folders") == ("folders", "papers://folders", {})
+    assert routes.match("papers://algebra") == ("topic", "papers://{topic}", {"topic": "algebra"})
+    assert routes.match("papers://algebra/stats") == ("stats", "papers://{topic}/stats", {"topic": "algebra"})
+    assert routes.match("papers://jobs/3f2a") == ("job", "papers://jobs/{job_id}", {"job_id": "3f2a"})
+    # "jobs" is also a topic name when nothing more specific matches
+    assert routes.match("papers://jobs") == ("topic", "papers://{topic}", {"topic": "jobs"})
+    assert len(routes) == 4
+
+
+def test_unknown_uris_and_partial_matches_are_not_routed():
+    routes = UriTemplateTrie()
+    routes.insert("papers://{paper_id}/pdf/{offset}", "chunk")
+    routes.insert("research://metrics", "metrics")
+    assert routes.match("papers://2401.00001v1/pdf") is None
+    assert routes.match("papers://2401.00001v1/pdf/0/20") is None
+    assert routes.match("research://other") is None
+    assert routes.match("papers://2401.00001v1/pdf/1048576")[2] == {"paper_id": "2401.00001v1", "offset": "1048576"}
+
+
+def test_templates_with_several_variables_in_one_segment():
+    routes = UriTemplateTrie()
+    routes.insert("files://{name}.{ext}", "file")
+    assert routes.match("files://notes.md") == ("file", "files://{name}.{ext}", {"name": "notes", "ext": "md"})
+    assert routes.match("files://notes") is None
+
+
+def test_cache_entries_expire_unless_kept_until_invalidated(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("resource_routing.time.monotonic", lambda: now[0])
+    cache = ResourceCache(ttl=10)
+    cache.put("papers://folders", "folders", expires=False)
+    cache.put("papers://algebra", "algebra")
+    now[0] += 11
+    assert cache.get("papers://folders") == "folders"
+    assert cache.get("papers://algebra") is None
+    cache.invalidate("papers://folders")
+    assert cache.get("papers://folders") is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 2
+
+
+def test_cache_evicts_least_recently_used_beyond_max_bytes():
+    cache = ResourceCache(max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa" and cache.get("c") == "cccc"
+    assert cache.bytes == 8 and cache.stats["evictions"] == 1
+    # Too large to be cached at all
+    cache.put("d", "d" * 11)
+    assert cache.get("d") is None and len(cache) == 2
+
+
+def test_cache_drops_the_entries_of_a_restarted_session():
+    old, new = object(), object()
+    cache = ResourceCache()
+    cache.put("papers://folders", "folders", old, expires=False)
+    cache.put("papers://algebra", "algebra", new, expires=False)
+    cache.invalidate_session(old)
+    assert cache.get("papers://folders") is None
+    assert cache.get("papers://algebra") == "algebra"
+
+
+def test_chatbot_serves_cached_resources_until_the_server_reports_a_change(atom_server, tmp_path):
+    from mcp_chatbot import MCP_Chatbot
+
+    async def scenario():
+        chatbot = MCP_Chatbot()
+        chatbot.response_cache = None
+        await chatbot.connect_to_server("research", {
+            "command": sys.executable, "args": [RESEARCH_SERVER], "cwd": str(tmp_path),
+            "env": {"ARXIV_API_URL": atom_server.url, "ARXIV_RATE": "100", "ARXIV_BURST": "10"}
+        })
+        try:
+            session = chatbot.resource_routes.match("papers://algebra")[0]
+            before = await chatbot.read_resource(session, "papers://algebra")
+            assert before.startswith("# No papers found")
+            # Served from the cache: the server doesn't see another read
+            assert chatbot.resource_cache.get("papers://algebra") == before
+
+            result = await session.call_tool("search_papers", {"topic": "algebra", "max_results": 3})
+            assert not result.isError
+            # The resources/updated notification arrives while nothing else is going on
+            for _ in range(100):
+                if chatbot.resource_cache.get("papers://algebra") is None:
+                    break
+                await asyncio.sleep(0.05)
+            assert chatbot.resource_cache.get("papers://algebra") is None
+            after = await chatbot.read_resource(session, "papers://algebra")
+            assert "2401.00029v1" in after
+        finally:
+            await chatbot.cleanup()
+
+    asyncio.run(scenario())
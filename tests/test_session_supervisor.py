@@ -0,0 +1,45 @@
+import asyncio
+import builtins
+import json
+import os
+import signal
+import sys
+import time
+
+from mcp_chatbot import MCP_Chatbot
+
+STUB_SERVER = {"command": sys.executable, "args": [os.path.join(os.path.dirname(__file__), "stub_server.py")]}
+
+
+async def server_pid(session) -> int:
+    result = await session.call_tool("server_pid", {})
+    return json.loads(result.content[0].text)
+
+
+def test_dead_server_is_restarted_while_the_chat_prompt_waits(monkeypatch):
+    monkeypatch.setenv("MCP_PING_INTERVAL", "0.2")
+
+    async def scenario():
+        chatbot = MCP_Chatbot()
+        chatbot.response_cache = None
+        await chatbot.connect_to_server("stub", STUB_SERVER)
+        supervised = chatbot.supervisor.sessions["stub"]
+        try:
+            first_pid = await server_pid(supervised)
+            os.kill(first_pid, signal.SIGKILL)
+
+            def idle_user(prompt):
+                # Nobody types anything until the supervisor has replaced the server
+                deadline = time.monotonic() + 15
+                while supervised.restarts == 0 and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                return "quit"
+
+            monkeypatch.setattr(builtins, "input", idle_user)
+            await asyncio.wait_for(chatbot.chat_loop(), timeout=30)
+            assert supervised.restarts == 1
+            assert await server_pid(supervised) != first_pid
+        finally:
+            await chatbot.cleanup()
+
+    asyncio.run(scenario())
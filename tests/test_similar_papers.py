@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from paper_vectors import PaperVectors
+
+
+def save(research_server, paper_id, summary):
+    # Written to the store directly, as bulk_ingest.py or compact do
+    research_server.store.save_batch([("vector_tests", paper_id, {
+        "title": "Vector test paper", "authors": ["Ada Lovelace"], "summary": summary,
+        "pdf_url": None, "published": "2024-05-01"
+    }, None)])
+
+
+def similar(research_server, text):
+    result = json.loads(asyncio.run(research_server.similar_papers(text=text, k=3)))
+    return [match["paper_id"] for match in result]
+
+
+def test_papers_stored_after_the_vectors_are_open_are_found(research_server):
+    research_server.get_vectors()
+    save(research_server, "2405.00001v1", "ferromagnetic spintronics heterostructure magnon damping")
+    assert similar(research_server, "magnon damping in ferromagnetic heterostructures")[0] == "2405.00001v1"
+
+
+def test_large_backlogs_are_embedded_in_the_background(research_server, monkeypatch):
+    paper_vectors = research_server.get_vectors()
+    monkeypatch.setattr(research_server, "VECTOR_SYNC_INLINE", 0)
+    save(research_server, "2405.00002v1", "glacier calving iceberg fjord meltwater plume")
+    # The request doesn't wait for the backlog, it is handed to a worker
+    submitted = []
+    with monkeypatch.context() as patch:
+        patch.setattr(research_server.executor, "submit", lambda func, *args: submitted.append(func))
+        research_server.get_vectors()
+    assert submitted == [research_server.sync_vectors]
+    assert "2405.00002" not in paper_vectors
+    submitted[0]()
+    assert similar(research_server, "meltwater plume at a calving glacier fjord")[0] == "2405.00002v1"
+    assert research_server.store.changed_papers(paper_vectors.seq) == 0
+
+
+def test_the_synced_position_survives_a_restart(research_server):
+    paper_vectors = research_server.get_vectors()
+    save(research_server, "2405.00003v1", "sourdough fermentation lactobacillus crumb")
+    research_server.get_vectors()
+    reopened = PaperVectors(research_server.VECTOR_DIR)
+    assert reopened.seq == paper_vectors.seq > 0
+    assert "2405.00003" in reopened
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_the_same_key_share_one_run():
+    flights = SingleFlight()
+    runs = []
+
+    async def fetch(key):
+        runs.append(key)
+        await asyncio.sleep(0.01)
+        return f"result of {key}"
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.run(key, lambda key=key: fetch(key)) for key in "aaab"))
+        # Finished calls aren't shared with later ones
+        results.append(await flights.run("a", lambda: fetch("a")))
+        return results
+
+    assert asyncio.run(scenario()) == ["result of a"] * 3 + ["result of b", "result of a"]
+    assert runs == ["a", "b", "a"]
+    assert flights.stats == {"calls": 3, "coalesced": 2}
+    assert flights.running == {}
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    flights = SingleFlight()
+
+    async def scenario():
+        done = asyncio.Event()
+
+        async def fetch():
+            await done.wait()
+            return "shared"
+
+        callers = [asyncio.create_task(flights.run("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0)
+        callers[0].cancel()
+        await asyncio.sleep(0)
+        assert callers[0].cancelled() and not flights.running["key"].cancelled()
+        done.set()
+        return await callers[1]
+
+    assert asyncio.run(scenario()) == "shared"
+
+
+def test_the_shared_call_finishes_when_its_only_caller_is_cancelled():
+    flights = SingleFlight()
+    finished = threading.Event()
+
+    async def scenario():
+        async def fetch():
+            await asyncio.sleep(0.01)
+            finished.set()
+
+        caller = asyncio.create_task(flights.run("key", fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert finished.is_set()
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("arXiv is down")
+
+    async def scenario():
+        return await asyncio.gather(*(flights.run("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["arXiv is down"] * 3
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.stats == {"calls": 1, "coalesced": 2}
+    assert flights.running == {}
+
+
+def test_searches_of_one_topic_folder_are_coalesced(research_server, monkeypatch):
+    release = threading.Event()
+    searches = []
+
+    def search_papers(topic, max_results):
+        searches.append(topic)
+        release.wait(5)
+        return ["2407.00001v1"]
+
+    monkeypatch.setattr(research_server, "_search_papers", search_papers)
+    stats = dict(research_server.arxiv_flights.stats)
+
+    async def scenario():
+        callers = [asyncio.create_task(research_server.search_papers(topic, 5))
+                   for topic in ("Flight Tests", "flight tests", "flight_tests")]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*callers)
+
+    assert asyncio.run(scenario()) == [["2407.00001v1"]] * 3
+    assert searches == ["Flight Tests"]
+    assert research_server.arxiv_flights.stats["calls"] == stats["calls"] + 1
+    assert research_server.arxiv_flights.stats["coalesced"] == stats["coalesced"] + 2
+
+
+def test_searches_for_other_numbers_of_results_are_not_coalesced(research_server, monkeypatch):
+    monkeypatch.setattr(research_server, "_search_papers", lambda topic, count: [f"{topic}:{count}"])
+
+    async def scenario():
+        return await asyncio.gather(research_server.search_papers("flight counts", 5),
+                                    research_server.search_papers("Flight Counts", 6))
+
+    assert asyncio.run(scenario()) == [["flight counts:5"], ["Flight Counts:6"]]
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+
+@pytest.fixture
+def sync(research_server, atom_server, monkeypatch):
+    monkeypatch.setattr(research_server, "ARXIV_API_URL", atom_server.url)
+    monkeypatch.setattr(research_server.arxiv_limiter, "rate", 1000)
+    monkeypatch.setattr(research_server.arxiv_limiter, "burst", 10)
+
+    def sync(topic, max_results=100):
+        return json.loads(asyncio.run(research_server.sync_topic(topic, max_results)))
+    return sync
+
+
+def stored(research_server, topic):
+    return sorted(research_server.get_catalog().topics.get(topic, {}))
+
+
+def ids(numbers):
+    return [f"2401.{i:05d}v1" for i in numbers]
+
+
+def test_a_sync_fetches_only_what_was_submitted_since_the_last_one(research_server, atom_server, sync):
+    atom_server.papers = 5
+    first = sync("sync incremental")
+    assert first["new_paper_ids"] == ids(range(4, -1, -1))
+    assert first["caught_up"] and first["watermark"]["paper_id"] == "2401.00004v1"
+
+    atom_server.papers = 8
+    second = sync("sync incremental")
+    assert second["new_paper_ids"] == ids([7, 6, 5])
+    # Paging stopped at the watermark
+    assert second["fetched"] == 4
+    assert second["watermark"]["paper_id"] == "2401.00007v1"
+    assert len(stored(research_server, "sync_incremental")) == 8
+
+
+def test_a_capped_sync_leaves_the_rest_for_the_next_one(research_server, atom_server, sync):
+    atom_server.papers = 5
+    sync("sync capped")
+    atom_server.papers = 30
+    capped = sync("sync capped", max_results=10)
+    assert capped["new_paper_ids"] == ids(range(29, 19, -1))
+    # The watermark stays below the gap until a sync reaches it
+    assert not capped["caught_up"] and capped["watermark"]["paper_id"] == "2401.00004v1"
+
+    assert sync("sync capped", max_results=10)["new_paper_ids"] == ids(range(19, 9, -1))
+    last = sync("sync capped", max_results=10)
+    assert last["new_paper_ids"] == ids(range(9, 4, -1))
+    assert last["caught_up"] and last["watermark"]["paper_id"] == "2401.00029v1"
+    assert stored(research_server, "sync_capped") == [f"2401.{i:05d}" for i in range(30)]
+
+
+def test_a_topic_that_is_up_to_date_reads_one_result(research_server, atom_server, sync):
+    atom_server.papers = 5
+    first = sync("sync current")
+    again = sync("sync current")
+    assert again["new_paper_ids"] == [] and again["fetched"] == 1
+    assert again["caught_up"] and again["watermark"] == first["watermark"]
+    assert len(stored(research_server, "sync_current")) == 5
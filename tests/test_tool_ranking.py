@@ -0,0 +1,52 @@
+import pytest
+from mcp import Tool
+
+from tool_ranking import ToolRanker, stem
+
+
+def tool(tool_name, description, **properties):
+    return Tool(name=tool_name, description=description, inputSchema={
+        "type": "object", "properties": {key: {"type": "string", "description": value} for key, value in properties.items()}
+    })
+
+
+TOOLS = [
+    tool("read_file", "Read the complete contents of a file from the file system.", path="Path of the file"),
+    tool("list_directory", "Get a listing of all files and directories in a path.", path="Path of the directory"),
+    tool("search_papers", "Search for papers on arXiv based on a topic and store their information.", topic="The topic"),
+    tool("extract_info", "Search for information about a specific paper across all topic directories.",
+         paper_id="The ID of the paper"),
+    tool("papers_by_author", "Find the stored papers of an author, by name.", name="The author's name"),
+    tool("save_note", "Write a note about a paper to the notes file.", text="Text of the note"),
+    tool("list_classes", "List the arXiv subject classes.")
+]
+
+
+@pytest.mark.parametrize("singular, plural", [
+    ("file", "files"), ("name", "names"), ("note", "notes"), ("article", "articles"), ("paper", "papers"),
+    ("class", "classes"), ("box", "boxes"), ("search", "searches"), ("wish", "wishes"), ("directory", "directories")
+])
+def test_singular_and_plural_have_the_same_stem(singular, plural):
+    assert stem(singular) == stem(plural)
+
+
+@pytest.mark.parametrize("singular, plural, expected", [
+    ("read the file notes.md", "read the files notes.md and todo.md", "read_file"),
+    ("papers of the author named Hinton", "papers of the authors named Hinton and LeCun", "papers_by_author"),
+    ("write a note about 2401.00001", "write notes about 2401.00001", "save_note"),
+    ("show the arXiv subject class", "show the arXiv subject classes", "list_classes"),
+])
+def test_singular_and_plural_queries_select_the_same_tool(singular, plural, expected):
+    ranker = ToolRanker(TOOLS)
+    assert ranker.select(singular, limit=1) == [expected]
+    assert ranker.select(plural, limit=1) == [expected]
+
+
+def test_pinned_tools_are_offered_first_and_count_towards_the_limit():
+    ranker = ToolRanker(TOOLS)
+    assert ranker.select("read the file notes.md", limit=2, pinned=["search_papers"]) == ["read_file", "search_papers"]
+
+
+def test_all_tools_are_offered_when_nothing_matches():
+    ranker = ToolRanker(TOOLS)
+    assert ranker.select("hello there", limit=2) == [tool.name for tool in TOOLS]
@@ -0,0 +1,103 @@
+from typing import Dict, List
+import asyncio
+import json
+import time
+
+# After `after` returns, call `call` once per value in its result, passing the
+# value as `argument`. Only read-only tools should be prefetched.
+DEFAULT_PREFETCH_RULES = [
+    {"after": "search_papers", "call": "extract_info", "argument": "paper_id"}
+]
+# search_papers ends its ID list with "job:<job_id>" while a large search continues
+# in the background; the handle isn't a value to call a follow-up with
+JOB_HANDLE_PREFIX = "job:"
+
+
+def result_values(result) -> List[str]:
+    """The values returned by a tool: one per text item, JSON lists flattened."""
+    values = []
+    for item in getattr(result, "content", None) or []:
+        text = getattr(item, "text", None)
+        if text is None:
+            continue
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            parsed = text
+        if isinstance(parsed, list):
+            values.extend(str(value) for value in parsed)
+        else:
+            values.append(str(parsed))
+    return values
+
+
+def call_key(tool_name: str, tool_args: dict) -> str:
+    return f"{tool_name}:{json.dumps(tool_args, sort_keys=True)}"
+
+
+class SpeculativePrefetcher:
+    """
+    Run likely follow-up tool calls in the background while the model is thinking.
+
+    Results are kept for `ttl` seconds and handed out once by take(). At most
+    `max_pending` speculative calls exist at a time; whatever is still unused when
+    a query ends is cancelled by cancel().
+    """
+    def __init__(self, rules=None, ttl=60.0, max_pending=8):
+        self.rules = DEFAULT_PREFETCH_RULES if rules is None else rules
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self.entries: Dict[str, tuple] = {}  # key -> (task, created, conversation_id)
+        self.stats = {"scheduled": 0, "hits": 0, "cancelled": 0, "dropped": 0}
+
+    def schedule_followups(self, tool_name: str, result, conversation_id, call_tool) -> None:
+        """Start the follow-ups of a finished call; call_tool(name, args) does the real call."""
+        self._expire()
+        for rule in self.rules:
+            if rule["after"] != tool_name:
+                continue
+            for value in result_values(result):
+                if value.startswith(JOB_HANDLE_PREFIX):
+                    continue
+                args = {rule["argument"]: value}
+                key = call_key(rule["call"], args)
+                if key in self.entries:
+                    continue
+                if len(self.entries) >= self.max_pending:
+                    self.stats["dropped"] += 1
+                    continue
+                task = asyncio.create_task(call_tool(rule["call"], args))
+                # Failures of speculative work are only seen if the model asks for it
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self.entries[key] = (task, time.monotonic(), conversation_id)
+                self.stats["scheduled"] += 1
+
+    def take(self, tool_name: str, tool_args: dict):
+        """The prefetched task for this call, or None."""
+        self._expire()
+        entry = self.entries.pop(call_key(tool_name, tool_args), None)
+        if entry is None:
+            return None
+        task = entry[0]
+        if task.done() and (task.cancelled() or task.exception()):
+            return None
+        self.stats["hits"] += 1
+        return task
+
+    def cancel(self, conversation_id=None) -> None:
+        """Cancel unused speculative calls of a conversation (all of them if None)."""
+        for key, (task, _, owner) in list(self.entries.items()):
+            if conversation_id is None or owner == conversation_id:
+                self._drop(key)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key, (_, created, _) in list(self.entries.items()):
+            if now - created > self.ttl:
+                self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        task = self.entries.pop(key)[0]
+        if not task.done():
+            task.cancel()
+            self.stats["cancelled"] += 1
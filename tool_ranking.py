@@ -0,0 +1,102 @@
+from collections import Counter
+from typing import Iterable, List, Sequence
+import math
+import re
+
+# Tools offered to the model for every query, whatever it asks for
+DEFAULT_PINNED_TOOLS = ["search_papers", "extract_info"]
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Web addresses, with a scheme or a well-known top-level domain (file names like notes.md don't match)
+URL_PATTERN = re.compile(r"://|\bwww\.|\b[\w-]+\.(?:com|org|net|edu|gov|io|ai|dev|co|uk|de)\b", re.IGNORECASE)
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "get", "give", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "please", "some", "that", "the", "them", "then",
+    "this", "to", "up", "us", "want", "was", "what", "which", "with", "you", "your"
+}
+# Tool names count as much as this many mentions in a description
+NAME_WEIGHT = 3
+
+
+# (suffix, replacement), the first that matches is used. "es" is a plural ending only
+# after sibilants (classes, boxes, searches, wishes), elsewhere only the "s" goes (files)
+SUFFIXES = (
+    ("ing", ""), ("ies", "y"), ("sses", "ss"), ("xes", "x"), ("ches", "ch"), ("shes", "sh"),
+    ("ss", "ss"), ("ed", ""), ("s", "")
+)
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping, enough to match "papers" with "paper" and "searching" with "search"."""
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def terms(text: str) -> List[str]:
+    words = WORD_PATTERN.findall(text.lower())
+    return [stem(word) for word in words if word not in STOPWORDS]
+
+
+def tool_terms(tool) -> List[str]:
+    """Terms of an MCP tool: its name (weighted), description and parameter names and descriptions."""
+    words = terms(tool.name.replace("_", " ").replace("-", " ")) * NAME_WEIGHT
+    words += terms(tool.description or "")
+    for name, schema in ((tool.inputSchema or {}).get("properties") or {}).items():
+        words += terms(name.replace("_", " "))
+        if isinstance(schema, dict):
+            words += terms(schema.get("description", ""))
+    return words
+
+
+class ToolRanker:
+    """
+    BM25 ranking of tools against a query, over names, descriptions and parameters.
+
+    Built once per tool catalog; ranking a query is a few dictionary lookups per
+    query term, so it runs on every query without a model or network call.
+    """
+    def __init__(self, tools: Iterable, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.names = []
+        self.counts = []
+        for tool in tools:
+            self.names.append(tool.name)
+            self.counts.append(Counter(tool_terms(tool)))
+        self.lengths = [sum(counts.values()) for counts in self.counts]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        document_frequency = Counter(term for counts in self.counts for term in counts)
+        n = len(self.names)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def scores(self, query: str) -> List[float]:
+        query_terms = set(terms(query))
+        if URL_PATTERN.search(query):
+            query_terms.add("url")
+        scores = []
+        for counts, length in zip(self.counts, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.average_length)
+            scores.append(sum(
+                self.idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                for term in query_terms if term in counts
+            ))
+        return scores
+
+    def select(self, query: str, limit: int, pinned: Sequence[str] = ()) -> List[str]:
+        """
+        Names of the tools to offer for a query, in catalog order: the pinned
+        tools that exist, then the best matches up to `limit` tools in total.
+        When nothing matches the query, all tools are offered.
+        """
+        scores = self.scores(query)
+        if not any(scores):
+            return list(self.names)
+        selected = {name for name in pinned if name in self.names}
+        ranked = sorted(range(len(self.names)), key=lambda i: -scores[i])
+        for i in ranked:
+            if len(selected) >= limit or scores[i] <= 0:
+                break
+            selected.add(self.names[i])
+        return [name for name in self.names if name in selected]